@@ -0,0 +1,121 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from . import metrics
+import asyncio
+import os
+
+# Max mutations waiting on one session before producers are made to wait
+INBOX_LIMIT = int(os.environ.get("PLANPOKER_INBOX_LIMIT", "256"))
+# How long a producer waits for room in a full inbox before the event is dropped
+PUT_TIMEOUT = float(os.environ.get("PLANPOKER_INBOX_PUT_TIMEOUT_MS", "1000")) / 1000
+# An actor with an empty inbox stops after this long; the next event restarts it
+IDLE_TIMEOUT = 30.0
+
+Job = Callable[[], Awaitable[None]]
+
+
+class InboxFull(Exception):
+    pass
+
+
+# Single consumer for one session: every owner-side mutation (join, leave,
+# client events, reset) runs to completion before the next one starts, so
+# handlers can await freely without another event interleaving. Sessions
+# do not share a lock, so busy rooms never hold up quiet ones.
+class SessionActor:
+    def __init__(self, session_id: str, registry: "SessionActors", limit: int):
+        self.session_id = session_id
+        self.registry = registry
+        self.inbox: "asyncio.Queue[Tuple[Job, asyncio.Future]]" = asyncio.Queue(limit)
+        self.running = False
+        # Set by SessionActors.close(); a cancel that wait_for swallows
+        # (the inbox delivered a job in the same iteration) still stops us
+        self.closed = False
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self.closed:
+            try:
+                job, done = self.inbox.get_nowait()
+            except asyncio.QueueEmpty:
+                try:
+                    job, done = await asyncio.wait_for(self.inbox.get(), self.registry.idle_timeout)
+                except asyncio.TimeoutError:
+                    # Nothing can be enqueued between this check and the removal
+                    if self.inbox.empty():
+                        self.registry._retire(self)
+                        return
+                    continue
+
+            self.running = True
+            try:
+                await job()
+            except asyncio.CancelledError:
+                done.cancel()
+                raise
+            except Exception as e:
+                print(f"Error in session {self.session_id}: {e}")
+                if not done.done():
+                    done.set_exception(e)
+                continue
+            finally:
+                self.running = False
+            if not done.done():
+                done.set_result(None)
+
+
+class SessionActors:
+    def __init__(self, limit: int = INBOX_LIMIT, put_timeout: float = PUT_TIMEOUT, idle_timeout: float = IDLE_TIMEOUT):
+        self.limit = limit
+        self.put_timeout = put_timeout
+        self.idle_timeout = idle_timeout
+        self._actors: Dict[str, SessionActor] = {}
+        self.rejected = 0
+
+    # Queue a job on the session's actor. Returns a future resolved when the
+    # job has run; callers that only need ordering need not await it. When
+    # the inbox is full the producer waits (backpressure on that socket or
+    # bus reader) and InboxFull is raised if no room frees up in time.
+    # block=True waits indefinitely, for jobs that must not be lost (joins
+    # and leaves keep presence correct).
+    async def submit(self, session_id: str, job: Job, block: bool = False) -> asyncio.Future:
+        actor = self._actors.get(session_id)
+        if actor is None:
+            actor = self._actors[session_id] = SessionActor(session_id, self, self.limit)
+
+        done = asyncio.get_running_loop().create_future()
+        # Failures are already logged by the actor
+        done.add_done_callback(lambda f: f.cancelled() or f.exception())
+        item = (job, done)
+        try:
+            actor.inbox.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(actor.inbox.put(item), None if block else self.put_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                metrics.inbox_rejected_total.inc()
+                raise InboxFull(session_id)
+        return done
+
+    def _retire(self, actor: SessionActor):
+        if self._actors.get(actor.session_id) is actor:
+            del self._actors[actor.session_id]
+
+    # True while the session has a mutation running or waiting
+    def busy(self, session_id: str) -> bool:
+        actor = self._actors.get(session_id)
+        return actor is not None and (actor.running or not actor.inbox.empty())
+
+    def pending(self) -> int:
+        return sum(actor.inbox.qsize() for actor in self._actors.values())
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    async def close(self):
+        actors = list(self._actors.values())
+        self._actors.clear()
+        for actor in actors:
+            actor.closed = True
+            actor.task.cancel()
+        await asyncio.gather(*(actor.task for actor in actors), return_exceptions=True)
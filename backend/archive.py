@@ -0,0 +1,288 @@
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from urllib.parse import quote, unquote
+from .state import SessionState, dumps, now_ms
+from .snapshots import UNMASKED_PHASES
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+
+# How often queued rounds are appended to the log
+FLUSH_INTERVAL = float(os.environ.get("PLANPOKER_ARCHIVE_FLUSH_MS", "1000")) / 1000
+# Queued rounds that trigger a flush before the interval is up
+BATCH_SIZE = 256
+# Rounds kept per session by the in-memory archive
+MEMORY_ROUNDS = int(os.environ.get("PLANPOKER_ARCHIVE_MEMORY_ROUNDS", "1000"))
+# Most rounds returned by one query
+MAX_QUERY_ROUNDS = 1000
+
+
+# The round about to be thrown away by clear_votes / set_active_work_item,
+# with every raw vote. Votes are stored compactly as
+# [userId, value, timestamp, jobRole]; times are epoch milliseconds.
+def round_record(session: SessionState, outcome: str) -> Dict[str, Any]:
+    item = session.get_work_item(session.activeWorkItemId) if session.activeWorkItemId else None
+    votes = []
+    for vote in session.votes.values():
+        participant = session.get_participant(vote.userId)
+        role = participant.jobRole.value if participant is not None else None
+        votes.append([vote.userId, vote.value, vote.timestamp, role])
+    return {
+        "sessionId": session.id,
+        "workItemId": session.activeWorkItemId,
+        "title": item.title if item is not None else None,
+        "startedAt": min(vote[2] for vote in votes) if votes else None,
+        "endedAt": now_ms(),
+        "outcome": outcome,
+        "revealed": session.phase in UNMASKED_PHASES,
+        "agreedEstimate": item.agreedEstimate if item is not None else None,
+        "votes": votes,
+    }
+
+
+# Stored record as returned by queries, votes spelled out. A round that was
+# never revealed keeps its values hidden, as they were while it ran: only
+# who voted, and when, is returned.
+def expand(record: Dict[str, Any]) -> Dict[str, Any]:
+    expanded = dict(record)
+    revealed = record["revealed"]
+    expanded["votes"] = [
+        {"userId": user_id, "value": value if revealed else None, "timestamp": timestamp, "jobRole": role}
+        for user_id, value, timestamp, role in record["votes"]
+    ]
+    return expanded
+
+
+# Completed estimation rounds per session, oldest first. The base class
+# keeps the last MEMORY_ROUNDS per session in memory, for sessions still in
+# memory (lost on eviction, reset and restart); LogRoundArchive persists them. append() is called from the event path
+# and must stay O(1): no serialization or I/O happens there.
+class RoundArchive:
+    def __init__(self, memory_rounds: int = MEMORY_ROUNDS):
+        self.memory_rounds = memory_rounds
+        self._rounds: Dict[str, Deque[Dict[str, Any]]] = {}
+        self.appended = 0
+
+    @property
+    def pending(self) -> int:
+        return 0
+
+    def append(self, record: Dict[str, Any]):
+        rounds = self._rounds.get(record["sessionId"])
+        if rounds is None:
+            rounds = self._rounds[record["sessionId"]] = deque(maxlen=self.memory_rounds)
+        rounds.append(record)
+        self.appended += 1
+
+    # The session left memory (evicted or reset); a no-op for persistent archives
+    def forget(self, session_id: str):
+        self._rounds.pop(session_id, None)
+
+    # Rounds of one session that ended within [since, until], oldest first
+    async def query(
+        self, session_id: str, since: Optional[int] = None, until: Optional[int] = None,
+        limit: int = MAX_QUERY_ROUNDS
+    ) -> List[Dict[str, Any]]:
+        matches = [
+            record for record in self._rounds.get(session_id, ())
+            if (since is None or record["endedAt"] >= since) and (until is None or record["endedAt"] <= until)
+        ]
+        return matches[:limit]
+
+    async def flush(self) -> int:
+        return 0
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+# One process's part of the log: an append-only file of JSON lines plus an
+# index file of (sessionId, endedAt, offset, length) lines. The index is
+# written after the records it points to, so any complete index line refers
+# to a complete record.
+class _Segment:
+    __slots__ = ("log_path", "index_path", "index_offset", "entries")
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.index_path = log_path[:-len(".log")] + ".idx"
+        # Bytes of the index file already read into entries
+        self.index_offset = 0
+        # sessionId -> sorted (endedAt, offset, length)
+        self.entries: Dict[str, List[Tuple[int, int, int]]] = {}
+
+    def add(self, session_id: str, ended_at: int, offset: int, length: int):
+        entries = self.entries.get(session_id)
+        if entries is None:
+            entries = self.entries[session_id] = []
+        insort(entries, (ended_at, offset, length))
+
+    # Pick up index lines appended (e.g. by another worker) since the last read
+    def refresh(self):
+        try:
+            with open(self.index_path, "rb") as f:
+                f.seek(self.index_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1
+        self.index_offset += end
+        for line in data[:end].decode().splitlines():
+            session_id, ended_at, offset, length = line.split("\t")
+            self.add(unquote(session_id), int(ended_at), int(offset), int(length))
+
+    # The first `limit` records of a session ending within [since, until]
+    def read(self, session_id: str, since: Optional[int], until: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        entries = self.entries.get(session_id)
+        if not entries:
+            return []
+        low = bisect_left(entries, (since,)) if since is not None else 0
+        high = bisect_right(entries, (until, float("inf"))) if until is not None else len(entries)
+        high = min(high, low + limit)
+        if low >= high:
+            return []
+        records = []
+        with open(self.log_path, "rb") as f:
+            for _, offset, length in entries[low:high]:
+                f.seek(offset)
+                records.append(json.loads(f.read(length)))
+        return records
+
+
+# Append-only round log under a directory. Each process appends to its own
+# segment (rounds-<pid>-<start>.log), so workers sharing the directory never
+# interleave writes, and queries read every segment's index. Appends are
+# queued and written in batches on a worker thread.
+class LogRoundArchive(RoundArchive):
+    def __init__(self, directory: str, flush_interval: float = FLUSH_INTERVAL):
+        super().__init__()
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._pending: List[Dict[str, Any]] = []
+        self._segments: Dict[str, _Segment] = {}
+        self._own: Optional[_Segment] = None
+        self._log = None
+        self._index = None
+        self._log_size = 0
+        # Serializes file access between the writer and query threads
+        self._io = threading.Lock()
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def append(self, record: Dict[str, Any]):
+        self._pending.append(record)
+        self.appended += 1
+        if len(self._pending) >= BATCH_SIZE:
+            self._wakeup.set()
+
+    async def query(
+        self, session_id: str, since: Optional[int] = None, until: Optional[int] = None,
+        limit: int = MAX_QUERY_ROUNDS
+    ) -> List[Dict[str, Any]]:
+        # Read-your-writes: rounds still queued are written first
+        await self.flush()
+        return await asyncio.to_thread(self._query, session_id, since, until, limit)
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if self._own is None or not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, batch)
+            self.batches += 1
+            return len(batch)
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"rounds-{os.getpid()}-{int(time.time() * 1000)}.log")
+        self._own = self._segments[path] = _Segment(path)
+        self._log = await asyncio.to_thread(open, path, "ab")
+        self._index = await asyncio.to_thread(open, self._own.index_path, "ab")
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._own is not None:
+            await self.flush()
+            await asyncio.to_thread(self._close_files)
+            self._own = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Round archive flush failed: {e}")
+
+    # One write per file per batch; records go out before their index lines
+    def _write(self, batch: List[Dict[str, Any]]):
+        lines = [dumps(record).encode() + b"\n" for record in batch]
+        with self._io:
+            offset = self._log_size
+            index = []
+            for record, line in zip(batch, lines):
+                index.append((record["sessionId"], record["endedAt"], offset, len(line)))
+                offset += len(line)
+            self._log.write(b"".join(lines))
+            self._log.flush()
+            index_data = "".join(
+                f"{quote(session_id, safe='')}\t{ended_at}\t{start}\t{length}\n"
+                for session_id, ended_at, start, length in index
+            ).encode()
+            self._index.write(index_data)
+            self._index.flush()
+            self._log_size = offset
+            self._own.index_offset += len(index_data)
+            for entry in index:
+                self._own.add(*entry)
+
+    def _query(self, session_id: str, since: Optional[int], until: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        with self._io:
+            for path in glob.glob(os.path.join(self.directory, "rounds-*.log")):
+                if path not in self._segments:
+                    self._segments[path] = _Segment(path)
+            records = []
+            for segment in self._segments.values():
+                if segment is not self._own:
+                    segment.refresh()
+                records.extend(segment.read(session_id, since, until, limit))
+        records.sort(key=lambda record: record["endedAt"])
+        return records[:limit]
+
+    def _close_files(self):
+        with self._io:
+            self._log.close()
+            self._index.close()
+
+
+# PLANPOKER_ARCHIVE_DIR: directory for the round log; without it rounds are
+# only kept in memory.
+def create_archive(directory: Optional[str] = None) -> RoundArchive:
+    directory = directory or os.environ.get("PLANPOKER_ARCHIVE_DIR")
+    if directory:
+        return LogRoundArchive(directory)
+    return RoundArchive()
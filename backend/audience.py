@@ -0,0 +1,170 @@
+from typing import Dict, List, Optional, Set
+from .snapshots import BroadcastPayload
+from . import codec
+import asyncio
+import os
+
+# Read-only audience: subscribers that watch a session (e.g. an all-hands
+# refinement) without joining it. They are not participants, so they never
+# grow the snapshot or the voters' fan-out loop.
+#
+# A broadcast only records its payload for the session's audience. At most
+# once per AUDIENCE_INTERVAL, one flush encodes the newest payload as a
+# single server-sent event - the masked, summary-projection snapshot shared
+# by every subscriber - and hands it to each of them. A subscriber holds
+# only the newest event, so a slow reader skips versions instead of queueing
+# them, and its response is written by its own task, not the broadcaster.
+
+AUDIENCE_INTERVAL = float(os.environ.get("PLANPOKER_AUDIENCE_INTERVAL_MS", "1000")) / 1000
+# Subscribers per worker, across sessions
+MAX_SUBSCRIBERS = int(os.environ.get("PLANPOKER_AUDIENCE_MAX", "10000"))
+# Subscribers handed an update per event loop iteration, so voters' socket
+# writers run between batches rather than after the whole audience
+FLUSH_BATCH = 32
+# Comment line sent on quiet streams so proxies keep them open
+KEEPALIVE_INTERVAL = 15.0
+
+KEEPALIVE = ": keepalive\n\n"
+RESET = "event: session_reset\ndata: {}\n\n"
+
+
+class AudienceFull(Exception):
+    pass
+
+
+class Subscriber:
+    __slots__ = ("version", "event", "closed", "_ready")
+
+    def __init__(self):
+        self.version = -1
+        self.event: Optional[str] = None
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    # Replace whatever the reader has not picked up yet
+    def offer(self, version: int, event: str):
+        if version > self.version:
+            self.version = version
+            self.event = event
+            self._ready.set()
+
+    def close(self, event: Optional[str] = None):
+        self.closed = True
+        self.event = event
+        self._ready.set()
+
+    # The next event to write; None once closed and nothing is left to send
+    async def next(self, timeout: float = KEEPALIVE_INTERVAL) -> Optional[str]:
+        if not self._ready.is_set():
+            if self.closed:
+                return None
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return KEEPALIVE
+        self._ready.clear()
+        event, self.event = self.event, None
+        return event if event is not None or not self.closed else None
+
+
+class _Stream:
+    __slots__ = ("subscribers", "payload", "version", "sent_at", "handle")
+
+    def __init__(self):
+        self.subscribers: Set[Subscriber] = set()
+        # Newest payload not yet flushed, and the version last flushed
+        self.payload: Optional[BroadcastPayload] = None
+        self.version = -1
+        self.sent_at = float("-inf")
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+def encode_event(payload: BroadcastPayload) -> str:
+    snapshot = payload.projection(True).snapshot
+    return f"event: snapshot\nid: {snapshot.version}\ndata: {snapshot.frame(codec.JSON)}\n\n"
+
+
+class Audience:
+    def __init__(self, interval: float = AUDIENCE_INTERVAL, max_subscribers: int = MAX_SUBSCRIBERS):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._streams: Dict[str, _Stream] = {}
+        self._count = 0
+        self.flushes = 0
+        self.events_offered = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def watching(self, session_id: str) -> bool:
+        return session_id in self._streams
+
+    # Raises AudienceFull beyond max_subscribers. With a payload, the new
+    # subscriber starts from it rather than waiting for the next broadcast.
+    def subscribe(self, session_id: str, payload: Optional[BroadcastPayload] = None) -> Subscriber:
+        if self._count >= self.max_subscribers:
+            raise AudienceFull(session_id)
+        stream = self._streams.get(session_id)
+        if stream is None:
+            stream = self._streams[session_id] = _Stream()
+        subscriber = Subscriber()
+        stream.subscribers.add(subscriber)
+        self._count += 1
+        if payload is not None:
+            subscriber.offer(payload.version, encode_event(payload))
+        return subscriber
+
+    def unsubscribe(self, session_id: str, subscriber: Subscriber):
+        stream = self._streams.get(session_id)
+        if stream is None or subscriber not in stream.subscribers:
+            return
+        stream.subscribers.discard(subscriber)
+        self._count -= 1
+        if not stream.subscribers:
+            if stream.handle is not None:
+                stream.handle.cancel()
+            del self._streams[session_id]
+
+    # Called on every broadcast; O(1) whatever the audience size
+    def publish(self, session_id: str, payload: BroadcastPayload):
+        stream = self._streams.get(session_id)
+        if stream is None or payload.version <= stream.version:
+            return
+        stream.payload = payload
+        if stream.handle is None:
+            loop = asyncio.get_running_loop()
+            stream.handle = loop.call_at(max(loop.time(), stream.sent_at + self.interval), self._flush, session_id)
+
+    # The session was reset or deleted: end every stream on it
+    def close(self, session_id: str):
+        stream = self._streams.pop(session_id, None)
+        if stream is None:
+            return
+        if stream.handle is not None:
+            stream.handle.cancel()
+        for subscriber in stream.subscribers:
+            subscriber.close(RESET)
+        self._count -= len(stream.subscribers)
+
+    def _flush(self, session_id: str):
+        stream = self._streams.get(session_id)
+        if stream is None:
+            return
+        stream.handle = None
+        payload, stream.payload = stream.payload, None
+        if payload is None:
+            return
+        stream.version = payload.version
+        stream.sent_at = asyncio.get_running_loop().time()
+        # Encoded once for the whole audience
+        event = encode_event(payload)
+        self.flushes += 1
+        self._offer(list(stream.subscribers), payload.version, event)
+
+    def _offer(self, subscribers: List[Subscriber], version: int, event: str, start: int = 0):
+        batch = subscribers[start:start + FLUSH_BATCH]
+        for subscriber in batch:
+            subscriber.offer(version, event)
+        self.events_offered += len(batch)
+        if start + FLUSH_BATCH < len(subscribers):
+            asyncio.get_running_loop().call_soon(self._offer, subscribers, version, event, start + FLUSH_BATCH)
@@ -0,0 +1,291 @@
+# Bulk work-item import and export in CSV, JSON (an array of objects) or
+# NDJSON. Parsers are push-based: feed() takes whatever text has arrived
+# and returns the records completed by it, so an upload is parsed as it
+# streams in and only one unfinished record is ever buffered.
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+from .state import WorkItemState, is_vote_value, dumps
+import codecs
+import csv
+import io
+import json
+import os
+import uuid
+
+CSV = "csv"
+JSON = "json"
+NDJSON = "ndjson"
+FORMATS = (CSV, JSON, NDJSON)
+
+MEDIA_TYPES = {
+    CSV: "text/csv",
+    JSON: "application/json",
+    NDJSON: "application/x-ndjson",
+}
+
+# Largest import accepted in one request / event
+MAX_IMPORT_ITEMS = int(os.environ.get("PLANPOKER_MAX_IMPORT_ITEMS", "10000"))
+# Items per chunk of a streamed export
+EXPORT_CHUNK_ITEMS = 500
+
+# Columns / keys read from each record; "estimate" is accepted as an alias
+FIELDS = ("title", "description", "agreedEstimate", "linkUrl")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# Format from an explicit name or, failing that, a Content-Type header
+def negotiate(name: Optional[str], content_type: Optional[str] = None) -> str:
+    if name:
+        name = name.lower()
+        if name not in FORMATS:
+            raise ImportFormatError(f"Unknown format {name!r}")
+        return name
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    for fmt, media_type in MEDIA_TYPES.items():
+        if content_type == media_type:
+            return fmt
+    if content_type in ("application/jsonl", "application/jsonlines"):
+        return NDJSON
+    return JSON
+
+
+# Validated work item from one imported record
+def to_work_item(record: Any, number: int) -> WorkItemState:
+    if not isinstance(record, dict):
+        raise ImportFormatError(f"Item {number}: expected an object")
+    title = record.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ImportFormatError(f"Item {number}: title is required")
+
+    description = record.get("description") or None
+    link_url = record.get("linkUrl") or None
+    estimate = record.get("agreedEstimate", record.get("estimate"))
+    if estimate == "":
+        estimate = None
+    if description is not None and not isinstance(description, str):
+        raise ImportFormatError(f"Item {number}: description must be a string")
+    if link_url is not None and not isinstance(link_url, str):
+        raise ImportFormatError(f"Item {number}: linkUrl must be a string")
+    if not is_vote_value(estimate):
+        raise ImportFormatError(f"Item {number}: invalid agreedEstimate")
+    return WorkItemState(str(uuid.uuid4()), title.strip(), description, estimate, link_url)
+
+
+class _LineParser:
+    def __init__(self):
+        self._pending = ""
+
+    # Complete lines (each ending in "\n") out of the text received so far
+    def _lines(self, text: str) -> List[str]:
+        buffer = self._pending + text
+        end = buffer.rfind("\n") + 1
+        self._pending = buffer[end:]
+        return [line + "\n" for line in buffer[:end].split("\n")[:-1]]
+
+    def _rest(self) -> List[str]:
+        rest, self._pending = self._pending, ""
+        return [rest] if rest else []
+
+
+class NdjsonParser(_LineParser):
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        return [self._parse(line) for line in self._lines(text) if line.strip()]
+
+    def close(self) -> List[Dict[str, Any]]:
+        return [self._parse(line) for line in self._rest() if line.strip()]
+
+    def _parse(self, line: str) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise ImportFormatError(f"Invalid NDJSON line: {e}") from None
+
+
+# The first row is the header; column names are matched case-insensitively.
+# A quoted field may span lines, so lines are held back until the quotes
+# seen so far balance and the row is complete.
+class CsvParser(_LineParser):
+    def __init__(self):
+        super().__init__()
+        self._row: List[str] = []
+        self._quotes = 0
+        self._columns: Optional[List[Optional[str]]] = None
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        return self._rows(self._lines(text))
+
+    def close(self) -> List[Dict[str, Any]]:
+        records = self._rows(self._rest())
+        if self._row:
+            records.extend(self._record("".join(self._row)))
+            self._row = []
+        return records
+
+    def _rows(self, lines: List[str]) -> List[Dict[str, Any]]:
+        records = []
+        for line in lines:
+            self._row.append(line)
+            self._quotes += line.count('"')
+            if self._quotes % 2 == 0:
+                records.extend(self._record("".join(self._row)))
+                self._row = []
+                self._quotes = 0
+        return records
+
+    def _record(self, text: str) -> List[Dict[str, Any]]:
+        try:
+            rows = list(csv.reader(io.StringIO(text)))
+        except csv.Error as e:
+            raise ImportFormatError(f"Invalid CSV: {e}") from None
+        records = []
+        for row in rows:
+            if not any(field.strip() for field in row):
+                continue
+            if self._columns is None:
+                self._columns = [self._column(name) for name in row]
+                if "title" not in self._columns:
+                    raise ImportFormatError("CSV header must include a title column")
+                continue
+            records.append({name: value for name, value in zip(self._columns, row) if name})
+        return records
+
+    @staticmethod
+    def _column(name: str) -> Optional[str]:
+        key = name.strip().lower()
+        if key == "estimate":
+            return "agreedEstimate"
+        for field in FIELDS:
+            if key == field.lower():
+                return field
+        return None
+
+
+# A top-level JSON array of objects, decoded element by element; the array
+# itself is never materialized
+class JsonArrayParser:
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._pending = ""
+        self._started = False
+        self._done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        buffer = self._pending + text
+        records = []
+        position = 0
+        while True:
+            position = self._skip(buffer, position)
+            if position >= len(buffer) or self._done:
+                break
+            if not self._started:
+                if buffer[position] != "[":
+                    raise ImportFormatError("Expected a JSON array of work items")
+                self._started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                self._done = True
+                position += 1
+                continue
+            try:
+                record, end = self._decoder.raw_decode(buffer, position)
+            except ValueError:
+                # Element not complete yet; wait for more text
+                break
+            records.append(record)
+            position = end
+        self._pending = buffer[position:]
+        return records
+
+    def close(self) -> List[Dict[str, Any]]:
+        if self._pending.strip() or not self._done:
+            raise ImportFormatError("Truncated or invalid JSON array")
+        return []
+
+    # Whitespace and element separators
+    @staticmethod
+    def _skip(buffer: str, position: int) -> int:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        return position
+
+
+def parser_for(fmt: str):
+    if fmt == CSV:
+        return CsvParser()
+    if fmt == NDJSON:
+        return NdjsonParser()
+    return JsonArrayParser()
+
+
+# Work items from an upload streamed as byte chunks
+async def parse_stream(chunks: AsyncIterator[bytes], fmt: str, limit: int = MAX_IMPORT_ITEMS) -> List[WorkItemState]:
+    parser = parser_for(fmt)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    items: List[WorkItemState] = []
+    try:
+        async for chunk in chunks:
+            _collect(items, parser.feed(decoder.decode(chunk)), limit)
+        _collect(items, parser.feed(decoder.decode(b"", final=True)), limit)
+    except UnicodeDecodeError:
+        raise ImportFormatError("Upload is not valid UTF-8") from None
+    _collect(items, parser.close(), limit)
+    return items
+
+
+# Work items from an already received text body (e.g. a WebSocket event)
+def parse_text(text: str, fmt: str, limit: int = MAX_IMPORT_ITEMS) -> List[WorkItemState]:
+    parser = parser_for(fmt)
+    items: List[WorkItemState] = []
+    _collect(items, parser.feed(text), limit)
+    _collect(items, parser.close(), limit)
+    return items
+
+
+def parse_records(records: Iterable[Any], limit: int = MAX_IMPORT_ITEMS) -> List[WorkItemState]:
+    items: List[WorkItemState] = []
+    _collect(items, records, limit)
+    return items
+
+
+def _collect(items: List[WorkItemState], records: Iterable[Any], limit: int):
+    for record in records:
+        if len(items) >= limit:
+            raise ImportFormatError(f"At most {limit} work items per import")
+        items.append(to_work_item(record, len(items) + 1))
+
+
+# Export: chunks of text covering every work item, EXPORT_CHUNK_ITEMS at a time
+def export_chunks(items: List[WorkItemState], fmt: str) -> Iterator[str]:
+    if fmt == CSV:
+        yield from _export_csv(items)
+        return
+    for start in range(0, len(items), EXPORT_CHUNK_ITEMS):
+        batch = items[start:start + EXPORT_CHUNK_ITEMS]
+        if fmt == NDJSON:
+            yield "".join(dumps(item.to_dict()) + "\n" for item in batch)
+        else:
+            body = ",".join(dumps(item.to_dict()) for item in batch)
+            yield ("[" if start == 0 else ",") + body
+    if fmt == JSON:
+        yield "]" if items else "[]"
+
+
+def _export_csv(items: List[WorkItemState]) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(("id",) + FIELDS)
+    for start in range(0, len(items), EXPORT_CHUNK_ITEMS):
+        for item in items[start:start + EXPORT_CHUNK_ITEMS]:
+            estimate = item.agreedEstimate
+            writer.writerow((
+                item.id, item.title, item.description or "",
+                "" if estimate is None else estimate, item.linkUrl or "",
+            ))
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    if not items:
+        yield out.getvalue()
@@ -0,0 +1,98 @@
+# Per-session actors: throughput of votes pushed concurrently into many
+# sessions, a check that every session ends with exactly the last vote each
+# voter sent (no lost or reordered mutations), and how a flood against a
+# small inbox is pushed back and finally rejected.
+#
+#   python -m backend.benchmarks.bench_actors [--sessions 200] [--voters 10] [--votes 20]
+from ..actors import SessionActors, InboxFull
+from ..connection_manager import ConnectionManager
+from ..models import User
+from .. import main
+import argparse
+import asyncio
+import functools
+import json
+import time
+
+
+async def voter(manager: ConnectionManager, session_id: str, user_id: str, votes: int):
+    for n in range(votes):
+        job = functools.partial(main.handle_event, session_id, user_id, "cast_vote", {"value": n})
+        await manager.actors.submit(session_id, job)
+        # Let other producers interleave, as sockets would
+        await asyncio.sleep(0)
+
+
+async def throughput(sessions: int, voters: int, votes: int) -> dict:
+    manager = ConnectionManager()
+    main.manager = manager
+    for s in range(sessions):
+        manager._create_session(f"s{s}", User(id="u0", name="Moderator"))
+        for v in range(voters):
+            manager._add_participant(f"s{s}", User(id=f"u{v}", name=f"Voter {v}"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        voter(manager, f"s{s}", f"u{v}", votes) for s in range(sessions) for v in range(voters)
+    ))
+    # Drain: one more no-op per session resolves once everything before it ran
+    await asyncio.gather(*[
+        await manager.actors.submit(f"s{s}", functools.partial(asyncio.sleep, 0)) for s in range(sessions)
+    ])
+    elapsed = time.perf_counter() - start
+
+    consistent = all(
+        all(manager.sessions[f"s{s}"].votes[f"u{v}"].value == votes - 1 for v in range(voters))
+        for s in range(sessions)
+    )
+    for s in range(sessions):
+        manager.scheduler.cancel(f"s{s}")
+    await manager.actors.close()
+    return {
+        "sessions": sessions,
+        "voters": voters,
+        "events": sessions * voters * votes,
+        "eventsPerSec": round(sessions * voters * votes / elapsed),
+        "consistent": consistent,
+    }
+
+
+async def flood(limit: int = 16, burst: int = 200) -> dict:
+    actors = SessionActors(limit=limit, put_timeout=0.05)
+    gate = asyncio.Event()
+    ran = 0
+
+    async def slow():
+        nonlocal ran
+        await gate.wait()
+        ran += 1
+
+    accepted = rejected = 0
+    for _ in range(burst):
+        try:
+            await actors.submit("flood", slow)
+            accepted += 1
+        except InboxFull:
+            rejected += 1
+    gate.set()
+    # Let the actor drain what it accepted
+    while actors.busy("flood"):
+        await asyncio.sleep(0.01)
+    await actors.close()
+    return {"inboxLimit": limit, "submitted": burst, "accepted": accepted, "rejected": rejected, "ran": ran}
+
+
+async def run(sessions: int, voters: int, votes: int) -> dict:
+    return {
+        "throughput": await throughput(sessions, voters, votes),
+        "flood": await flood(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--voters", type=int, default=10)
+    parser.add_argument("--votes", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.sessions, args.voters, args.votes)), indent=2))
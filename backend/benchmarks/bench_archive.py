@@ -0,0 +1,93 @@
+# Round archive cost on the event loop: building and queueing a round
+# record (the only part on the event path), event-loop lag while the queue
+# is written behind, write throughput, and a time-range query over the log.
+#
+#   python -m backend.benchmarks.bench_archive [--rounds 20000] [--voters 12]
+from ..archive import LogRoundArchive, round_record
+from ..models import SessionPhase, ParticipantRole, ParticipantStatus, JobRole
+from ..state import SessionState, SettingsState, ParticipantState, VoteState, WorkItemState, now_ms
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+
+def build_session(voters: int) -> SessionState:
+    session = SessionState(
+        id="bench",
+        name="Bench",
+        moderatorId="u0",
+        phase=SessionPhase.REVEALING,
+        settings=SettingsState(cardDeck=["1", "2", "3", "5", "8"], autoReveal=False),
+    )
+    for i in range(voters):
+        session.add_participant(ParticipantState(
+            id=f"u{i}", name=f"Voter {i}", avatarUrl=None, jobRole=JobRole.DEVELOPER,
+            role=ParticipantRole.MODERATOR if i == 0 else ParticipantRole.VOTER,
+            status=ParticipantStatus.CONNECTED, hasVoted=True,
+        ))
+        session.cast_vote(VoteState(userId=f"u{i}", value=(i % 5) + 1, timestamp=now_ms()))
+    session.add_work_item(WorkItemState(id="item-0", title="Ticket #0"))
+    session.activeWorkItemId = "item-0"
+    return session
+
+
+# Largest gap between ticks of a task that should wake every millisecond
+async def watch_lag(stop: asyncio.Event, lags: list):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        lags.append(now - last - 0.001)
+        last = now
+
+
+async def run(rounds: int, voters: int) -> dict:
+    session = build_session(voters)
+    archive = LogRoundArchive(tempfile.mkdtemp(), flush_interval=0.05)
+    await archive.start()
+
+    append_seconds = 0.0
+    for _ in range(rounds):
+        begin = time.perf_counter()
+        archive.append(round_record(session, "cleared"))
+        append_seconds += time.perf_counter() - begin
+
+    # Everything queued is written behind on a worker thread; the loop
+    # should keep ticking meanwhile
+    stop = asyncio.Event()
+    lags = []
+    watcher = asyncio.create_task(watch_lag(stop, lags))
+    start = time.perf_counter()
+    await archive.flush()
+    total = time.perf_counter() - start
+    stop.set()
+    await watcher
+
+    now = now_ms()
+    start = time.perf_counter()
+    recent = await archive.query("bench", since=now - 60_000, limit=100)
+    query_seconds = time.perf_counter() - start
+    await archive.close()
+
+    lags.sort()
+    return {
+        "rounds": rounds,
+        "voters": voters,
+        "appendUs": round(append_seconds / rounds * 1e6, 2),
+        "batches": archive.batches,
+        "roundsPerSec": round(rounds / total),
+        "loopLagP50Ms": round(lags[len(lags) // 2] * 1000, 3) if lags else None,
+        "loopLagMaxMs": round(lags[-1] * 1000, 3) if lags else None,
+        "queryMs": round(query_seconds * 1000, 2),
+        "queried": len(recent),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--voters", type=int, default=12)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.rounds, args.voters)), indent=2))
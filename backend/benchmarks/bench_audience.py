@@ -0,0 +1,131 @@
+# Voter-facing latency with a large audience, in one process: a room of
+# voters takes a stream of votes while 1000 observers watch it, either as
+# observer participants on WebSockets (each one in the snapshot and the
+# fan-out) or as read-only audience subscribers (audience.py), against the
+# room with nobody watching. Latency is from a vote's broadcast to the last
+# voter's frame being written; sockets are stand-ins that only record it.
+#
+#   python -m backend.benchmarks.bench_audience [--voters 10] [--observers 1000]
+from ..audience import Audience
+from ..connection_manager import ConnectionManager
+from ..models import JobRole, User
+from ..state import VoteState, now_ms
+import argparse
+import asyncio
+import json
+import time
+
+VOTES = 300
+# Between votes; faster than the audience interval, as in a vote storm
+VOTE_GAP = 0.02
+AUDIENCE_INTERVAL = 0.5
+
+
+class BenchSocket:
+    def __init__(self, on_send=None):
+        self.frames = 0
+        self.bytes = 0
+        self.on_send = on_send
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.frames += 1
+        self.bytes += len(data)
+        if self.on_send is not None:
+            self.on_send()
+
+    async def send_bytes(self, data: bytes):
+        await self.send_text(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def run(mode: str, voters: int, observers: int) -> dict:
+    manager = ConnectionManager()
+    manager.audience = Audience(interval=AUDIENCE_INTERVAL)
+    session_id = "bench"
+    pending = {"left": 0}
+    done = asyncio.Event()
+
+    def voter_sent():
+        pending["left"] -= 1
+        if pending["left"] == 0:
+            done.set()
+
+    for i in range(voters):
+        user = User(id=f"v{i}", name=f"Voter {i}", jobRole=JobRole.DEVELOPER)
+        await manager.connect(BenchSocket(voter_sent), session_id, user)
+
+    watchers = []
+    readers = []
+    if mode == "participants":
+        for i in range(observers):
+            socket = BenchSocket()
+            user = User(id=f"o{i}", name=f"Observer {i}", jobRole=JobRole.ADMIN)
+            await manager.connect(socket, session_id, user)
+            watchers.append(socket)
+    elif mode == "audience":
+        received = [0] * observers
+
+        async def read(i, subscriber):
+            while await subscriber.next() is not None:
+                received[i] += 1
+
+        for i in range(observers):
+            subscriber = manager.audience.subscribe(session_id, manager.audience_payload(session_id))
+            readers.append(asyncio.create_task(read(i, subscriber)))
+
+    await asyncio.sleep(0.2)
+    session = manager.sessions[session_id]
+    latencies = []
+    broadcast_cpu = []
+    for n in range(VOTES):
+        session.cast_vote(VoteState(userId=f"v{n % voters}", value=n % 5 + 1, timestamp=now_ms()))
+        session.touch()
+        pending["left"] = voters
+        done.clear()
+        start = time.perf_counter()
+        await manager.broadcast_snapshot(session_id)
+        broadcast_cpu.append(time.perf_counter() - start)
+        await done.wait()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(VOTE_GAP)
+    await asyncio.sleep(AUDIENCE_INTERVAL)
+
+    results = {
+        "mode": mode,
+        "participantsInSnapshot": len(session.participants),
+        "snapshotBytes": len(manager.snapshot_cache.get(session).frame("json")),
+        "voterLatencyP50Ms": round(sorted(latencies)[len(latencies) // 2] * 1000, 3),
+        "voterLatencyP99Ms": round(sorted(latencies)[int(len(latencies) * 0.99)] * 1000, 3),
+        "broadcastCpuP50Ms": round(sorted(broadcast_cpu)[len(broadcast_cpu) // 2] * 1000, 3),
+    }
+    if mode == "participants":
+        results["observerFramesPerObserver"] = round(sum(s.frames for s in watchers) / observers, 1)
+    elif mode == "audience":
+        results["observerFramesPerObserver"] = round(sum(received) / observers, 1)
+        results["audienceFlushes"] = manager.audience.flushes
+        for reader in readers:
+            reader.cancel()
+    await manager.close_connections(session_id)
+    await manager.actors.close()
+    return results
+
+
+async def main(voters: int, observers: int) -> list:
+    return [
+        await run("none", voters, observers),
+        await run("participants", voters, observers),
+        await run("audience", voters, observers),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voters", type=int, default=10)
+    parser.add_argument("--observers", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.voters, args.observers)), indent=2))
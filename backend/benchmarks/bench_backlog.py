@@ -0,0 +1,79 @@
+# Summary backlog projection vs the full SessionSnapshot: snapshot size
+# and server encode time for growing backlogs, plus the size of one
+# get_work_items page a summary client fetches on demand.
+#
+#   python -m backend.benchmarks.bench_backlog [--items 10 500 5000] [--repeat 50]
+from ..connection_manager import MAX_WORK_ITEMS_PAGE
+from ..models import SessionPhase, ParticipantRole, ParticipantStatus, JobRole
+from ..snapshots import SnapshotCache
+from ..state import SessionState, SettingsState, ParticipantState, WorkItemState, dumps
+import argparse
+import json
+import time
+
+DESCRIPTION = (
+    "As a planner I want the backlog to load quickly so that large refinement "
+    "sessions stay responsive. Acceptance criteria: pages load on demand."
+)
+
+
+def session(items: int) -> SessionState:
+    state = SessionState(
+        id="bench",
+        name="Bench",
+        moderatorId="u0",
+        phase=SessionPhase.VOTING,
+        settings=SettingsState(cardDeck=["1", "2", "3", "5", "8"], autoReveal=False),
+    )
+    for i in range(12):
+        state.add_participant(ParticipantState(
+            id=f"u{i}", name=f"Voter {i}", avatarUrl=None, jobRole=JobRole.DEVELOPER,
+            role=ParticipantRole.MODERATOR if i == 0 else ParticipantRole.VOTER,
+            status=ParticipantStatus.CONNECTED, hasVoted=False,
+        ))
+    for i in range(items):
+        state.add_work_item(WorkItemState(
+            id=f"id-{i}", title=f"PROJ-{i}: Implement feature {i}", description=DESCRIPTION,
+            agreedEstimate=[1, 2, 3, 5, 8][i % 5] if i % 3 == 0 else None,
+            linkUrl=f"https://tracker.example/PROJ-{i}",
+        ))
+    state.activeWorkItemId = "id-0" if items else None
+    return state
+
+
+def encode(state: SessionState, summary: bool, repeat: int):
+    cache = SnapshotCache(summary=summary)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cache.invalidate(state.id)
+        snapshot = cache.get(state)
+    return snapshot, (time.perf_counter() - start) / repeat
+
+
+def run(sizes, repeat: int) -> dict:
+    results = []
+    for items in sizes:
+        state = session(items)
+        full, full_seconds = encode(state, False, repeat)
+        summary, summary_seconds = encode(state, True, repeat)
+        page = dumps({
+            "type": "work_items", "total": items, "offset": 0,
+            "items": [item.to_dict() for item in state.workItems[:MAX_WORK_ITEMS_PAGE]],
+        })
+        results.append({
+            "items": items,
+            "fullBytes": len(full.text),
+            "summaryBytes": len(summary.text),
+            "fullEncodeUs": round(full_seconds * 1e6, 1),
+            "summaryEncodeUs": round(summary_seconds * 1e6, 1),
+            "pageBytes": len(page),
+        })
+    return {"repeat": repeat, "pageSize": MAX_WORK_ITEMS_PAGE, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.items, args.repeat), indent=2))
@@ -0,0 +1,84 @@
+# JSON vs MessagePack snapshots: encode time, decode time
+# and payload size for realistic session shapes.
+#
+#   python -m backend.benchmarks.bench_codec
+from datetime import datetime
+from ..models import ParticipantRole, ParticipantStatus, JobRole
+from ..state import SessionState, SettingsState, ParticipantState, VoteState, WorkItemState, dumps, now_ms
+from .. import codec
+import json
+import time
+
+SHAPES = [(8, 10), (50, 300), (200, 50)]
+ROUNDS = 200
+
+
+def build_session(participants: int, items: int) -> SessionState:
+    session = SessionState(
+        id="bench",
+        name="Session bench",
+        moderatorId="u0",
+        settings=SettingsState(cardDeck=['0', '1', '2', '3', '5', '8', '13', '21', '?', 'coffee'], autoReveal=False)
+    )
+    for i in range(participants):
+        session.add_participant(ParticipantState(
+            id=f"user-{i}",
+            name=f"Voter {i}",
+            avatarUrl=f"https://example.com/avatars/{i}.png",
+            jobRole=JobRole.QA if i % 4 == 0 else JobRole.DEVELOPER,
+            role=ParticipantRole.MODERATOR if i == 0 else ParticipantRole.VOTER,
+            status=ParticipantStatus.CONNECTED,
+            hasVoted=True
+        ))
+        session.cast_vote(VoteState(userId=f"user-{i}", value=[1, 2, 3, 5, 8][i % 5], timestamp=now_ms()))
+    for i in range(items):
+        session.add_work_item(WorkItemState(
+            id=f"item-{i}",
+            title=f"PROJ-{1000 + i}: Implement feature {i}",
+            description="As a user I want to be able to do the thing so that value is delivered.",
+            agreedEstimate=[1, 2, 3, 5, 8][i % 5] if i % 3 == 0 else None
+        ))
+    return session
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def run() -> list:
+    results = []
+    for participants, items in SHAPES:
+        session = build_session(participants, items)
+        now = datetime.now()
+
+        def message():
+            return {"session": session.to_dict(), "timestamp": now.isoformat(), "sequenceId": 1}
+
+        def encode_json():
+            return dumps(message())
+
+        def encode_msgpack():
+            return codec.pack(message())
+
+        text = encode_json()
+        packed = encode_msgpack()
+        results.append({
+            "participants": participants,
+            "workItems": items,
+            "jsonBytes": len(text.encode()),
+            "msgpackBytes": len(packed),
+            "jsonEncodeUs": round(timed(encode_json), 1),
+            "msgpackEncodeUs": round(timed(encode_msgpack), 1),
+            "jsonDecodeUs": round(timed(lambda: json.loads(text)), 1),
+            "msgpackDecodeUs": round(timed(lambda: codec.unpack(packed)), 1),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    if codec.msgpack is None:
+        raise SystemExit("msgpack is not installed")
+    print(json.dumps(run(), indent=2))
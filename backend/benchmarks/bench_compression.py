@@ -0,0 +1,106 @@
+# Bandwidth saved against CPU spent compressing snapshot broadcasts, for a
+# few room shapes: no compression, per-socket permessage-deflate (a
+# compressor with context takeover per socket, as negotiated by the
+# WebSocket server) and the shared frames compressed once per broadcast
+# (compression=deflate). Rooms are mid-vote with masked votes, so every
+# voter also gets a compressed copy of their own variant.
+#
+#   python -m backend.benchmarks.bench_compression [--encoding json|msgpack] [--level 6]
+from ..snapshots import SnapshotCache
+from ..state import VoteState, now_ms
+from .. import codec
+from .bench_masking import build_session
+import argparse
+import json
+import time
+import zlib
+
+ROUNDS = 50
+# (participants, work items)
+ROOMS = ((8, 30), (25, 200), (100, 1000))
+# Server-side permessage-deflate settings of the websockets library
+PMD_WINDOW_BITS = 15
+PMD_MEM_LEVEL = 5
+
+
+# One broadcast per round: a vote changes, every socket gets the snapshot
+def broadcasts(participants: int, work_items: int):
+    session = build_session(participants, work_items)
+    users = [p.id for p in session.participants]
+    cache = SnapshotCache()
+    for n in range(ROUNDS):
+        user_id = users[n % len(users)]
+        session.cast_vote(VoteState(userId=user_id, value=n % 5 + 1, timestamp=now_ms()))
+        session.touch()
+        yield users, cache.get(session)
+
+
+def uncompressed(participants: int, work_items: int, encoding: str) -> dict:
+    sent = 0
+    start = time.perf_counter()
+    for users, snapshot in broadcasts(participants, work_items):
+        for user_id in users:
+            sent += len(snapshot.frame_for(encoding, user_id))
+    return {"bytes": sent, "cpu": time.perf_counter() - start}
+
+
+def per_socket(participants: int, work_items: int, encoding: str, level: int) -> dict:
+    compressors = {}
+    sent = 0
+    start = time.perf_counter()
+    for users, snapshot in broadcasts(participants, work_items):
+        for user_id in users:
+            compressor = compressors.get(user_id)
+            if compressor is None:
+                compressor = compressors[user_id] = zlib.compressobj(
+                    level, zlib.DEFLATED, -PMD_WINDOW_BITS, PMD_MEM_LEVEL)
+            frame = snapshot.frame_for(encoding, user_id)
+            data = frame.encode() if isinstance(frame, str) else frame
+            # permessage-deflate: sync flush, minus the 4-byte empty block
+            sent += len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+    return {"bytes": sent, "cpu": time.perf_counter() - start}
+
+
+def shared(participants: int, work_items: int, encoding: str) -> dict:
+    sent = 0
+    start = time.perf_counter()
+    for users, snapshot in broadcasts(participants, work_items):
+        for user_id in users:
+            sent += len(snapshot.frame_for(encoding, user_id, codec.DEFLATE))
+    return {"bytes": sent, "cpu": time.perf_counter() - start}
+
+
+def room(participants: int, work_items: int, encoding: str, level: int) -> dict:
+    plain = uncompressed(participants, work_items, encoding)
+    results = {
+        "participants": participants,
+        "workItems": work_items,
+        "snapshotBytes": round(plain["bytes"] / ROUNDS / participants),
+    }
+    for name, measured in (
+        ("none", plain),
+        ("perSocketDeflate", per_socket(participants, work_items, encoding, level)),
+        ("shared", shared(participants, work_items, encoding)),
+    ):
+        results[name] = {
+            "kbPerBroadcast": round(measured["bytes"] / ROUNDS / 1024, 1),
+            "ratio": round(plain["bytes"] / measured["bytes"], 2),
+            # Includes the serialization both compressed variants start from
+            "cpuMsPerBroadcast": round(measured["cpu"] / ROUNDS * 1000, 3),
+        }
+    # zlib's deflate state per socket: window plus hash tables
+    results["perSocketDeflate"]["stateBytesPerSocket"] = (1 << (PMD_WINDOW_BITS + 2)) + (1 << (PMD_MEM_LEVEL + 9))
+    return results
+
+
+def run(encoding: str, level: int) -> list:
+    codec.COMPRESS_LEVEL = level
+    return [room(participants, work_items, encoding, level) for participants, work_items in ROOMS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--encoding", choices=[codec.JSON, codec.MSGPACK], default=codec.JSON)
+    parser.add_argument("--level", type=int, default=codec.COMPRESS_LEVEL)
+    args = parser.parse_args()
+    print(json.dumps(run(codec.negotiate(args.encoding), args.level), indent=2))
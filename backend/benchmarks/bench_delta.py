@@ -0,0 +1,68 @@
+# Bytes on the wire per cast_vote: full snapshot vs. delta patch.
+#
+#   python -m backend.benchmarks.bench_delta [--voters 50] [--items 300]
+from ..connection_manager import ConnectionManager
+from ..models import User
+from ..state import VoteState, WorkItemState, now_ms
+import argparse
+import json
+import time
+
+
+def build_session(manager: ConnectionManager, session_id: str, voters: int, items: int):
+    manager._create_session(session_id, User(id="u0", name="Voter 0"))
+    for i in range(voters):
+        manager._add_participant(session_id, User(id=f"u{i}", name=f"Voter {i}"))
+
+    session = manager.sessions[session_id]
+    for i in range(items):
+        session.add_work_item(
+            WorkItemState(id=f"item-{i}", title=f"Ticket #{i}", description="As a user I want " + "x" * 200)
+        )
+    session.activeWorkItemId = session.workItems[0].id
+    session.touch()
+    return session
+
+
+def run(voters: int, items: int) -> dict:
+    manager = ConnectionManager()
+    session = build_session(manager, "bench", voters, items)
+    cache = manager.snapshot_cache
+    cache.get_patch(session)  # establish the patch base
+
+    full_bytes = 0
+    patch_bytes = 0
+    full_time = 0.0
+    patch_time = 0.0
+    for i in range(voters):
+        user_id = f"u{i}"
+        session.cast_vote(VoteState(userId=user_id, value=5, timestamp=now_ms()))
+        session.participants[i].hasVoted = True
+        session.touch()
+
+        start = time.perf_counter()
+        full_bytes += len(cache.get(session).data)
+        full_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        patch_bytes += len(cache.get_patch(session).data)
+        patch_time += time.perf_counter() - start
+
+    return {
+        "voters": voters,
+        "workItems": items,
+        "events": voters,
+        "fullBytesPerEvent": full_bytes // voters,
+        "patchBytesPerEvent": patch_bytes // voters,
+        "reduction": round(full_bytes / patch_bytes, 1),
+        "fullEncodeUs": round(full_time / voters * 1e6, 1),
+        "patchEncodeUs": round(patch_time / voters * 1e6, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voters", type=int, default=50)
+    parser.add_argument("--items", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(run(args.voters, args.items), indent=2))
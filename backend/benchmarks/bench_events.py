@@ -0,0 +1,56 @@
+# Per-event handle_event cost as the room and backlog grow. With indexed
+# participant / work-item lookups the numbers should stay flat.
+#
+#   python -m backend.benchmarks.bench_events [--sizes 10,100,1000,5000]
+from ..connection_manager import ConnectionManager
+from ..models import User
+from ..state import WorkItemState
+from .. import main
+import argparse
+import asyncio
+import json
+import time
+
+ROUNDS = 2000
+
+
+async def measure(size: int) -> dict:
+    manager = ConnectionManager()
+    main.manager = manager
+
+    manager._create_session("bench", User(id="u0", name="Moderator"))
+    for i in range(size):
+        manager._add_participant("bench", User(id=f"u{i}", name=f"Voter {i}"))
+    session = manager.sessions["bench"]
+    for i in range(size):
+        session.add_work_item(WorkItemState(id=f"item-{i}", title=f"Ticket #{i}"))
+
+    results = {"size": size}
+    cases = {
+        # Last participant / item: worst case for a linear scan
+        "cast_vote": ("cast_vote", lambda n: f"u{size - 1}", lambda n: {"value": n % 13}),
+        "set_agreed_estimate": (
+            "set_agreed_estimate", lambda n: "u0",
+            lambda n: {"workItemId": f"item-{size - 1}", "estimate": n % 13}
+        ),
+    }
+    for name, (event, user, payload) in cases.items():
+        start = time.perf_counter()
+        for n in range(ROUNDS):
+            await main.handle_event("bench", user(n), event, payload(n))
+        results[f"{name}Us"] = round((time.perf_counter() - start) / ROUNDS * 1e6, 2)
+
+    manager.scheduler.cancel("bench")
+    return results
+
+
+async def run(sizes):
+    return [await measure(size) for size in sizes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,1000,5000")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(json.dumps(asyncio.run(run(sizes)), indent=2))
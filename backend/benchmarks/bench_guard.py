@@ -0,0 +1,60 @@
+# Inbound guard overhead per client frame: accepted, dropped over budget and
+# unknown-event frames, against fully decoding the frame; and how much of a
+# tight cast_vote spam loop from one socket gets through to handle_event.
+#
+#   python -m backend.benchmarks.bench_guard [--frames 200000]
+from ..ratelimit import InboundGuard, SessionRateLimits, peek_event, ACCEPT, CLOSE
+from .. import codec
+import argparse
+import json
+import time
+
+VOTE = json.dumps({"event": "cast_vote", "payload": {"value": 5}})
+UNKNOWN = json.dumps({"event": "definitely_not_an_event", "payload": {"value": "x" * 200}})
+PACKED = codec.pack({"event": "cast_vote", "payload": {"value": 5}}) if codec.msgpack else None
+
+
+def per_frame_ns(fn, frames: int) -> float:
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return round((time.perf_counter() - start) / frames * 1e9, 1)
+
+
+def run(frames: int) -> dict:
+    unlimited = InboundGuard(rate=float("inf"), burst=float("inf"))
+    exhausted = InboundGuard(rate=0, burst=0)
+    exhausted.violations = -frames * 4  # never reaches the close threshold here
+    results = {
+        "acceptNs": per_frame_ns(lambda: unlimited.check(VOTE), frames),
+        "dropOverBudgetNs": per_frame_ns(lambda: exhausted.check(VOTE), frames),
+        "dropUnknownNs": per_frame_ns(lambda: unlimited.check(UNKNOWN), frames),
+        "peekJsonNs": per_frame_ns(lambda: peek_event(VOTE), frames),
+        "fullJsonDecodeNs": per_frame_ns(lambda: codec.decode(VOTE), frames),
+    }
+    if PACKED is not None:
+        results["peekMsgpackNs"] = per_frame_ns(lambda: peek_event(PACKED), frames)
+
+    # One socket sending cast_vote as fast as it can for about a second
+    limits = SessionRateLimits()
+    guard = InboundGuard(limits.acquire("bench"))
+    sent = accepted = 0
+    verdict = ACCEPT
+    start = time.perf_counter()
+    while verdict != CLOSE and time.perf_counter() - start < 1.0:
+        sent += 1
+        verdict = guard.check(VOTE)
+        accepted += verdict == ACCEPT
+    results["spam"] = {
+        "sent": sent,
+        "accepted": accepted,
+        "closedAfterSeconds": round(time.perf_counter() - start, 4) if verdict == CLOSE else None,
+    }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=200000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.frames), indent=2))
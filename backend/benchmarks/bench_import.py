@@ -0,0 +1,99 @@
+# Bulk work-item import: streaming parse of a 10k-item upload in each
+# format (time and peak parser memory against the upload size), applying
+# it as one mutation, and the same items added one event at a time the way
+# the add_work_item flow did (one full broadcast each; run on a prefix and
+# extrapolated since it grows quadratically).
+#
+#   python -m backend.benchmarks.bench_import [--items 10000] [--sockets 20] [--one-by-one 1000]
+from ..connection import ClientConnection
+from ..connection_manager import ConnectionManager
+from ..models import User
+from ..state import WorkItemState
+from .. import backlog_io, main
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+CHUNK = 64 * 1024
+
+
+def upload(items: int, fmt: str) -> bytes:
+    work_items = [
+        WorkItemState(
+            f"id-{i}", f"PROJ-{i}: Implement feature {i}",
+            "As a user I want to be able to do the thing so that value is delivered.",
+            [1, 2, 3, 5, 8][i % 5] if i % 4 == 0 else None,
+        )
+        for i in range(items)
+    ]
+    return "".join(backlog_io.export_chunks(work_items, fmt)).encode()
+
+
+async def chunks(data: bytes):
+    for start in range(0, len(data), CHUNK):
+        yield data[start:start + CHUNK]
+
+
+def room(manager: ConnectionManager, session_id: str, sockets: int):
+    manager._create_session(session_id, User(id="u0", name="Moderator"))
+    for i in range(sockets):
+        manager._add_participant(session_id, User(id=f"u{i}", name=f"Voter {i}"))
+    manager.active_connections[session_id] = [ClientConnection(object(), f"u{i}") for i in range(sockets)]
+
+
+async def run(items: int, sockets: int, one_by_one: int) -> dict:
+    manager = ConnectionManager()
+    main.manager = manager
+    results = {"items": items, "sockets": sockets, "formats": {}}
+
+    for fmt in backlog_io.FORMATS:
+        data = upload(items, fmt)
+        start = time.perf_counter()
+        parsed = await backlog_io.parse_stream(chunks(data), fmt)
+        parse_seconds = time.perf_counter() - start
+
+        # Peak while parsing, including the parsed items themselves
+        tracemalloc.start()
+        await backlog_io.parse_stream(chunks(data), fmt)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        session_id = f"bulk-{fmt}"
+        room(manager, session_id, sockets)
+        start = time.perf_counter()
+        await main.handle_event(session_id, "u0", "add_work_items", {"items": [item.to_dict() for item in parsed]})
+        apply_seconds = time.perf_counter() - start
+
+        results["formats"][fmt] = {
+            "uploadBytes": len(data),
+            "parseMs": round(parse_seconds * 1000, 1),
+            "parsePeakBytes": peak,
+            "applyAndBroadcastMs": round(apply_seconds * 1000, 1),
+            "broadcasts": 1,
+        }
+
+    # One add_work_item event (and full broadcast) per item
+    room(manager, "one-by-one", sockets)
+    start = time.perf_counter()
+    for i in range(one_by_one):
+        await main.handle_event("one-by-one", "u0", "add_work_item", {"title": f"PROJ-{i}", "description": "x" * 70})
+    seconds = time.perf_counter() - start
+    results["oneByOne"] = {
+        "items": one_by_one,
+        "ms": round(seconds * 1000, 1),
+        "broadcasts": one_by_one,
+        # Broadcast cost grows with the backlog, so this is a lower bound
+        "extrapolatedMsFor": {str(items): round(seconds * 1000 * (items / one_by_one) ** 2, 1)},
+    }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--sockets", type=int, default=20)
+    parser.add_argument("--one-by-one", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.items, args.sockets, args.one_by_one)), indent=2))
@@ -0,0 +1,100 @@
+# Cost of a masked-vote broadcast to a full room: one shared masked
+# serialization plus spliced per-user variants, against dumping a
+# separately masked session for every recipient.
+#
+#   python -m backend.benchmarks.bench_masking [--participants 100] [--encoding json|msgpack]
+from ..models import SessionPhase, ParticipantRole, ParticipantStatus, JobRole
+from ..snapshots import SnapshotCache
+from ..state import SessionState, SettingsState, ParticipantState, VoteState, WorkItemState, dumps, now_ms
+from .. import codec
+from datetime import datetime
+import argparse
+import json
+import time
+
+ROUNDS = 200
+
+
+def build_session(participants: int, work_items: int) -> SessionState:
+    session = SessionState(
+        id="bench",
+        name="Bench",
+        moderatorId="u0",
+        phase=SessionPhase.VOTING,
+        settings=SettingsState(cardDeck=["1", "2", "3", "5", "8"], autoReveal=False),
+    )
+    for i in range(participants):
+        session.add_participant(ParticipantState(
+            id=f"u{i}", name=f"Voter {i}", avatarUrl=None, jobRole=JobRole.DEVELOPER,
+            role=ParticipantRole.MODERATOR if i == 0 else ParticipantRole.VOTER,
+            status=ParticipantStatus.CONNECTED, hasVoted=True,
+        ))
+        session.cast_vote(VoteState(userId=f"u{i}", value=(i % 5) + 1, timestamp=now_ms()))
+    for i in range(work_items):
+        session.add_work_item(WorkItemState(id=f"item-{i}", title=f"Ticket #{i}", description="x" * 80))
+    return session
+
+
+# What a server without shared frames would do for each socket
+def naive_frame(session: SessionState, user_id: str, encoding: str):
+    dump = session.to_dict()
+    dump["votes"] = {
+        uid: vote if uid == user_id else {**vote, "value": None}
+        for uid, vote in dump["votes"].items()
+    }
+    dump["stats"] = None
+    dump["progress"] = session.round_progress.summary()
+    message = {"session": dump, "timestamp": datetime.now().isoformat(), "sequenceId": session.version}
+    if encoding == codec.MSGPACK:
+        return codec.pack(message)
+    return dumps(message)
+
+
+def run(participants: int, work_items: int, encoding: str) -> dict:
+    session = build_session(participants, work_items)
+    users = [p.id for p in session.participants]
+    cache = SnapshotCache()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        session.touch()
+        for user_id in users:
+            naive_frame(session, user_id, encoding)
+    naive = (time.perf_counter() - start) / ROUNDS
+
+    shared_bytes = 0
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        session.touch()
+        snapshot = cache.get(session)
+        for user_id in users:
+            snapshot.frame_for(encoding, user_id)
+    shared = (time.perf_counter() - start) / ROUNDS
+    shared_bytes = len(snapshot.frame(encoding))
+
+    # Each variant must decode to exactly what the naive dump shows that user
+    identical = True
+    for user_id in users:
+        ours = codec.decode(snapshot.frame_for(encoding, user_id))["session"]
+        theirs = codec.decode(naive_frame(session, user_id, encoding))["session"]
+        identical = identical and ours == theirs
+
+    return {
+        "participants": participants,
+        "workItems": work_items,
+        "encoding": encoding,
+        "frameBytes": shared_bytes,
+        "naiveBroadcastMs": round(naive * 1000, 3),
+        "sharedBroadcastMs": round(shared * 1000, 3),
+        "speedup": round(naive / shared, 1),
+        "identical": identical,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=100)
+    parser.add_argument("--work-items", type=int, default=20)
+    parser.add_argument("--encoding", choices=[codec.JSON, codec.MSGPACK], default=codec.JSON)
+    args = parser.parse_args()
+    print(json.dumps(run(args.participants, args.work_items, args.encoding), indent=2))
@@ -0,0 +1,67 @@
+# Overhead of the metrics layer on the hot path: handle_event and a
+# broadcast fan-out, each timed with recording on, recording off
+# (PLANPOKER_METRICS=0) and, for handle_event, without the wrapper at all.
+#
+#   python -m backend.benchmarks.bench_metrics [--rounds 20000] [--sockets 20]
+from ..connection import ClientConnection
+from ..connection_manager import ConnectionManager
+from ..models import User
+from .. import main, metrics
+import argparse
+import asyncio
+import json
+import time
+
+
+async def measure(rounds: int, sockets: int) -> dict:
+    manager = ConnectionManager()
+    main.manager = manager
+    manager._create_session("bench", User(id="u0", name="Moderator"))
+    connections = []
+    for i in range(sockets):
+        manager._add_participant("bench", User(id=f"u{i}", name=f"Voter {i}"))
+        # Never started: frames just queue (snapshots replace each other)
+        connections.append(ClientConnection(object(), f"u{i}"))
+    manager.active_connections["bench"] = connections
+    session = manager.sessions["bench"]
+
+    async def vote(handler):
+        start = time.perf_counter()
+        for n in range(rounds):
+            await handler("bench", "u1", "cast_vote", {"value": n % 13})
+        return (time.perf_counter() - start) / rounds * 1e6
+
+    async def broadcast():
+        start = time.perf_counter()
+        for n in range(rounds):
+            session.touch()
+            await manager.broadcast_snapshot("bench")
+        return (time.perf_counter() - start) / rounds * 1e6
+
+    results = {"rounds": rounds, "sockets": sockets}
+    for mode, enabled, handler in (
+        ("unwrapped", False, main.handle_event.__wrapped__),
+        ("disabled", False, main.handle_event),
+        ("enabled", True, main.handle_event),
+    ):
+        metrics.ENABLED = enabled
+        await vote(handler)  # warm up
+        results[f"castVote{mode.capitalize()}Us"] = round(await vote(handler), 3)
+        manager.scheduler.cancel("bench")
+        if mode != "unwrapped":
+            await broadcast()
+            results[f"broadcast{mode.capitalize()}Us"] = round(await broadcast(), 3)
+
+    start = time.perf_counter()
+    text = metrics.registry.render()
+    results["scrapeMs"] = round((time.perf_counter() - start) * 1000, 3)
+    results["scrapeBytes"] = len(text)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--sockets", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(measure(args.rounds, args.sockets)), indent=2))
@@ -0,0 +1,62 @@
+# Cost of "has every connected voter voted?" after each vote, by room size:
+# the round's counters (stats.RoundProgress, what auto-reveal reads) against
+# scanning participants and votes. Each round clears the votes and has every
+# voter vote once; the check runs after every vote.
+#
+#   python -m backend.benchmarks.bench_progress
+from ..models import ParticipantRole, ParticipantStatus
+from ..state import SessionState, VoteState, now_ms
+from .bench_masking import build_session
+import json
+import time
+
+ROOMS = (10, 100, 1000, 5000)
+VOTES = 20_000
+
+
+def scan_complete(session: SessionState) -> bool:
+    connected = [
+        p for p in session.participants
+        if p.role != ParticipantRole.OBSERVER and p.status == ParticipantStatus.CONNECTED
+    ]
+    return bool(connected) and all(p.id in session.votes for p in connected)
+
+
+def counter_complete(session: SessionState) -> bool:
+    return session.round_progress.complete
+
+
+def measure(participants: int, check) -> dict:
+    session = build_session(participants, 0)
+    users = [p.id for p in session.participants]
+    votes = 0
+    completed = 0
+    start = time.perf_counter()
+    while votes < VOTES:
+        session.clear_votes()
+        for user_id in users:
+            session.cast_vote(VoteState(userId=user_id, value=3, timestamp=now_ms()))
+            completed += check(session)
+            votes += 1
+    elapsed = time.perf_counter() - start
+    return {"usPerVote": round(elapsed / votes * 1e6, 2), "completed": completed}
+
+
+def run() -> list:
+    results = []
+    for participants in ROOMS:
+        counters = measure(participants, counter_complete)
+        scan = measure(participants, scan_complete)
+        results.append({
+            "participants": participants,
+            "counters": counters,
+            "scan": scan,
+            "speedup": round(scan["usPerVote"] / counters["usPerVote"], 1),
+            # Both must see each round complete exactly once, on its last vote
+            "agree": counters["completed"] == scan["completed"],
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
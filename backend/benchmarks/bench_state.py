@@ -0,0 +1,182 @@
+# Per-session memory footprint and event throughput of the live session
+# state. Sessions are built through the manager, so the numbers reflect
+# whatever representation ConnectionManager keeps in memory. The same
+# sessions held as the Pydantic wire models (models.Session, the live
+# representation before state.py) give the baseline for memory, event
+# throughput and snapshot encoding.
+#
+#   python -m backend.benchmarks.bench_state [--sessions 2000] [--participants 10] [--work-items 20]
+from ..connection import FRAME_SNAPSHOT, ClientConnection
+from ..connection_manager import ConnectionManager
+from ..models import (
+    JobRole, Participant, ParticipantRole, ParticipantStatus, Session, SessionPhase,
+    SessionSettings, SessionSnapshot, User, Vote, WorkItem,
+)
+from .. import main
+from datetime import datetime
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+
+EVENTS = 20000
+
+
+# The vote/reveal/clear mix both throughput runs replay: (event, user, payload)
+def event_mix(participants: int) -> list:
+    return [("cast_vote", lambda n: f"u{n % participants}", lambda n: {"value": n % 8})] * 8 + [
+        ("reveal_votes", lambda n: "u0", lambda n: {}),
+        ("clear_votes", lambda n: "u0", lambda n: {}),
+    ]
+
+
+async def build(manager: ConnectionManager, session_id: str, participants: int, work_items: int):
+    manager._create_session(session_id, User(id="u0", name="Moderator"))
+    for i in range(participants):
+        manager._add_participant(session_id, User(id=f"u{i}", name=f"Voter {i}"))
+    for i in range(work_items):
+        await main.handle_event(session_id, "u0", "add_work_item", {"title": f"Ticket #{i}", "description": "x" * 80})
+    for i in range(participants):
+        await main.handle_event(session_id, f"u{i}", "cast_vote", {"value": (i % 5) + 1})
+    manager.scheduler.cancel(session_id)
+
+
+def build_model(session_id: str, participants: int, work_items: int) -> Session:
+    return Session(
+        id=session_id,
+        name=f"Session {session_id}",
+        moderatorId="u0",
+        participants=[
+            Participant(
+                id=f"u{i}", name=f"Voter {i}", jobRole=JobRole.DEVELOPER,
+                role=ParticipantRole.MODERATOR if i == 0 else ParticipantRole.VOTER,
+                status=ParticipantStatus.CONNECTED, hasVoted=True,
+            )
+            for i in range(participants)
+        ],
+        workItems=[
+            WorkItem(id=f"item-{session_id}-{i}", title=f"Ticket #{i}", description="x" * 80)
+            for i in range(work_items)
+        ],
+        activeWorkItemId=f"item-{session_id}-0" if work_items else None,
+        phase=SessionPhase.VOTING,
+        votes={f"u{i}": Vote(userId=f"u{i}", value=(i % 5) + 1, timestamp=datetime.now()) for i in range(participants)},
+        settings=SessionSettings(cardDeck=["0", "1", "2", "3", "5", "8", "13", "21", "?", "coffee"], autoReveal=False),
+    )
+
+
+# handle_event and broadcast_snapshot as they were for the Pydantic models,
+# for the events of the mix: every change is broadcast as a freshly encoded
+# snapshot, one frame shared by the room. That frame carries every vote
+# unmasked; the live path pays for masking them per recipient until reveal.
+def apply_model_event(session: Session, connections: list, user_id: str, event: str, payload: dict):
+    requester = next((p for p in session.participants if p.id == user_id), None)
+    is_moderator = requester is not None and requester.role == "moderator"
+    if event == "cast_vote":
+        session.votes[user_id] = Vote(userId=user_id, value=payload.get("value"), timestamp=datetime.now())
+        if requester:
+            requester.hasVoted = True
+    elif event == "reveal_votes" and is_moderator:
+        session.phase = SessionPhase.REVEALING
+    elif event == "clear_votes" and is_moderator:
+        session.votes = {}
+        session.phase = SessionPhase.VOTING
+        for p in session.participants:
+            p.hasVoted = False
+    else:
+        return
+    data = SessionSnapshot(
+        session=session, timestamp=datetime.now(), sequenceId=int(datetime.now().timestamp() * 1000)
+    ).model_dump_json()
+    for connection in connections:
+        connection.send(data, FRAME_SNAPSHOT)
+
+
+def measure_models(sessions: int, participants: int, work_items: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = {f"m{n}": build_model(f"m{n}", participants, work_items) for n in range(sessions)}
+    gc.collect()
+    per_session = (tracemalloc.get_traced_memory()[0] - before) / sessions
+    tracemalloc.stop()
+    del held
+
+    session = build_model("bench", participants, work_items)
+    connections = [ClientConnection(object(), f"u{i}") for i in range(participants)]
+    mix = event_mix(participants)
+    start = time.perf_counter()
+    for n in range(EVENTS):
+        event, user, payload = mix[n % len(mix)]
+        apply_model_event(session, connections, user(n), event, payload(n))
+    events_per_sec = EVENTS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for n in range(1000):
+        SessionSnapshot(session=session, timestamp=datetime.now(), sequenceId=n).model_dump_json()
+    encode_us = (time.perf_counter() - start) / 1000 * 1e6
+    return {
+        "bytesPerSession": round(per_session),
+        "eventsPerSec": round(events_per_sec),
+        "snapshotEncodeUs": round(encode_us, 1),
+    }
+
+
+async def measure(sessions: int, participants: int, work_items: int) -> dict:
+    manager = ConnectionManager()
+    main.manager = manager
+
+    # Memory: everything the store holds, excluding snapshot caches
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for n in range(sessions):
+        await build(manager, f"m{n}", participants, work_items)
+    manager.snapshot_cache = type(manager.snapshot_cache)()
+    gc.collect()
+    per_session = (tracemalloc.get_traced_memory()[0] - before) / sessions
+    tracemalloc.stop()
+
+    # Throughput: a vote/reveal/clear mix broadcast to a room of sockets
+    # (never started, so frames only queue); every broadcast encodes anew
+    manager = ConnectionManager()
+    main.manager = manager
+    await build(manager, "bench", participants, work_items)
+    manager.active_connections["bench"] = [ClientConnection(object(), f"u{i}") for i in range(participants)]
+    mix = event_mix(participants)
+    start = time.perf_counter()
+    for n in range(EVENTS):
+        event, user, payload = mix[n % len(mix)]
+        await main.handle_event("bench", user(n), event, payload(n))
+        # Flush coalesced votes immediately so every event pays for its broadcast
+        if manager.scheduler.pending("bench"):
+            await manager.broadcast_snapshot("bench")
+    events_per_sec = EVENTS / (time.perf_counter() - start)
+
+    session = manager.sessions["bench"]
+    start = time.perf_counter()
+    for _ in range(1000):
+        session.touch()
+        manager.snapshot_cache.get(session)
+    encode_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    return {
+        "sessions": sessions,
+        "participants": participants,
+        "workItems": work_items,
+        "bytesPerSession": round(per_session),
+        "eventsPerSec": round(events_per_sec),
+        "snapshotEncodeUs": round(encode_us, 1),
+        "pydanticModels": measure_models(sessions, participants, work_items),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--participants", type=int, default=10)
+    parser.add_argument("--work-items", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(measure(args.sessions, args.participants, args.work_items)), indent=2))
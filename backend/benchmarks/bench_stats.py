@@ -0,0 +1,90 @@
+# Incremental estimation statistics vs recomputing them from every vote:
+# per-vote update cost in a large room, and backlog reports over a long
+# retro where one estimate changes between reads.
+#
+#   python -m backend.benchmarks.bench_stats [--voters 200] [--votes 20000] [--items 10000]
+from ..models import JobRole
+from ..stats import Aggregate, RoundStats, BacklogStats
+import argparse
+import json
+import random
+import time
+
+CARDS = [0, 1, 2, 3, 5, 8, 13, "21", "?", "coffee"]
+
+
+# What every client did on each render: rebuild the aggregate from all votes
+def recompute(values) -> dict:
+    aggregate = Aggregate()
+    for value in values:
+        aggregate.add(value)
+    return aggregate.summary()
+
+
+def bench_round(voters: int, votes: int) -> dict:
+    rng = random.Random(1)
+    casts = [(f"u{rng.randrange(voters)}", rng.choice(CARDS)) for _ in range(votes)]
+    roles = [JobRole.DEVELOPER, JobRole.QA]
+
+    stats = RoundStats()
+    start = time.perf_counter()
+    for user_id, value in casts:
+        stats.cast(user_id, value, roles[hash(user_id) % 2])
+        stats.summary()
+    incremental = time.perf_counter() - start
+
+    current = {}
+    start = time.perf_counter()
+    for user_id, value in casts:
+        current[user_id] = value
+        recompute(current.values())
+    naive = time.perf_counter() - start
+
+    assert stats.overall.summary() == recompute(current.values())
+    return {
+        "voters": voters,
+        "votes": votes,
+        "incrementalUsPerVote": round(incremental / votes * 1e6, 2),
+        "recomputeUsPerVote": round(naive / votes * 1e6, 2),
+    }
+
+
+def bench_backlog(items: int, reads: int = 1000) -> dict:
+    rng = random.Random(2)
+    estimates = [rng.choice(CARDS) if i % 3 else None for i in range(items)]
+
+    backlog = BacklogStats()
+    for estimate in estimates:
+        backlog.add_item(estimate)
+    changes = [(rng.randrange(items), rng.choice(CARDS)) for _ in range(reads)]
+
+    start = time.perf_counter()
+    for index, estimate in changes:
+        backlog.change(estimates[index], estimate)
+        estimates[index] = estimate
+        backlog.summary()
+    incremental = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in changes:
+        recompute(estimate for estimate in estimates if estimate is not None)
+    naive = time.perf_counter() - start
+
+    return {
+        "items": items,
+        "reports": reads,
+        "incrementalUsPerReport": round(incremental / reads * 1e6, 2),
+        "recomputeUsPerReport": round(naive / reads * 1e6, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voters", type=int, default=200)
+    parser.add_argument("--votes", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+    print(json.dumps({
+        "round": bench_round(args.voters, args.votes),
+        "backlog": bench_backlog(args.items),
+    }, indent=2))
@@ -0,0 +1,87 @@
+# handle_event latency with and without the SQLite write-behind store
+# flushing in the background. Events arrive on a fixed cadence; "handle" is
+# the time spent inside handle_event, "lag" is how late the event started
+# relative to its intended arrival, so time the flusher holds the loop shows
+# up there (compare against the in-memory run for scheduler jitter).
+#
+#   python -m backend.benchmarks.bench_store [--sessions 200] [--participants 30]
+from ..connection_manager import ConnectionManager
+from ..models import User
+from ..state import WorkItemState
+from ..store import SessionStore, SqliteSessionStore
+from .. import main
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+EVENTS = 3000
+CADENCE = 0.001
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(store: SessionStore, sessions: int, participants: int) -> dict:
+    await store.start()
+    manager = ConnectionManager(store)
+    main.manager = manager
+
+    for s in range(sessions):
+        session_id = f"s{s}"
+        manager._create_session(session_id, User(id="u0", name="Moderator"))
+        for p in range(participants):
+            manager._add_participant(session_id, User(id=f"u{p}", name=f"Voter {p}"))
+        for i in range(20):
+            manager.sessions[session_id].add_work_item(WorkItemState(id=f"item-{i}", title=f"Ticket #{i}"))
+
+    rng = random.Random(42)
+    handle = []
+    lag = []
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    for n in range(EVENTS):
+        next_at += CADENCE
+        delay = next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        session_id = f"s{rng.randrange(sessions)}"
+        started = time.perf_counter()
+        lag.append(loop.time() - next_at)
+        await main.handle_event(session_id, f"u{rng.randrange(participants)}", "cast_vote", {"value": n % 13})
+        handle.append(time.perf_counter() - started)
+
+    for session_id in list(manager.sessions):
+        manager.scheduler.cancel(session_id)
+    await store.close()
+
+    return {
+        "store": type(store).__name__,
+        "handleP50Ms": round(percentile(handle, 50) * 1000, 3),
+        "handleP99Ms": round(percentile(handle, 99) * 1000, 3),
+        "lagP50Ms": round(percentile(lag, 50) * 1000, 3),
+        "lagP99Ms": round(percentile(lag, 99) * 1000, 3),
+        "flushes": getattr(store, "flushes", 0),
+        "rowsWritten": getattr(store, "rows_written", 0),
+    }
+
+
+async def run(sessions: int, participants: int):
+    results = [await measure(SessionStore(), sessions, participants)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteSessionStore(os.path.join(tmp, "sessions.db"), flush_interval=0.05)
+        results.append(await measure(store, sessions, participants))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--participants", type=int, default=30)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.sessions, args.participants)), indent=2))
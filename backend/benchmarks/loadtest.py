@@ -0,0 +1,284 @@
+# Load generator for the WebSocket backend. Opens N sessions x M simulated
+# voters against a local uvicorn (spawned unless --url is given), replays a
+# realistic event mix and prints one JSON report, so runs can be diffed
+# across commits:
+#
+#   python -m backend.benchmarks.loadtest --sessions 20 --voters 15 --duration 30 > run.json
+#
+# Per round the moderator adds a work item, voters cast votes in a
+# burst (some change their mind), the moderator reveals and clears; voters
+# randomly drop and reconnect throughout.
+from typing import Dict, List, Optional
+from .. import codec
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+try:
+    import websockets
+except ImportError:  # shipped with uvicorn[standard]
+    websockets = None
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.events_sent = 0
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.reconnects = 0
+        self.errors = 0
+
+
+# CPU seconds and RSS of a process from /proc (Linux); psutil if available
+class ProcessSampler:
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.rss_max = 0
+        self._cpu_start = self.cpu_seconds()
+
+    def cpu_seconds(self) -> Optional[float]:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except OSError:
+            try:
+                import psutil
+                times = psutil.Process(self.pid).cpu_times()
+                return times.user + times.system
+            except Exception:
+                return None
+
+    def rss_bytes(self) -> Optional[int]:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            try:
+                import psutil
+                return psutil.Process(self.pid).memory_info().rss
+            except Exception:
+                return None
+        return None
+
+    async def run(self):
+        while True:
+            self.rss_max = max(self.rss_max, self.rss_bytes() or 0)
+            await asyncio.sleep(0.25)
+
+    def cpu_used(self) -> Optional[float]:
+        end = self.cpu_seconds()
+        if end is None or self._cpu_start is None:
+            return None
+        return end - self._cpu_start
+
+
+class Client:
+    def __init__(self, url: str, session_id: str, user_id: str, stats: Stats, args):
+        self.url = (
+            f"{url}/ws/{session_id}?userId={user_id}&name={user_id}"
+            f"&delta={'true' if args.delta else 'false'}&encoding={args.encoding}"
+        )
+        self.stats = stats
+        self.args = args
+        self.ws = None
+        # Send times of events still waiting for the next state update
+        self._pending: List[float] = []
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, max_size=None)
+        self._reader = asyncio.create_task(self._read())
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self._reader is not None:
+            self._reader.cancel()
+        self._pending.clear()
+
+    async def reconnect(self):
+        await self.close()
+        await self.connect()
+        self.stats.reconnects += 1
+
+    async def send(self, event: str, payload: dict):
+        message = {"event": event, "payload": payload}
+        frame = codec.pack(message) if self.args.encoding == codec.MSGPACK else json.dumps(message)
+        self._pending.append(time.perf_counter())
+        self.stats.events_sent += 1
+        try:
+            await self.ws.send(frame)
+        except Exception:
+            self.stats.errors += 1
+
+    async def _read(self):
+        try:
+            async for frame in self.ws:
+                now = time.perf_counter()
+                self.stats.frames_received += 1
+                self.stats.bytes_received += len(frame)
+                # Any state update answers every event this client sent before it
+                for sent_at in self._pending:
+                    self.stats.latencies.append(now - sent_at)
+                self._pending.clear()
+        except Exception:
+            pass
+
+
+async def run_session(url: str, session_id: str, args, stats: Stats, deadline: float):
+    rng = random.Random(f"{args.seed}-{session_id}")
+    moderator = Client(url, session_id, f"{session_id}-mod", stats, args)
+    await moderator.connect()
+    voters = [Client(url, session_id, f"{session_id}-v{i}", stats, args) for i in range(args.voters)]
+    for voter in voters:
+        await voter.connect()
+
+    async def vote(voter: Client):
+        await asyncio.sleep(rng.uniform(0, args.burst))
+        await voter.send("cast_vote", {"value": rng.choice([1, 2, 3, 5, 8, 13])})
+        # Some voters change their mind
+        if rng.random() < 0.2:
+            await asyncio.sleep(rng.uniform(0, args.burst))
+            await voter.send("cast_vote", {"value": rng.choice([1, 2, 3, 5, 8, 13])})
+
+    async def churn():
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(rng.expovariate(args.churn) if args.churn > 0 else deadline)
+            if voters and time.perf_counter() < deadline:
+                try:
+                    await rng.choice(voters).reconnect()
+                except Exception:
+                    stats.errors += 1
+
+    churner = asyncio.create_task(churn())
+    round_no = 0
+    while time.perf_counter() < deadline:
+        round_no += 1
+        await moderator.send("add_work_item", {"title": f"Ticket {round_no}", "description": "x" * 120})
+        await asyncio.sleep(0.05)
+        await asyncio.gather(*(vote(voter) for voter in voters))
+        await asyncio.sleep(0.2)
+        await moderator.send("reveal_votes", {})
+        await asyncio.sleep(args.think)
+        await moderator.send("clear_votes", {})
+        await asyncio.sleep(0.2)
+
+    churner.cancel()
+    for client in [moderator] + voters:
+        await client.close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+async def main(args) -> Dict:
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"]
+        )
+        url = f"ws://127.0.0.1:{port}"
+        for _ in range(100):
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    break
+            except OSError:
+                await asyncio.sleep(0.1)
+
+    stats = Stats()
+    sampler = ProcessSampler(server.pid if server else args.server_pid)
+    sampling = asyncio.create_task(sampler.run())
+    started = time.perf_counter()
+    deadline = started + args.duration
+    try:
+        await asyncio.gather(*(
+            run_session(url, f"load-{i}", args, stats, deadline) for i in range(args.sessions)
+        ))
+    finally:
+        elapsed = time.perf_counter() - started
+        sampling.cancel()
+        cpu = sampler.cpu_used()
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    to_ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "revision": git_revision(),
+        "config": {
+            "sessions": args.sessions,
+            "voters": args.voters,
+            "duration": args.duration,
+            "delta": args.delta,
+            "encoding": args.encoding,
+        },
+        "eventsSent": stats.events_sent,
+        "framesReceived": stats.frames_received,
+        "reconnects": stats.reconnects,
+        "errors": stats.errors,
+        "latencyMs": {
+            "p50": to_ms(percentile(stats.latencies, 50)),
+            "p90": to_ms(percentile(stats.latencies, 90)),
+            "p99": to_ms(percentile(stats.latencies, 99)),
+            "max": to_ms(max(stats.latencies) if stats.latencies else None),
+        },
+        "framesPerSecond": round(stats.frames_received / elapsed, 1),
+        "bytesPerEvent": round(stats.bytes_received / max(stats.events_sent, 1), 1),
+        "server": {
+            "cpuSeconds": round(cpu, 2) if cpu is not None else None,
+            "cpuPercent": round(cpu / elapsed * 100, 1) if cpu is not None else None,
+            "rssMaxBytes": sampler.rss_max or None,
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="existing server, e.g. ws://127.0.0.1:8000 (default: spawn one)")
+    parser.add_argument("--server-pid", type=int, help="pid to sample CPU/RSS from when using --url")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--voters", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--burst", type=float, default=1.0, help="seconds over which a round's votes arrive")
+    parser.add_argument("--think", type=float, default=0.5, help="seconds between reveal and clear")
+    parser.add_argument("--churn", type=float, default=0.2, help="reconnects per second per session")
+    parser.add_argument("--delta", action="store_true")
+    parser.add_argument("--encoding", choices=[codec.JSON, codec.MSGPACK], default=codec.JSON)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if websockets is None:
+        raise SystemExit("loadtest requires the 'websockets' package (uvicorn[standard])")
+    print(json.dumps(asyncio.run(main(args)), indent=2))
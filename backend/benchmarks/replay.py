@@ -0,0 +1,269 @@
+# Replay an event journal (PLANPOKER_JOURNAL_DIR) against a fresh
+# ConnectionManager in this process: no network, sockets are stand-ins that
+# count the frames they would have sent. Events go through the same router,
+# session actors and handle_event as live traffic, at the recorded pace
+# (--speed 1), scaled, or as fast as possible (--speed 0, the default).
+#
+# Journals of several workers can be given together; they are merged on
+# one timeline. Work item ids generated while recording are mapped onto
+# the ids generated by the replay.
+#
+#   python -m backend.benchmarks.replay journals/*.ndjson [--speed 0]
+#       [--profile cprofile|sample] [--profile-out replay.prof]
+#
+# --profile cprofile writes pstats output (and prints the top functions);
+# --profile sample writes collapsed stacks (flamegraph.pl, speedscope) from
+# a signal-driven sampler that only costs something when it fires. Without
+# --profile-out the file goes to the temp directory; its path is in the
+# results.
+from typing import Any, Dict, List, Optional, Tuple
+from ..cluster import ClusterRouter, LocalBus
+from ..connection_manager import ConnectionManager
+from ..journal import SEED, CONNECT, DISCONNECT, EVENT, REQUEST, load
+from ..models import User
+from ..state import SessionState
+from .. import main
+import argparse
+import asyncio
+import collections
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import signal
+import sys
+import tempfile
+import time
+
+# Time left for coalesced broadcasts and send queues after the last event
+SETTLE_SECONDS = 0.2
+SAMPLE_INTERVAL = 0.001
+
+
+# Stands in for a client WebSocket
+class ReplaySocket:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.frames += 1
+        self.bytes += len(data)
+
+    async def send_bytes(self, data: bytes):
+        self.frames += 1
+        self.bytes += len(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+# Statistical profiler on ITIMER_PROF: every interval of CPU time the
+# interrupted stack is counted. Output is one "frame;frame;... count" line
+# per distinct stack.
+class Sampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Dict[str, int] = collections.Counter()
+
+    def _sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+
+    def __enter__(self):
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+
+
+class Replay:
+    def __init__(self):
+        self.manager = ConnectionManager()
+        # handle_event works on the module's manager
+        main.manager = self.manager
+        # Heartbeat not started: stand-in sockets never answer pings
+        self.router = ClusterRouter(self.manager, LocalBus(), main.handle_event)
+        # (sessionId, userId) -> open sockets, newest last
+        self.sockets: Dict[Tuple[str, str], List[ReplaySocket]] = {}
+        self.closed: List[ReplaySocket] = []
+        # Recorded work item id -> id generated by this replay
+        self.ids: Dict[str, str] = {}
+        # Last job submitted per session, awaited before the replay ends
+        self.last: Dict[str, asyncio.Future] = {}
+        self.counts: Dict[str, int] = collections.Counter()
+        self.handler_seconds: Dict[str, List[float]] = collections.defaultdict(list)
+        self.skipped = 0
+
+    async def run(self, entries: List[List[Any]], speed: float) -> dict:
+        await self.router.bus.start()
+        start = time.perf_counter()
+        origin = entries[0][0] if entries else 0
+        for entry in entries:
+            if speed:
+                delay = (entry[0] - origin) / 1e6 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self.apply(entry)
+        await asyncio.gather(*self.last.values(), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+
+        await asyncio.sleep(SETTLE_SECONDS)
+        sockets = list(self.closed)
+        for (session_id, _), open_sockets in self.sockets.items():
+            for socket in open_sockets:
+                self.manager.detach(socket, session_id)
+                sockets.append(socket)
+        await self.manager.actors.close()
+        await self.router.bus.close()
+
+        events = sum(len(times) for times in self.handler_seconds.values())
+        return {
+            "entries": len(entries),
+            "counts": dict(self.counts),
+            "skipped": self.skipped,
+            "journalSeconds": round((entries[-1][0] - origin) / 1e6, 3) if entries else 0,
+            "replaySeconds": round(elapsed, 3),
+            "eventsPerSecond": round(events / elapsed) if elapsed else None,
+            "framesSent": sum(socket.frames for socket in sockets),
+            "bytesSent": sum(socket.bytes for socket in sockets),
+            "handlerUs": {event: percentiles(times) for event, times in sorted(self.handler_seconds.items())},
+        }
+
+    async def apply(self, entry: List[Any]):
+        kind = entry[1]
+        self.counts[kind] += 1
+        if kind == SEED:
+            session = SessionState.from_dict(entry[3])
+            self.manager.sessions[session.id] = session
+            self.ids.update((item.id, item.id) for item in session.workItems)
+        elif kind == CONNECT:
+            _, _, session_id, user, options = entry
+            socket = ReplaySocket()
+            user = User(**user)
+            await self.router.connect(
+                socket, session_id, user, delta=options["delta"], encoding=options["encoding"],
+                summary=options["summary"], compression=options.get("compression")
+            )
+            self.sockets.setdefault((session_id, user.id), []).append(socket)
+        elif kind == DISCONNECT:
+            _, _, session_id, user_id = entry
+            sockets = self.sockets.get((session_id, user_id))
+            if not sockets:
+                self.skipped += 1
+                return
+            socket = sockets.pop()
+            if not sockets:
+                del self.sockets[(session_id, user_id)]
+            self.closed.append(socket)
+            await self.router.disconnect(socket, session_id, user_id)
+        elif kind == EVENT:
+            session_id, user_id, event, payload = entry[2:6]
+            ids = entry[6] if len(entry) > 6 else None
+            job = functools.partial(self._event, session_id, user_id, event, payload, ids)
+            self.last[session_id] = await self.manager.actors.submit(session_id, job, block=True)
+        elif kind == REQUEST:
+            _, _, session_id, user_id, event, payload = entry
+            sockets = self.sockets.get((session_id, user_id))
+            if not sockets:
+                self.skipped += 1
+                return
+            if event == "request_snapshot":
+                await self.manager.send_snapshot(session_id, sockets[-1])
+            elif event == "get_work_items":
+                self.manager.send_work_items(session_id, sockets[-1], self._map(payload) or {})
+
+    # Runs on the session's actor, like a live event, after the session's
+    # earlier events (and the ids they created) have been applied
+    async def _event(self, session_id: str, user_id: str, event: str, payload: Any, ids: Optional[List[str]]):
+        payload = self._map(payload)
+        session = self.manager.sessions.get(session_id)
+        count = len(session.workItems) if session is not None else 0
+        start = time.perf_counter()
+        await main.handle_event(session_id, user_id, event, payload)
+        self.handler_seconds[event].append(time.perf_counter() - start)
+        if ids and session is not None:
+            self.ids.update(zip(ids, (item.id for item in session.workItems[count:])))
+
+    # Recorded work item ids in a payload, as generated by this replay
+    def _map(self, payload: Any) -> Any:
+        if not isinstance(payload, dict):
+            return payload
+        if "workItemId" in payload:
+            payload = dict(payload, workItemId=self.ids.get(payload["workItemId"], payload["workItemId"]))
+        if isinstance(payload.get("ids"), list):
+            payload = dict(payload, ids=[self.ids.get(i, i) for i in payload["ids"]])
+        return payload
+
+
+def percentiles(times: List[float]) -> dict:
+    times = sorted(times)
+    return {
+        "count": len(times),
+        "p50": round(times[len(times) // 2] * 1e6, 1),
+        "p99": round(times[int(len(times) * 0.99)] * 1e6, 1),
+        "max": round(times[-1] * 1e6, 1),
+    }
+
+
+# Fresh file for profile output, so nothing lands in the working tree
+def _temp_path(suffix: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="replay-", suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def run(paths: List[str], speed: float, profile: Optional[str], profile_out: Optional[str]) -> dict:
+    entries = load(paths)
+    replay = Replay()
+    if profile == "cprofile":
+        profiler = cProfile.Profile()
+    elif profile == "sample":
+        profiler = Sampler()
+    else:
+        profiler = contextlib.nullcontext()
+
+    with profiler:
+        results = asyncio.run(replay.run(entries, speed))
+
+    if profile == "cprofile":
+        out = profile_out or _temp_path(".prof")
+        profiler.dump_stats(out)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(20)
+        print(report.getvalue(), file=sys.stderr)
+        results["profile"] = out
+    elif profile == "sample":
+        out = profile_out or _temp_path(".folded")
+        profiler.write(out)
+        results["profile"] = out
+        results["samples"] = sum(profiler.stacks.values())
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("journals", nargs="+")
+    parser.add_argument("--speed", type=float, default=0, help="1 = recorded pace, 0 = as fast as possible")
+    parser.add_argument("--profile", choices=["cprofile", "sample"])
+    parser.add_argument("--profile-out")
+    args = parser.parse_args()
+    print(json.dumps(run(args.journals, args.speed, args.profile, args.profile_out), indent=2))
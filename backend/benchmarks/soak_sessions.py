@@ -0,0 +1,111 @@
+# Soak test for idle-session eviction: creates many short-lived sessions
+# (sockets connect through the router, a few work items and votes, everyone
+# disconnects) and samples RSS and routing state as it goes. With eviction
+# RSS and the router's owners, subscriptions and claims should plateau;
+# with --no-evict they grow linearly.
+#
+#   python -m backend.benchmarks.soak_sessions [--sessions 100000] [--max-sessions 1000] [--spill DIR] [--no-evict]
+from ..cluster import ClusterRouter, LocalBus
+from ..connection_manager import ConnectionManager
+from ..lifecycle import SessionLifecycle
+from ..models import User
+from ..store import SessionStore
+from .. import main
+from .replay import ReplaySocket
+import argparse
+import asyncio
+import functools
+import gc
+import json
+import time
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def run(args) -> dict:
+    store = SessionStore(spill_dir=args.spill)
+    await store.start()
+    manager = ConnectionManager(store)
+    manager.lifecycle = SessionLifecycle(manager, ttl=args.ttl, max_sessions=0 if args.no_evict else args.max_sessions)
+    main.manager = manager
+    router = ClusterRouter(manager, LocalBus(), main.handle_event)
+    await router.start()
+
+    async def settle(session_id: str):
+        # Leaves are queued on the session actor; wait for them before sweeping
+        await (await manager.actors.submit(session_id, functools.partial(asyncio.sleep, 0), block=True))
+
+    samples = []
+    start = time.perf_counter()
+    for n in range(args.sessions):
+        session_id = f"soak-{n}"
+        sockets = []
+        for i in range(args.participants):
+            socket = ReplaySocket()
+            await router.connect(socket, session_id, User(id=f"u{i}", name=f"Voter {i}"))
+            sockets.append(socket)
+        for i in range(args.work_items):
+            await main.handle_event(session_id, "u0", "add_work_item", {"title": f"Ticket {i}", "description": "x" * 80})
+        for i in range(args.participants):
+            await main.handle_event(session_id, f"u{i}", "cast_vote", {"value": 5})
+        for i, socket in enumerate(sockets):
+            await router.disconnect(socket, session_id, f"u{i}")
+        await settle(session_id)
+        manager.scheduler.cancel(session_id)
+        # Let the loop run so cancelled flush timers are reaped as in production
+        await asyncio.sleep(0)
+
+        if (n + 1) % args.sweep_every == 0:
+            await manager.lifecycle.sweep()
+        if (n + 1) % args.sample_every == 0:
+            gc.collect()
+            samples.append({
+                "sessions": n + 1,
+                "inMemory": len(manager.sessions),
+                "routed": len(router.owners),
+                "subscriptions": sum(len(s) for s in router.bus.broker.subscribers.values()),
+                "claims": len(router.bus.broker.claims),
+                "heartbeat": len(router.heartbeat),
+                "rssMb": round(rss_bytes() / 2**20, 1),
+            })
+
+    result = {
+        "config": {k: v for k, v in vars(args).items()},
+        "seconds": round(time.perf_counter() - start, 1),
+        "samples": samples,
+        "lifecycle": manager.lifecycle.stats(),
+    }
+
+    # An evicted session comes back from the spill directory on reconnect
+    if args.spill and not args.no_evict:
+        await router.connect(ReplaySocket(), "soak-0", User(id="u0", name="Voter 0"))
+        session = manager.sessions.get("soak-0")
+        result["rehydrated"] = {
+            "workItems": len(session.workItems),
+            "votes": len(session.votes),
+            "rehydrations": store.rehydrations,
+        }
+    await router.close()
+    await manager.actors.close()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--participants", type=int, default=5)
+    parser.add_argument("--work-items", type=int, default=3)
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--ttl", type=float, default=3600.0)
+    parser.add_argument("--sweep-every", type=int, default=500)
+    parser.add_argument("--sample-every", type=int, default=10000)
+    parser.add_argument("--spill", help="spill directory for evicted sessions")
+    parser.add_argument("--no-evict", action="store_true")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
@@ -0,0 +1,696 @@
+# Multi-worker mode. Every session has a single owner worker that holds its
+# state and runs handle_event; sockets may land on any worker. Non-owners
+# forward joins/leaves/events to the owner over a pub/sub bus and fan out
+# the owner's broadcasts to their own sockets.
+#
+# Channels per session:
+#   session:<id>:events  worker -> owner   (join / leave / client events / reads)
+#   session:<id>:out     owner -> workers  (snapshots / reset)
+#   owner:<id>           broker -> workers (ownership released)
+#   reply:<worker>:<n>   owner -> worker   (answer to one read)
+#
+# Run locally with several workers and no external service:
+#   python -m backend.cluster --workers 4 --port 8000
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from fastapi import WebSocket
+from .models import User, ParticipantStatus
+from .snapshots import BroadcastPayload, EncodedPatch, EncodedSnapshot
+from .heartbeat import Heartbeat
+from . import metrics
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import time
+import uuid
+
+Handler = Callable[[str], Awaitable[None]]
+# JSON-mode view of a session, answered by its owner for read(); by name
+View = Callable[[Any], Any]
+
+# Max size of a single bus frame (a full snapshot of a very large session)
+FRAME_LIMIT = 64 * 1024 * 1024
+# Redis ownership lease, refreshed while the worker is alive
+LEASE_SECONDS = 30
+# Seconds a read() waits for the owning worker's answer
+READ_TIMEOUT = 5.0
+# Built-in view: true for any session that exists
+EXISTS = "exists"
+
+
+class Bus(ABC):
+    # True when this worker is the only one (owns everything, nothing to relay)
+    local = False
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, data: str):
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: Handler):
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str):
+        ...
+
+    # Claim ownership of key for owner; returns whoever owns it afterwards
+    @abstractmethod
+    async def claim(self, key: str, owner: str) -> str:
+        ...
+
+    @abstractmethod
+    async def release(self, key: str, owner: str):
+        ...
+
+    # Whether a publish on channel could reach anyone (lets callers skip encoding)
+    def wants(self, channel: str) -> bool:
+        return True
+
+
+# Shared state of an in-process bus. Several LocalBus instances on the same
+# broker behave like workers on one Unix-socket broker, which is handy in tests.
+class LocalBroker:
+    def __init__(self):
+        self.subscribers: Dict[str, Dict[int, Handler]] = {}
+        self.claims: Dict[str, str] = {}
+
+
+class LocalBus(Bus):
+    def __init__(self, broker: Optional[LocalBroker] = None):
+        # A private broker means a single standalone worker
+        self.local = broker is None
+        self.broker = broker or LocalBroker()
+        # key -> owner id for claims made through this bus
+        self._owned: Dict[str, str] = {}
+
+    async def publish(self, channel: str, data: str):
+        for handler in list(self.broker.subscribers.get(channel, {}).values()):
+            asyncio.create_task(handler(data))
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self.broker.subscribers.setdefault(channel, {})[id(self)] = handler
+
+    async def unsubscribe(self, channel: str):
+        subscribers = self.broker.subscribers.get(channel)
+        if subscribers:
+            subscribers.pop(id(self), None)
+            if not subscribers:
+                del self.broker.subscribers[channel]
+
+    async def claim(self, key: str, owner: str) -> str:
+        current = self.broker.claims.setdefault(key, owner)
+        if current == owner:
+            self._owned[key] = owner
+        return current
+
+    async def release(self, key: str, owner: str):
+        if self.broker.claims.get(key) == owner:
+            del self.broker.claims[key]
+            self._owned.pop(key, None)
+            await self.publish(f"owner:{key}", "released")
+
+    async def close(self):
+        for key, owner in list(self._owned.items()):
+            await self.release(key, owner)
+
+    def wants(self, channel: str) -> bool:
+        return bool(self.broker.subscribers.get(channel))
+
+
+# Broker process for UnixSocketBus: newline-delimited JSON frames. Claims
+# belong to the client connection that made them and are released (with a
+# notification on owner:<key>) when that worker goes away.
+class UnixSocketBroker:
+    def __init__(self, path: str):
+        self.path = path
+        self.subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self.claims: Dict[str, asyncio.StreamWriter] = {}
+        self.owners: Dict[str, str] = {}
+
+    # `ready` (e.g. a multiprocessing.Event) is set once clients can connect
+    async def serve(self, ready=None):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self._client, self.path, limit=FRAME_LIMIT)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        channels: Set[str] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line)
+                op = frame["op"]
+                if op == "pub":
+                    self._publish(frame["ch"], frame["data"])
+                elif op == "sub":
+                    channels.add(frame["ch"])
+                    self.subscribers.setdefault(frame["ch"], set()).add(writer)
+                elif op == "unsub":
+                    channels.discard(frame["ch"])
+                    self.subscribers.get(frame["ch"], set()).discard(writer)
+                elif op == "claim":
+                    key = frame["key"]
+                    if key not in self.claims:
+                        self.claims[key] = writer
+                        self.owners[key] = frame["owner"]
+                    self._write(writer, {"op": "claimed", "id": frame["id"], "owner": self.owners[key]})
+                elif op == "release":
+                    key = frame["key"]
+                    if self.claims.get(key) is writer and self.owners.get(key) == frame["owner"]:
+                        self._release(key)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for channel in channels:
+                self.subscribers.get(channel, set()).discard(writer)
+            for key in [k for k, w in self.claims.items() if w is writer]:
+                self._release(key)
+            writer.close()
+
+    def _release(self, key: str):
+        del self.claims[key]
+        del self.owners[key]
+        self._publish(f"owner:{key}", "released")
+
+    def _publish(self, channel: str, data: str):
+        frame = {"op": "msg", "ch": channel, "data": data}
+        for subscriber in list(self.subscribers.get(channel, ())):
+            self._write(subscriber, frame)
+
+    def _write(self, writer: asyncio.StreamWriter, frame: dict):
+        try:
+            writer.write(json.dumps(frame, separators=(",", ":")).encode() + b"\n")
+        except Exception:
+            pass
+
+
+class UnixSocketBus(Bus):
+    def __init__(self, path: str):
+        self.path = path
+        self._handlers: Dict[str, Handler] = {}
+        self._claims: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path, limit=FRAME_LIMIT)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def publish(self, channel: str, data: str):
+        await self._send({"op": "pub", "ch": channel, "data": data})
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel] = handler
+        await self._send({"op": "sub", "ch": channel})
+
+    async def unsubscribe(self, channel: str):
+        self._handlers.pop(channel, None)
+        await self._send({"op": "unsub", "ch": channel})
+
+    async def claim(self, key: str, owner: str) -> str:
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._claims[self._next_id] = future
+        await self._send({"op": "claim", "id": self._next_id, "key": key, "owner": owner})
+        return await future
+
+    async def release(self, key: str, owner: str):
+        await self._send({"op": "release", "key": key, "owner": owner})
+
+    async def _send(self, frame: dict):
+        self._writer.write(json.dumps(frame, separators=(",", ":")).encode() + b"\n")
+        await self._writer.drain()
+
+    async def _run(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                print("Lost connection to the session broker")
+                return
+            frame = json.loads(line)
+            if frame["op"] == "msg":
+                handler = self._handlers.get(frame["ch"])
+                if handler:
+                    asyncio.create_task(handler(frame["data"]))
+            elif frame["op"] == "claimed":
+                future = self._claims.pop(frame["id"], None)
+                if future and not future.done():
+                    future.set_result(frame["owner"])
+
+
+# Redis-compatible bus (redis-py's asyncio client, optional dependency).
+# Ownership is a SET NX lease refreshed while the worker is alive, so a
+# crashed owner's sessions are re-claimed once the lease expires.
+class RedisBus(Bus):
+    def __init__(self, url: str):
+        self.url = url
+        self._handlers: Dict[str, Handler] = {}
+        # key -> owner id for leases held by this worker
+        self._owned: Dict[str, str] = {}
+        self._redis = None
+        self._pubsub = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("PLANPOKER_BUS=redis://... requires the 'redis' package")
+
+        self._redis = redis.from_url(self.url, decode_responses=True)
+        self._pubsub = self._redis.pubsub()
+        self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._refresh())]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for key, owner in list(self._owned.items()):
+            await self.release(key, owner)
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    async def publish(self, channel: str, data: str):
+        await self._redis.publish(channel, data)
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel] = handler
+        await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str):
+        self._handlers.pop(channel, None)
+        await self._pubsub.unsubscribe(channel)
+
+    async def claim(self, key: str, owner: str) -> str:
+        name = f"planpoker:owner:{key}"
+        await self._redis.set(name, owner, nx=True, ex=LEASE_SECONDS)
+        current = await self._redis.get(name)
+        if current == owner:
+            self._owned[key] = owner
+        return current
+
+    async def release(self, key: str, owner: str):
+        name = f"planpoker:owner:{key}"
+        if await self._redis.get(name) == owner:
+            await self._redis.delete(name)
+            self._owned.pop(key, None)
+            await self.publish(f"owner:{key}", "released")
+
+    async def _run(self):
+        while True:
+            if not self._handlers:
+                await asyncio.sleep(0.1)
+                continue
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message:
+                handler = self._handlers.get(message["channel"])
+                if handler:
+                    asyncio.create_task(handler(message["data"]))
+
+    async def _refresh(self):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            for key in list(self._owned):
+                await self._redis.expire(f"planpoker:owner:{key}", LEASE_SECONDS)
+
+
+# PLANPOKER_BUS: "local" (default, single worker), "unix:///path/to/broker.sock"
+# or "redis://host:6379/0"
+def create_bus(url: Optional[str] = None) -> Bus:
+    url = url or os.environ.get("PLANPOKER_BUS", "local")
+    if url.startswith("unix://"):
+        return UnixSocketBus(url[len("unix://"):])
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisBus(url)
+    return LocalBus()
+
+
+# Own-vote values travel with the masked frames so every worker can build
+# the per-user variants for its own sockets
+def _encode_projection(payload: BroadcastPayload) -> dict:
+    patch = payload.patch
+    snapshot = payload.snapshot
+    return {
+        "snapshot": snapshot.text,
+        "private": snapshot.private,
+        "patch": [patch.base_version, patch.text, patch.private] if patch is not None else None,
+    }
+
+
+def _decode_projection(version: int, message: dict) -> BroadcastPayload:
+    patch = None
+    if message["patch"] is not None:
+        base_version, text, private = message["patch"]
+        patch = EncodedPatch(base_version, version, text, private=private)
+    snapshot = EncodedSnapshot(version, message["snapshot"], private=message.get("private"))
+    return BroadcastPayload(version, patch, snapshot=snapshot)
+
+
+def encode_payload(payload: BroadcastPayload) -> str:
+    message = {"type": "snapshot", "version": payload.version, **_encode_projection(payload)}
+    if payload.summary is not None:
+        message["summary"] = _encode_projection(payload.summary)
+    return json.dumps(message, separators=(",", ":"))
+
+
+def decode_payload(message: dict) -> BroadcastPayload:
+    version = message["version"]
+    payload = _decode_projection(version, message)
+    if message.get("summary") is not None:
+        payload.summary = _decode_projection(version, message["summary"])
+    return payload
+
+
+# Routes connections and events to the session owner. With the default
+# LocalBus this worker owns everything and calls go straight to the manager.
+class ClusterRouter:
+    def __init__(
+        self, manager, bus: Bus, handle_event: Callable[[str, str, str, dict], Awaitable[None]],
+        views: Optional[Dict[str, View]] = None
+    ):
+        self.manager = manager
+        self.bus = bus
+        self.handle_event = handle_event
+        self.views = {EXISTS: lambda session: True, **(views or {})}
+        self._reads = 0
+        self.worker_id = uuid.uuid4().hex
+        # sessionId -> owning worker id, for sessions this worker routes
+        self.owners: Dict[str, str] = {}
+        # sessionId -> userId -> User for sockets attached to this worker
+        self.local_users: Dict[str, Dict[str, User]] = {}
+        # Pings this worker's sockets; status changes go to the session owner
+        self.heartbeat = Heartbeat(manager, self.report_presence)
+        # Evicted and reset sessions give their routing state back through us
+        manager.router = self
+
+    async def start(self):
+        await self.bus.start()
+        if not self.bus.local:
+            self.manager.relay = self
+        await self.heartbeat.start()
+
+    async def close(self):
+        await self.heartbeat.close()
+        await self.bus.close()
+
+    def is_owner(self, session_id: str) -> bool:
+        return self.owners.get(session_id) == self.worker_id
+
+    async def connect(
+        self, websocket: WebSocket, session_id: str, user: User, delta: bool = False,
+        encoding: str = "json", resume_from: Optional[int] = None, summary: bool = False,
+        compression: Optional[str] = None
+    ):
+        start = time.perf_counter()
+        connection = await self.manager.attach(websocket, session_id, user, delta, encoding, summary, compression)
+        self.local_users.setdefault(session_id, {})[user.id] = user
+        await self._route(session_id)
+
+        if self.is_owner(session_id):
+            await self._submit_join(session_id, user, wait=True)
+        else:
+            await self._forward(session_id, {"type": "join", "user": user.model_dump(mode="json")})
+        # Owner: from the live session. Elsewhere: from what the owner last
+        # relayed; its broadcast of this join follows in the presence window.
+        self.manager.resume(session_id, connection, resume_from)
+        self.heartbeat.watch(session_id, connection)
+        metrics.connect_seconds.observe(time.perf_counter() - start)
+        return connection
+
+    async def disconnect(self, websocket: WebSocket, session_id: str, user_id: str):
+        self.manager.detach(websocket, session_id)
+        users = self.local_users.get(session_id, {})
+        users.pop(user_id, None)
+
+        if self.is_owner(session_id):
+            await self._submit_leave(session_id, user_id)
+        else:
+            await self._forward(session_id, {"type": "leave", "userId": user_id})
+
+        await self.release(session_id)
+
+    # Audience subscriber (audience.py) arriving on this worker. Owner: the
+    # session must exist here or in the store. Elsewhere: the owner is asked
+    # whether it exists, then to broadcast, so the new stream does not wait
+    # for the next change. Returns False (leaving nothing routed) if the
+    # session does not exist; raises asyncio.TimeoutError, also leaving
+    # nothing routed, if the owner does not answer.
+    async def watch(self, session_id: str) -> bool:
+        await self._route(session_id)
+        try:
+            if self.is_owner(session_id):
+                exists = await self.manager.load_session(session_id) is not None
+            else:
+                exists = await self._ask(session_id, EXISTS) is not None
+        except asyncio.TimeoutError:
+            await self.release(session_id)
+            raise
+        if not exists:
+            await self.release(session_id)
+            return False
+        if not self.is_owner(session_id):
+            await self._forward(session_id, {"type": "watch"})
+        return True
+
+    # Route a session for a request that holds no socket here (an HTTP
+    # call); True if this worker owns it. Pair with release() once done.
+    async def route(self, session_id: str) -> bool:
+        await self._route(session_id)
+        return self.is_owner(session_id)
+
+    # One of `views` over a session for an HTTP read, wherever the session
+    # lives: on the owner from memory or the store, elsewhere asked of the
+    # owner over the bus. None if the session does not exist; raises
+    # asyncio.TimeoutError if the owner does not answer.
+    async def read(self, session_id: str, view: str) -> Any:
+        try:
+            if await self.route(session_id):
+                session = await self.manager.load_session(session_id)
+                return None if session is None else self.views[view](session)
+            return await self._ask(session_id, view)
+        finally:
+            await self.release(session_id)
+
+    async def unwatch(self, session_id: str):
+        await self.release(session_id)
+
+    # Drop the routing state of a session nothing here uses any more: no
+    # local sockets, no audience and, on the owner, no session in memory
+    # (evicted, reset or never created). The owner also gives up its claim,
+    # so the next connect anywhere re-claims and loads it from the store.
+    async def release(self, session_id: str):
+        if (self.local_users.get(session_id) or self.manager.audience.watching(session_id)
+                or (self.is_owner(session_id) and session_id in self.manager.sessions)):
+            return
+        owned = self.is_owner(session_id)
+        self.local_users.pop(session_id, None)
+        self.owners.pop(session_id, None)
+        self.manager.remote_payloads.pop(session_id, None)
+        self.manager.snapshot_cache.invalidate(session_id)
+        await self.bus.unsubscribe(f"session:{session_id}:events")
+        await self.bus.unsubscribe(f"session:{session_id}:out")
+        await self.bus.unsubscribe(f"owner:{session_id}")
+        if owned:
+            await self.bus.release(session_id, self.worker_id)
+
+    # Raises actors.InboxFull if the owner's inbox for the session stays full
+    async def dispatch(self, session_id: str, user_id: str, event: str, payload: dict):
+        if self.is_owner(session_id):
+            await self._submit_event(session_id, user_id, event, payload)
+        else:
+            await self._forward(session_id, {"type": "event", "userId": user_id, "event": event, "payload": payload})
+
+    # Heartbeat status changes for this worker's sockets in one session
+    async def report_presence(self, session_id: str, changes: List[Tuple[str, ParticipantStatus]]):
+        if self.is_owner(session_id):
+            await self._submit_presence(session_id, changes)
+        else:
+            await self._forward(session_id, {
+                "type": "presence", "changes": [[user_id, status.value] for user_id, status in changes],
+            })
+
+    # Hooks called by ConnectionManager when it owns the session
+    async def publish_snapshot(self, session_id: str, payload: BroadcastPayload):
+        channel = f"session:{session_id}:out"
+        if self.bus.wants(channel):
+            await self.bus.publish(channel, encode_payload(payload))
+
+    async def publish_reset(self, session_id: str):
+        # Forget the session first so our own release notice is not re-claimed
+        self.local_users.pop(session_id, None)
+        self.owners.pop(session_id, None)
+        await self.bus.unsubscribe(f"session:{session_id}:events")
+        await self.bus.unsubscribe(f"owner:{session_id}")
+        await self.bus.publish(f"session:{session_id}:out", '{"type":"reset"}')
+        await self.bus.release(session_id, self.worker_id)
+
+    async def _route(self, session_id: str):
+        previous = self.owners.get(session_id)
+        events = f"session:{session_id}:events"
+        # Listen before claiming so nothing forwarded right after we win is lost
+        if previous != self.worker_id:
+            await self.bus.subscribe(events, lambda data: self._on_event(session_id, data))
+
+        owner = await self.bus.claim(session_id, self.worker_id)
+        self.owners[session_id] = owner
+        if owner == previous:
+            return
+
+        if owner == self.worker_id:
+            await self.bus.unsubscribe(f"session:{session_id}:out")
+        else:
+            await self.bus.unsubscribe(events)
+            await self.bus.subscribe(f"session:{session_id}:out", lambda data: self._on_out(session_id, data))
+        await self.bus.subscribe(f"owner:{session_id}", lambda data: self._on_released(session_id))
+
+    # Owner side: everything that mutates a session goes through its actor
+    async def _submit_join(self, session_id: str, user: User, wait: bool = False):
+        done = await self.manager.actors.submit(session_id, functools.partial(self.manager.join, session_id, user), block=True)
+        if wait:
+            await done
+
+    async def _submit_leave(self, session_id: str, user_id: str):
+        await self.manager.actors.submit(session_id, functools.partial(self._leave, session_id, user_id), block=True)
+
+    async def _submit_presence(self, session_id: str, changes: List[Tuple[str, ParticipantStatus]]):
+        await self.manager.actors.submit(session_id, functools.partial(self._presence, session_id, changes), block=True)
+
+    async def _submit_event(self, session_id: str, user_id: str, event: str, payload: dict):
+        await self.manager.actors.submit(session_id, functools.partial(self.handle_event, session_id, user_id, event, payload))
+
+    async def _leave(self, session_id: str, user_id: str):
+        self.manager.leave(session_id, user_id)
+
+    async def _presence(self, session_id: str, changes: List[Tuple[str, ParticipantStatus]]):
+        self.manager.set_presence(session_id, changes)
+
+    async def _forward(self, session_id: str, message: dict):
+        await self.bus.publish(f"session:{session_id}:events", json.dumps(message, separators=(",", ":")))
+
+    async def _ask(self, session_id: str, view: str) -> Any:
+        self._reads += 1
+        channel = f"reply:{self.worker_id}:{self._reads}"
+        answer = asyncio.get_running_loop().create_future()
+
+        async def on_answer(data: str):
+            if not answer.done():
+                answer.set_result(json.loads(data)["answer"])
+
+        await self.bus.subscribe(channel, on_answer)
+        try:
+            await self._forward(session_id, {"type": "read", "view": view, "reply": channel})
+            return await asyncio.wait_for(answer, READ_TIMEOUT)
+        finally:
+            await self.bus.unsubscribe(channel)
+
+    async def _answer(self, session_id: str, view: str, channel: str):
+        session = await self.manager.load_session(session_id)
+        answer = None if session is None else self.views[view](session)
+        await self.bus.publish(channel, json.dumps({"answer": answer}, separators=(",", ":")))
+
+    async def _on_event(self, session_id: str, data: str):
+        message = json.loads(data)
+        kind = message["type"]
+        try:
+            if kind == "join":
+                await self._submit_join(session_id, User(**message["user"]))
+            elif kind == "leave":
+                await self._submit_leave(session_id, message["userId"])
+            elif kind == "presence":
+                changes = [(user_id, ParticipantStatus(status)) for user_id, status in message["changes"]]
+                await self._submit_presence(session_id, changes)
+            elif kind == "event":
+                await self._submit_event(session_id, message["userId"], message["event"], message["payload"])
+            elif kind == "read":
+                await self._answer(session_id, message["view"], message["reply"])
+            elif kind == "watch":
+                await self.manager.actors.submit(
+                    session_id, functools.partial(self.manager.broadcast_snapshot, session_id), block=True
+                )
+        except Exception as e:
+            print(f"Error handling forwarded event: {e}")
+
+    async def _on_out(self, session_id: str, data: str):
+        message = json.loads(data)
+        if message["type"] == "snapshot":
+            self.manager.deliver(session_id, decode_payload(message))
+        elif message["type"] == "reset":
+            self.local_users.pop(session_id, None)
+            self.owners.pop(session_id, None)
+            await self.bus.unsubscribe(f"session:{session_id}:out")
+            await self.bus.unsubscribe(f"owner:{session_id}")
+            await self.manager.close_connections(session_id)
+
+    # The owner went away: re-claim, and whoever wins rebuilds presence from
+    # the joins every worker replays for its own sockets
+    async def _on_released(self, session_id: str):
+        users = list(self.local_users.get(session_id, {}).values())
+        if not users:
+            return
+        self.owners.pop(session_id, None)
+        await self._route(session_id)
+        for user in users:
+            if self.is_owner(session_id):
+                await self._submit_join(session_id, user)
+            else:
+                await self._forward(session_id, {"type": "join", "user": user.model_dump(mode="json")})
+
+
+def _run_broker(path: str, ready):
+    asyncio.run(UnixSocketBroker(path).serve(ready))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several uvicorn workers behind a local session broker")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--socket", default="/tmp/planpoker-broker.sock")
+    args = parser.parse_args()
+
+    # Workers start once the broker listens; a socket file left over from an
+    # earlier run is not a sign of that, since the broker replaces it
+    ready = multiprocessing.Event()
+    broker = multiprocessing.Process(target=_run_broker, args=(args.socket, ready), daemon=True)
+    broker.start()
+
+    import uvicorn
+    while not ready.wait(0.1):
+        if not broker.is_alive():
+            raise SystemExit(f"Session broker exited with code {broker.exitcode}")
+
+    os.environ["PLANPOKER_BUS"] = f"unix://{args.socket}"
+    try:
+        uvicorn.run(
+            "backend.main:app", host=args.host, port=args.port, workers=args.workers,
+            ws_per_message_deflate=False
+        )
+    finally:
+        broker.terminate()
+
+
+if __name__ == "__main__":
+    main()
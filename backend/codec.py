@@ -0,0 +1,85 @@
+# Wire encodings, negotiated per connection via the "encoding" query param.
+# JSON text frames are the default; MessagePack binary frames need the
+# optional msgpack package.
+#
+# Clients may also ask for compression ("compression=deflate"): frames of
+# at least COMPRESS_MIN_BYTES (in practice snapshots) are then sent as
+# binary zlib streams of the encoded frame. A zlib stream starts with 0x78,
+# which never starts a server MessagePack message (always a map), so
+# clients tell the two apart by the first byte. Each frame is compressed
+# once and shared by every socket that receives it; see EncodedSnapshot.
+from typing import Any, Optional, Union
+import json
+import os
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+DEFLATE = "deflate"
+# CMF/FLG of a zlib stream with a 32K window (the level hint is not checked)
+_ZLIB_HEADER = b"\x78\x9c"
+# Smaller frames gain little and are sent as they are
+COMPRESS_MIN_BYTES = int(os.environ.get("PLANPOKER_COMPRESS_MIN_BYTES", "1024"))
+# zlib level 1-9: 6 gets most of level 9's ratio on snapshot JSON at a
+# fraction of its CPU; 1 roughly halves the CPU for a few percent of size
+COMPRESS_LEVEL = int(os.environ.get("PLANPOKER_COMPRESS_LEVEL", "6"))
+
+
+# Fall back to JSON when the requested encoding is unknown or unavailable
+def negotiate(encoding: str) -> str:
+    if encoding == MSGPACK and msgpack is not None:
+        return MSGPACK
+    return JSON
+
+
+# None (uncompressed) unless the client asked for a supported compression
+def negotiate_compression(compression: Optional[str]) -> Optional[str]:
+    return DEFLATE if compression == DEFLATE else None
+
+
+def compress(frame: Union[str, bytes], level: Optional[int] = None) -> bytes:
+    data = frame.encode("utf-8") if isinstance(frame, str) else frame
+    return zlib.compress(data, COMPRESS_LEVEL if level is None else level)
+
+
+# The first part of a zlib stream, compressed once and reusable in front of
+# any number of different tails: finish() only compresses the tail and
+# extends the checksum.
+class DeflatedHead:
+    __slots__ = ("blocks", "checksum", "level")
+
+    def __init__(self, head: bytes, level: Optional[int] = None):
+        self.level = COMPRESS_LEVEL if level is None else level
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        # Sync flush ends byte-aligned on a non-final block, so another raw
+        # deflate stream can follow directly
+        self.blocks = compressor.compress(head) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.checksum = zlib.adler32(head)
+
+    def finish(self, tail: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        body = compressor.compress(tail) + compressor.flush()
+        return _ZLIB_HEADER + self.blocks + body + zlib.adler32(tail, self.checksum).to_bytes(4, "big")
+
+
+def pack(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+# Decode a client frame: text is JSON, binary is MessagePack
+def decode(frame: Union[str, bytes]) -> Any:
+    if isinstance(frame, bytes):
+        if msgpack is None:
+            raise ValueError("Binary frame received but msgpack is not installed")
+        return unpack(frame)
+    return json.loads(frame)
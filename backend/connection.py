@@ -0,0 +1,165 @@
+from typing import Callable, Deque, Optional, Tuple, Union
+from collections import deque
+from fastapi import WebSocket
+from . import metrics
+import asyncio
+
+# Max frames waiting on a single socket before it is treated as a slow consumer
+SEND_QUEUE_LIMIT = 32
+# Seconds a single send may take before the socket is considered dead
+SEND_TIMEOUT = 5.0
+# Seconds to wait for the queue to drain when closing gracefully
+CLOSE_DRAIN_TIMEOUT = 1.0
+
+Frame = Union[str, bytes]
+
+# Frame kinds: a full snapshot supersedes any queued snapshot or patch,
+# control frames (e.g. session_reset) are never dropped
+FRAME_CONTROL = 0
+FRAME_PATCH = 1
+FRAME_SNAPSHOT = 2
+
+
+# Wraps a WebSocket with its own bounded outbound queue and writer task,
+# so a slow or half-dead client never holds up sends to the rest of the room.
+class ClientConnection:
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        on_dead: Optional[Callable[["ClientConnection"], None]] = None,
+        queue_limit: int = SEND_QUEUE_LIMIT,
+        send_timeout: float = SEND_TIMEOUT,
+        delta: bool = False,
+        encoding: str = "json",
+        summary: bool = False,
+        compression: Optional[str] = None,
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue_limit = queue_limit
+        self.send_timeout = send_timeout
+        self.closed = False
+        # Opt-in delta mode and the last sequenceId queued to this client
+        self.delta = delta
+        self.sequence_id: Optional[int] = None
+        # Negotiated wire encoding ("json" or "msgpack"), and "deflate" if
+        # large frames are to be compressed (see codec.py)
+        self.encoding = encoding
+        self.compression = compression
+        # Summary backlog projection: work items without details, plus the
+        # active item in full; details are fetched with get_work_items
+        self.summary = summary
+        # Heartbeat state (see heartbeat.py): any inbound frame sets seen
+        self.seen = True
+        self.missed = 0
+        self.idle = False
+        self._on_dead = on_dead
+        # (frame, kind)
+        self._queue: Deque[Tuple[Frame, int]] = deque()
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    # Queue a frame without waiting for the network. Snapshots coalesce: a
+    # newer one drops any still-pending snapshot or patch. Returns False if
+    # the frame was not queued - for a patch the caller should fall back to a
+    # full snapshot, otherwise the connection was closed or dropped as too slow.
+    def send(self, frame: Frame, kind: int = FRAME_CONTROL) -> bool:
+        if self.closed:
+            return False
+
+        if kind == FRAME_SNAPSHOT and self._queue:
+            self._queue = deque(item for item in self._queue if item[1] == FRAME_CONTROL)
+
+        if len(self._queue) >= self.queue_limit:
+            if kind == FRAME_PATCH:
+                return False
+            # Client is not keeping up even after coalescing - drop it
+            self._fail("slow_consumer")
+            return False
+
+        self._queue.append((frame, kind))
+        self._drained.clear()
+        self._wakeup.set()
+        return True
+
+    # Close the socket, optionally letting queued frames flush first
+    async def close(self, code: int = 1000, drain: bool = True):
+        if drain and not self.closed:
+            try:
+                await asyncio.wait_for(self._drained.wait(), CLOSE_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        self.abort()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    # Stop the writer immediately and discard anything still queued
+    def abort(self):
+        self.closed = True
+        self._queue.clear()
+        self._drained.set()
+        if self._writer is not None and not self._writer.done():
+            if self._writer is not asyncio.current_task():
+                self._writer.cancel()
+
+    # Drop a socket found dead by other means, e.g. unanswered heartbeats
+    def drop(self, reason: str):
+        self._fail(reason)
+
+    def _fail(self, reason: str):
+        if self.closed:
+            return
+        metrics.send_failures_total.inc(reason)
+        self.abort()
+        if self._on_dead:
+            self._on_dead(self)
+        # Best-effort close so the receive loop of the endpoint unwinds too
+        asyncio.create_task(self._close_quietly())
+
+    async def _close_quietly(self):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1011), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _send(self, frame: Frame):
+        if isinstance(frame, bytes):
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
+
+    async def _run(self):
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._drained.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                frame, _ = self._queue.popleft()
+                try:
+                    await asyncio.wait_for(self._send(frame), self.send_timeout)
+                except asyncio.CancelledError:
+                    raise
+                except asyncio.TimeoutError:
+                    self._fail("timeout")
+                    return
+                except Exception:
+                    self._fail("error")
+                    return
+        except asyncio.CancelledError:
+            pass
@@ -1,45 +1,154 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import WebSocket
-from .models import Session, SessionSnapshot, User, Participant, ParticipantRole, ParticipantStatus, SessionPhase, SessionSettings, Vote, JobRole, WorkItem, VoteValue
-from datetime import datetime
+from .models import User, ParticipantRole, ParticipantStatus, SessionPhase, JobRole, VoteValue
+from .state import SessionState, ParticipantState, WorkItemState, SettingsState, dumps
+from .connection import ClientConnection, FRAME_PATCH, FRAME_SNAPSHOT
+from .snapshots import SnapshotCache, BroadcastPayload
+from .scheduler import BroadcastScheduler
+from .store import SessionStore, create_store
+from .lifecycle import SessionLifecycle
+from .actors import SessionActors
+from .archive import RoundArchive, create_archive, round_record
+from .ratelimit import SessionRateLimits
+from .audience import Audience
+from . import codec, metrics
 import asyncio
+import os
 import random
+import time
 import uuid
 
+# Presence changes (connect/disconnect of a known participant) reach the
+# rest of the room at most this late, so a flapping client costs one
+# broadcast per window rather than two per reconnect
+PRESENCE_DELAY = float(os.environ.get("PLANPOKER_PRESENCE_DELAY_MS", "500")) / 1000
+# Most work items returned by one get_work_items request
+MAX_WORK_ITEMS_PAGE = 200
+# With autoReveal on, how long a complete round waits before it is revealed
+# (a last-second change of mind); 0 reveals as soon as the last vote is in
+AUTO_REVEAL_GRACE = float(os.environ.get("PLANPOKER_AUTO_REVEAL_GRACE_MS", "0")) / 1000
+
 class ConnectionManager:
-    def __init__(self):
-        # Map sessionId -> List[WebSocket]
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-        # In-memory session store: sessionId -> Session
-        self.sessions: Dict[str, Session] = {}
+    def __init__(self, store: Optional[SessionStore] = None, archive: Optional[RoundArchive] = None):
+        # Map sessionId -> List[ClientConnection]
+        self.active_connections: Dict[str, List[ClientConnection]] = {}
+        # Session store: sessionId -> Session (in-memory unless configured otherwise)
+        self.sessions: SessionStore = store if store is not None else SessionStore()
+        # Raw votes of finished rounds, appended before they are cleared
+        self.archive: RoundArchive = archive if archive is not None else RoundArchive()
+        # Encoded snapshots reused until the session version changes
+        self.snapshot_cache = SnapshotCache()
+        # Coalesces bursts of high-frequency events into one broadcast
+        self.scheduler = BroadcastScheduler(self.broadcast_snapshot)
+        # Evicts idle sessions by TTL and memory budget
+        self.lifecycle = SessionLifecycle(self)
+        # One inbox + task per session; owner-side mutations run through it
+        self.actors = SessionActors()
+        # Inbound event budget per session, shared by its sockets here
+        self.rate_limits = SessionRateLimits()
+        # Cluster mode: relays broadcasts and resets to sockets held by other
+        # workers (see cluster.ClusterRouter); None when running standalone
+        self.relay = None
+        # The ClusterRouter routing this worker's sessions, if any; evicted
+        # and reset sessions release their claims and subscriptions with it
+        self.router = None
+        # sessionId -> last broadcast received from the owning worker
+        self.remote_payloads: Dict[str, BroadcastPayload] = {}
+        # Read-only subscribers (not participants), fed at a capped rate
+        self.audience = Audience()
+        # sessionId -> auto-reveal waiting out its grace period
+        self._auto_reveals: Dict[str, asyncio.TimerHandle] = {}
+
+    async def connect(
+        self, websocket: WebSocket, session_id: str, user: User, delta: bool = False,
+        encoding: str = "json", resume_from: Optional[int] = None, summary: bool = False,
+        compression: Optional[str] = None
+    ):
+        connection = await self.attach(websocket, session_id, user, delta, encoding, summary, compression)
+        await self.join(session_id, user)
+        self.resume(session_id, connection, resume_from)
 
-    async def connect(self, websocket: WebSocket, session_id: str, user: User):
+    # Register a socket on this worker. The session itself may be owned by
+    # another worker in cluster mode.
+    async def attach(
+        self, websocket: WebSocket, session_id: str, user: User,
+        delta: bool = False, encoding: str = "json", summary: bool = False,
+        compression: Optional[str] = None
+    ) -> ClientConnection:
         await websocket.accept()
+
+        connection = ClientConnection(
+            websocket,
+            user.id,
+            on_dead=lambda conn: self._remove_connection(session_id, conn),
+            delta=delta,
+            encoding=encoding,
+            summary=summary,
+            compression=compression
+        )
+        connection.start()
+        metrics.connects_total.inc()
         
         if session_id not in self.active_connections:
             self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+        self.active_connections[session_id].append(connection)
+        return connection
 
-        # Initialize session if not exists
-        if session_id not in self.sessions:
+    # Owner side of connect: bring the user into the session. The joining
+    # socket is brought up to date by resume(); the rest of the room hears
+    # about it in the next presence window.
+    async def join(self, session_id: str, user: User):
+        # Load a persisted session, or initialize it if it does not exist
+        if session_id not in self.sessions and await self.sessions.load(session_id) is None:
             self._create_session(session_id, user)
         
         # Add or update participant
+        session = self.sessions.get(session_id)
+        version = session.version
         self._add_participant(session_id, user)
-        
-        await self.broadcast_snapshot(session_id)
+        if session.version != version:
+            self.schedule_presence(session_id)
 
     def disconnect(self, websocket: WebSocket, session_id: str, user_id: str):
-        if session_id in self.active_connections:
-            if websocket in self.active_connections[session_id]:
-                self.active_connections[session_id].remove(websocket)
-                
-            session = self.sessions.get(session_id)
-            if session:
-                for p in session.participants:
-                    if p.id == user_id:
-                        p.status = ParticipantStatus.DISCONNECTED
-                        break
+        self.detach(websocket, session_id)
+        self.leave(session_id, user_id)
+
+    def detach(self, websocket: WebSocket, session_id: str):
+        connection = self._find_connection(session_id, websocket)
+        if connection:
+            metrics.disconnects_total.inc()
+            connection.abort()
+            self._remove_connection(session_id, connection)
+
+    # Owner side of disconnect
+    def leave(self, session_id: str, user_id: str):
+        session = self.sessions.get(session_id)
+        if session:
+            participant = session.get_participant(user_id)
+            if participant and participant.status != ParticipantStatus.DISCONNECTED:
+                session.set_status(participant, ParticipantStatus.DISCONNECTED)
+                session.touch()
+                self.schedule_presence(session_id)
+                self.check_auto_reveal(session)
+
+    # Owner side of heartbeat presence: one batch of status changes for a
+    # session, applied with one touch and one presence broadcast. A user
+    # who already left is not brought back by a late change.
+    def set_presence(self, session_id: str, changes: List[Tuple[str, ParticipantStatus]]):
+        session = self.sessions.get(session_id)
+        if not session:
+            return
+        changed = False
+        for user_id, status in changes:
+            participant = session.get_participant(user_id)
+            if participant is None or participant.status in (status, ParticipantStatus.DISCONNECTED):
+                continue
+            session.set_status(participant, status)
+            changed = True
+        if changed:
+            session.touch()
+            self.schedule_presence(session_id)
+            self.check_auto_reveal(session)
 
     async def kick_participant(self, session_id: str, user_id: str):
         session = self.sessions.get(session_id)
@@ -47,12 +156,13 @@ class ConnectionManager:
             return
 
         # Remove from participants list
-        session.participants = [p for p in session.participants if p.id != user_id]
+        session.remove_participant(user_id)
         
         # Remove any votes
-        if user_id in session.votes:
-            del session.votes[user_id]
-        
+        session.retract_vote(user_id)
+
+        session.touch()
+        self.check_auto_reveal(session)
         await self.broadcast_snapshot(session_id)
 
     async def add_work_item(self, session_id: str, title: str, description: Optional[str] = None):
@@ -60,18 +170,33 @@ class ConnectionManager:
         if not session:
             return
 
-        new_item = WorkItem(
+        new_item = WorkItemState(
             id=str(uuid.uuid4()),
             title=title,
             description=description,
             agreedEstimate=None
         )
-        session.workItems.append(new_item)
+        session.add_work_item(new_item)
         
         # If no active item, make this one active
         if not session.activeWorkItemId:
             session.activeWorkItemId = new_item.id
 
+        session.touch()
+        await self.broadcast_snapshot(session_id)
+
+    # Bulk import: every item lands in one mutation and one broadcast
+    async def add_work_items(self, session_id: str, items: List[WorkItemState]):
+        session = self.sessions.get(session_id)
+        if not session or not items:
+            return
+
+        for item in items:
+            session.add_work_item(item)
+        if not session.activeWorkItemId:
+            session.activeWorkItemId = items[0].id
+
+        session.touch()
         await self.broadcast_snapshot(session_id)
 
     async def set_active_work_item(self, session_id: str, work_item_id: str):
@@ -80,18 +205,19 @@ class ConnectionManager:
             return
 
         # Verify item exists
-        item = next((i for i in session.workItems if i.id == work_item_id), None)
+        item = session.get_work_item(work_item_id)
         if not item:
             return
 
+        # Reset votes for the new round, keeping the old one in the archive
+        self.archive_round(session, "switched")
         session.activeWorkItemId = work_item_id
-        
-        # Reset votes for the new round
-        session.votes = {}
+        session.clear_votes()
         session.phase = SessionPhase.VOTING
         for p in session.participants:
             p.hasVoted = False
-            
+
+        session.touch()
         await self.broadcast_snapshot(session_id)
 
     async def set_agreed_estimate(self, session_id: str, work_item_id: str, estimate: VoteValue):
@@ -99,75 +225,348 @@ class ConnectionManager:
         if not session:
             return
             
-        item = next((i for i in session.workItems if i.id == work_item_id), None)
+        item = session.get_work_item(work_item_id)
         if item:
-            item.agreedEstimate = estimate
+            session.set_agreed_estimate(item, estimate)
+            session.touch()
             await self.broadcast_snapshot(session_id)
 
     async def reset_session(self, session_id: str):
-        # Notify all clients to kill their local session
-        message = '{"event": "session_reset"}'
-        
-        connections = self.active_connections.get(session_id, [])
-        for connection in connections:
-            try:
-                await connection.send_text(message)
-            except Exception:
-                pass
-                
-        # Wait for messages to be sent before closing
-        await asyncio.sleep(0.1)
-
-        # Close all connections
-        for connection in list(connections):
-             try:
-                 await connection.close()
-             except Exception:
-                 pass
+        if self.relay is not None:
+            await self.relay.publish_reset(session_id)
+
+        await self.close_connections(session_id)
         
         # Clear data
+        self.scheduler.cancel(session_id)
+        self._cancel_auto_reveal(session_id)
         if session_id in self.sessions:
+            self.archive_round(self.sessions[session_id], "reset")
             del self.sessions[session_id]
-            
+        self.snapshot_cache.invalidate(session_id)
+        self.lifecycle.forget(session_id)
+        self.archive.forget(session_id)
+        # Sockets closed above release whatever is left as they disconnect
+        if self.router is not None:
+            await self.router.release(session_id)
+
+    # Queue the round in progress for the archive before its votes are
+    # thrown away; a no-op if nobody voted
+    def archive_round(self, session: SessionState, outcome: str):
+        if session.votes:
+            self.archive.append(round_record(session, outcome))
+
+    # Drop an idle session from memory; the store decides whether it can be
+    # rehydrated on the next connect
+    async def evict_session(self, session_id: str):
+        self._cancel_auto_reveal(session_id)
+        self.lifecycle.forget(session_id)
+        self.snapshot_cache.invalidate(session_id)
+        if not self.active_connections.get(session_id):
+            self.active_connections.pop(session_id, None)
+        await self.sessions.evict(session_id)
+        self.archive.forget(session_id)
+        if self.router is not None:
+            await self.router.release(session_id)
+
+    # Tell this worker's sockets the session is gone and close them
+    async def close_connections(self, session_id: str):
+        # Notify all clients to kill their local session
+        message = '{"event": "session_reset"}'
+        
+        connections = list(self.active_connections.get(session_id, []))
+        for connection in connections:
+            connection.send(message)
+
+        # Close all connections once their queues have flushed the reset notice
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+        self.audience.close(session_id)
+        self.remote_payloads.pop(session_id, None)
+        self.snapshot_cache.invalidate(session_id)
         if session_id in self.active_connections:
             del self.active_connections[session_id]
 
+    # Deferred broadcast for high-frequency events; merged with anything else
+    # arriving in the same flush window
+    def schedule_broadcast(self, session_id: str):
+        self.lifecycle.touch(session_id)
+        self.scheduler.schedule(session_id)
+
+    def schedule_presence(self, session_id: str):
+        self.lifecycle.touch(session_id)
+        self.scheduler.schedule(session_id, PRESENCE_DELAY)
+
+    # Owner side, after anything that can complete (or un-complete) a
+    # round: votes, joins, leaves, presence, kicks, settings. Reads the
+    # round's counters, so it costs the same in any room size. The reveal
+    # rides on the next coalesced broadcast, together with the last vote.
+    # Returns True if the round was revealed.
+    def check_auto_reveal(self, session: SessionState) -> bool:
+        if not (session.settings.autoReveal and session.phase == SessionPhase.VOTING
+                and session.round_progress.complete):
+            self._cancel_auto_reveal(session.id)
+            return False
+        if AUTO_REVEAL_GRACE <= 0:
+            self._auto_reveal(session)
+            return True
+        if session.id not in self._auto_reveals:
+            self._auto_reveals[session.id] = asyncio.get_running_loop().call_later(
+                AUTO_REVEAL_GRACE, lambda: asyncio.create_task(self._auto_reveal_due(session.id))
+            )
+        return False
+
+    def _auto_reveal(self, session: SessionState):
+        self._cancel_auto_reveal(session.id)
+        session.phase = SessionPhase.REVEALING
+        session.touch()
+        metrics.auto_reveals_total.inc()
+        self.schedule_broadcast(session.id)
+
+    # Grace period over: re-check on the session's actor, in order with
+    # the events that arrived meanwhile
+    async def _auto_reveal_due(self, session_id: str):
+        self._auto_reveals.pop(session_id, None)
+
+        async def reveal():
+            session = self.sessions.get(session_id)
+            if (session is not None and session.settings.autoReveal
+                    and session.phase == SessionPhase.VOTING and session.round_progress.complete):
+                self._auto_reveal(session)
+
+        await self.actors.submit(session_id, reveal, block=True)
+
+    def _cancel_auto_reveal(self, session_id: str):
+        handle = self._auto_reveals.pop(session_id, None)
+        if handle is not None:
+            handle.cancel()
+
+    async def update_settings(self, session_id: str, auto_reveal: bool):
+        session = self.sessions.get(session_id)
+        if not session or session.settings.autoReveal == auto_reveal:
+            return
+        session.settings.autoReveal = auto_reveal
+        session.touch()
+        if not self.check_auto_reveal(session):
+            await self.broadcast_snapshot(session_id)
+
     async def broadcast_snapshot(self, session_id: str):
+        # An immediate broadcast also covers any pending coalesced one
+        self.scheduler.cancel(session_id)
+
         session = self.sessions.get(session_id)
         if not session:
             return
 
+        self.lifecycle.touch(session_id)
+        start = time.perf_counter()
         connections = self.active_connections.get(session_id, [])
-        
-        snapshot = SessionSnapshot(
-            session=session,
-            timestamp=datetime.now(),
-            sequenceId=int(datetime.now().timestamp() * 1000)
-        )
-        
-        data = snapshot.model_dump_json()
-        
-        to_remove = []
-        for connection in connections:
-            try:
-                await connection.send_text(data)
-            except Exception:
-                to_remove.append(connection)
-        
-        for conn in to_remove:
-            if conn in connections:
-                connections.remove(conn)
 
-    def get_session(self, session_id: str) -> Optional[Session]:
+        # Each projection is only encoded if someone (or the relay) needs it
+        payload = self._payload(session, self.snapshot_cache, [c for c in connections if not c.summary])
+        summaries = [c for c in connections if c.summary]
+        if summaries or self.relay is not None or self.audience.watching(session_id):
+            payload.summary = self._payload(session, self.snapshot_cache.summary, summaries)
+
+        self._fan_out(connections, payload)
+        self.audience.publish(session_id, payload)
+        metrics.broadcast_seconds.observe(time.perf_counter() - start)
+
+        if self.relay is not None:
+            await self.relay.publish_snapshot(session_id, payload)
+
+    # Snapshot and patch are each serialized at most once per session version
+    def _payload(self, session: SessionState, cache: SnapshotCache, connections: List[ClientConnection]) -> BroadcastPayload:
+        patch = None
+        if self.relay is not None or any(connection.delta for connection in connections):
+            patch = cache.get_patch(session)
+        return BroadcastPayload(session.version, patch, build=lambda: cache.get(session))
+
+    # Cluster mode: a broadcast made by the worker owning the session
+    def deliver(self, session_id: str, payload: BroadcastPayload):
+        self.remote_payloads[session_id] = payload
+        if payload.patch is not None:
+            self.snapshot_cache.record(session_id, payload.patch)
+        if payload.summary is not None and payload.summary.patch is not None:
+            self.snapshot_cache.summary.record(session_id, payload.summary.patch)
+        self._fan_out(self.active_connections.get(session_id, []), payload)
+        self.audience.publish(session_id, payload)
+
+    # What a new audience subscriber starts from: the live session, or what
+    # the owner last relayed; None if neither is known here yet
+    def audience_payload(self, session_id: str) -> Optional[BroadcastPayload]:
+        session = self.sessions.get(session_id)
+        if session is not None:
+            return BroadcastPayload(session.version, build=lambda: self.snapshot_cache.summary.get(session))
+        return self.remote_payloads.get(session_id)
+
+    def _fan_out(self, connections: List[ClientConnection], payload: BroadcastPayload):
+        version = payload.version
+        patches = snapshots = 0
+
+        # Fan out without waiting on the network; each socket's writer task
+        # sends concurrently and drops itself if it cannot keep up
+        for connection in list(connections):
+            # Already holds this version, e.g. a socket that just resumed
+            if connection.sequence_id == version:
+                continue
+            view = payload.projection(connection.summary)
+            patch = view.patch
+            if connection.delta:
+                if (patch is not None and connection.sequence_id == patch.base_version
+                        and connection.send(patch.frame_for(connection.encoding, connection.user_id, connection.compression), FRAME_PATCH)):
+                    connection.sequence_id = version
+                    patches += 1
+                    continue
+
+            # Each encoding (and masked-vote variant) is produced at most once per broadcast
+            connection.send(view.snapshot.frame_for(connection.encoding, connection.user_id, connection.compression), FRAME_SNAPSHOT)
+            connection.sequence_id = version
+            snapshots += 1
+
+        # Recorded once per broadcast rather than per socket
+        metrics.broadcasts_total.inc()
+        metrics.broadcast_recipients.observe(patches + snapshots)
+        if patches:
+            metrics.frames_queued_total.inc("patch", patches)
+        if snapshots:
+            metrics.frames_queued_total.inc("snapshot", snapshots)
+
+    # Full snapshot to a single socket, e.g. a delta client that detected a gap
+    async def send_snapshot(self, session_id: str, websocket: WebSocket):
+        connection = self._find_connection(session_id, websocket)
+        if not connection:
+            return
+
+        session = self.sessions.get(session_id)
+        if session:
+            snapshot = self.snapshot_cache.projection(connection.summary).get(session)
+        elif session_id in self.remote_payloads:
+            snapshot = self.remote_payloads[session_id].projection(connection.summary).snapshot
+        else:
+            return
+
+        connection.send(snapshot.frame_for(connection.encoding, connection.user_id, connection.compression), FRAME_SNAPSHOT)
+        connection.sequence_id = snapshot.version
+
+    # Bring one (re)connecting socket up to date without touching the rest
+    # of the room: nothing if it already holds the current version, the
+    # patches it missed while they are still buffered, else a snapshot.
+    # resume_from is the last sequenceId the client applied, if any.
+    def resume(self, session_id: str, connection: ClientConnection, resume_from: Optional[int] = None):
+        cache = self.snapshot_cache.projection(connection.summary)
+        session = self.sessions.get(session_id)
+        if session is not None:
+            if connection.delta and resume_from is not None:
+                # Extends the buffered chain up to the current version
+                cache.get_patch(session)
+            version = session.version
+            snapshot = lambda: cache.get(session)
+        elif session_id in self.remote_payloads:
+            payload = self.remote_payloads[session_id].projection(connection.summary)
+            version = payload.version
+            snapshot = lambda: payload.snapshot
+        else:
+            # Owned elsewhere and nothing relayed yet; the owner's next
+            # broadcast reaches this socket
+            return
+
+        if resume_from == version:
+            connection.sequence_id = version
+            metrics.resumes_total.inc("current")
+            return
+
+        if connection.delta and resume_from is not None:
+            patches = cache.replay(session_id, resume_from, version)
+            if patches and all(
+                connection.send(patch.frame_for(connection.encoding, connection.user_id, connection.compression), FRAME_PATCH)
+                for patch in patches
+            ):
+                connection.sequence_id = version
+                metrics.resumes_total.inc("replay")
+                metrics.frames_queued_total.inc("patch", len(patches))
+                return
+
+        # A snapshot also replaces any patches queued above
+        encoded = snapshot()
+        connection.send(encoded.frame_for(connection.encoding, connection.user_id, connection.compression), FRAME_SNAPSHOT)
+        connection.sequence_id = encoded.version
+        metrics.resumes_total.inc("snapshot")
+        metrics.frames_queued_total.inc("snapshot")
+
+    # Work item details for one socket of a summary-projection client:
+    # {"ids": [...]} or a page {"offset": n, "limit": m}. Answered with a
+    # "work_items" frame carrying the items in full (including rev) and the
+    # backlog length.
+    def send_work_items(self, session_id: str, websocket: WebSocket, request: Dict[str, Any]):
+        connection = self._find_connection(session_id, websocket)
+        if not connection:
+            return
+
+        session = self.sessions.get(session_id)
+        if session is not None:
+            items = session.workItems
+            by_id = session.get_work_item
+            as_dict = WorkItemState.to_dict
+        elif session_id in self.remote_payloads:
+            # Owned elsewhere: serve from the last full snapshot relayed here
+            items = self.remote_payloads[session_id].snapshot.message["session"]["workItems"]
+            index = {item["id"]: item for item in items}
+            by_id = index.get
+            as_dict = dict
+        else:
+            return
+
+        response: Dict[str, Any] = {"type": "work_items", "total": len(items)}
+        ids = request.get("ids")
+        if isinstance(ids, list):
+            found = [by_id(item_id) for item_id in ids[:MAX_WORK_ITEMS_PAGE] if isinstance(item_id, str)]
+            response["items"] = [as_dict(item) for item in found if item is not None]
+        else:
+            offset = request.get("offset", 0)
+            limit = request.get("limit", MAX_WORK_ITEMS_PAGE)
+            if not isinstance(offset, int) or not isinstance(limit, int) or offset < 0 or limit < 1:
+                return
+            limit = min(limit, MAX_WORK_ITEMS_PAGE)
+            response["offset"] = offset
+            response["items"] = [as_dict(item) for item in items[offset:offset + limit]]
+
+        frame = codec.pack(response) if connection.encoding == codec.MSGPACK else dumps(response)
+        if connection.compression is not None and len(frame) >= codec.COMPRESS_MIN_BYTES:
+            frame = codec.compress(frame)
+        connection.send(frame)
+
+    def _find_connection(self, session_id: str, websocket: WebSocket) -> Optional[ClientConnection]:
+        for connection in self.active_connections.get(session_id, []):
+            if connection.websocket is websocket:
+                return connection
+        return None
+
+    def _remove_connection(self, session_id: str, connection: ClientConnection):
+        connections = self.active_connections.get(session_id)
+        if connections and connection in connections:
+            connections.remove(connection)
+
+    def get_session(self, session_id: str) -> Optional[SessionState]:
         return self.sessions.get(session_id)
 
+    # The session from memory, else loaded back from the store (and tracked
+    # for eviction again); None if it does not exist
+    async def load_session(self, session_id: str) -> Optional[SessionState]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = await self.sessions.load(session_id)
+            if session is not None:
+                self.lifecycle.touch(session_id)
+        return session
+
     def _create_session(self, session_id: str, creator: User):
-        settings = SessionSettings(
+        settings = SettingsState(
             cardDeck=['0', '1', '2', '3', '5', '8', '13', '21', '?', 'coffee'],
             autoReveal=False
         )
         
-        self.sessions[session_id] = Session(
+        self.sessions[session_id] = SessionState(
             id=session_id,
             name=f"Session {session_id}",
             moderatorId=creator.id,
@@ -184,13 +583,18 @@ class ConnectionManager:
         if not session:
             return
 
-        existing = next((p for p in session.participants if p.id == user.id), None)
+        existing = session.get_participant(user.id)
         
         if existing:
-            existing.status = ParticipantStatus.CONNECTED
-            existing.name = user.name
-            existing.avatarUrl = user.avatarUrl
-            existing.jobRole = user.jobRole or JobRole.DEVELOPER # Update role if changed
+            job_role = user.jobRole or JobRole.DEVELOPER # Update role if changed
+            # Only a real change invalidates the cached snapshot
+            if (existing.status != ParticipantStatus.CONNECTED or existing.name != user.name
+                    or existing.avatarUrl != user.avatarUrl or existing.jobRole != job_role):
+                session.set_status(existing, ParticipantStatus.CONNECTED)
+                existing.name = user.name
+                existing.avatarUrl = user.avatarUrl
+                existing.jobRole = job_role
+                session.touch()
         else:
             # First participant becomes Moderator
             if len(session.participants) == 0:
@@ -202,12 +606,13 @@ class ConnectionManager:
                 else:
                     role = ParticipantRole.VOTER
             
-            new_participant = Participant(
-                **user.model_dump(),
+            new_participant = ParticipantState.from_user(
+                user,
                 role=role,
-                status=ParticipantStatus.CONNECTED,
-                hasVoted=False
+                status=ParticipantStatus.CONNECTED
             )
-            session.participants.append(new_participant)
+            session.add_participant(new_participant)
+            session.touch()
+        self.check_auto_reveal(session)
 
-manager = ConnectionManager()
+manager = ConnectionManager(create_store(), create_archive())
@@ -0,0 +1,119 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .connection import ClientConnection
+from .models import ParticipantStatus
+from .timerwheel import TimerWheel
+import asyncio
+import os
+import random
+
+# Server-driven liveness. Every socket is pinged once per interval; any
+# frame from the client (its pong or anything else) marks it alive. Checks
+# for every socket on the worker share one timer wheel driven by one task.
+#
+# A socket that misses a ping is reported IDLE, one that answers again
+# CONNECTED, and one that misses DEAD_AFTER pings in a row is dropped and
+# reported DISCONNECTED - so ghost sockets stop receiving broadcasts even
+# if the server never sees them close.
+
+PING_INTERVAL = float(os.environ.get("PLANPOKER_PING_INTERVAL_S", "15"))
+# Consecutive unanswered pings before a socket counts as idle / dead
+IDLE_AFTER = 1
+DEAD_AFTER = int(os.environ.get("PLANPOKER_PING_MISSES", "3"))
+# Wheel resolution; pings are sent at most this late
+TICK = 0.1
+
+PING = '{"type":"ping"}'
+
+Presence = List[Tuple[str, ParticipantStatus]]
+
+
+class Heartbeat:
+    def __init__(
+        self, manager, report: Callable[[str, Presence], Awaitable[None]],
+        interval: float = PING_INTERVAL, tick: float = TICK
+    ):
+        self.manager = manager
+        # Applies one session's batch of status changes (routed to its owner)
+        self.report = report
+        self.interval = interval
+        self.wheel = TimerWheel(tick)
+        self._task: Optional[asyncio.Task] = None
+        self.pings = 0
+        self.idle = 0
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.wheel)
+
+    # Start checking a socket. First pings are spread over an interval so a
+    # mass reconnect does not ping in lockstep. Closed sockets are forgotten
+    # the next time their timer fires, so nothing needs to unwatch them.
+    def watch(self, session_id: str, connection: ClientConnection):
+        self.wheel.schedule(random.uniform(0, self.interval), (session_id, connection))
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            try:
+                await self.beat()
+            except Exception as e:
+                print(f"Heartbeat failed: {e}")
+
+    # One tick: check the sockets that are due, then report each session's
+    # status changes as a single batch
+    async def beat(self, now: Optional[float] = None):
+        changes: Dict[str, Presence] = {}
+        for session_id, connection in self.wheel.advance(now):
+            status = self._check(session_id, connection)
+            if status is not None:
+                changes.setdefault(session_id, []).append((connection.user_id, status))
+        if changes:
+            await asyncio.gather(*(self.report(session_id, batch) for session_id, batch in changes.items()))
+
+    def _check(self, session_id: str, connection: ClientConnection) -> Optional[ParticipantStatus]:
+        if connection.closed:
+            return None
+
+        status = None
+        if connection.seen:
+            connection.missed = 0
+            if connection.idle:
+                connection.idle = False
+                status = ParticipantStatus.CONNECTED
+        else:
+            connection.missed += 1
+            if connection.missed >= DEAD_AFTER:
+                self.dead += 1
+                connection.drop("heartbeat")
+                return None if self._other_socket_alive(session_id, connection) else ParticipantStatus.DISCONNECTED
+            if connection.missed >= IDLE_AFTER and not connection.idle:
+                connection.idle = True
+                self.idle += 1
+                if not self._other_socket_alive(session_id, connection):
+                    status = ParticipantStatus.IDLE
+
+        connection.seen = False
+        connection.send(PING)
+        self.pings += 1
+        self.wheel.schedule(self.interval, (session_id, connection))
+        return status
+
+    # Another tab of the same user still answering keeps them present
+    def _other_socket_alive(self, session_id: str, connection: ClientConnection) -> bool:
+        return any(
+            other is not connection and other.user_id == connection.user_id
+            and not other.closed and not other.idle
+            for other in self.manager.active_connections.get(session_id, ())
+        )
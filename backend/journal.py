@@ -0,0 +1,197 @@
+from typing import Any, Awaitable, Callable, List, Optional, Set
+from .models import User
+from .state import SessionState, dumps, now_ms
+import asyncio
+import functools
+import json
+import os
+import time
+
+# Optional event journal for offline replay (backend/benchmarks/replay.py).
+# With PLANPOKER_JOURNAL_DIR set, every worker appends to its own file
+# (journal-<pid>-<start>.ndjson): a header line, then one JSON array per
+# entry, each starting with microseconds since the header's startedAt:
+#
+#   [t, "s", sessionId, session]                        state when first seen
+#   [t, "c", sessionId, user, {delta, encoding, summary, compression}]  socket connected
+#   [t, "d", sessionId, userId]                         socket closed
+#   [t, "e", sessionId, userId, event, payload(, ids)]  handled client event
+#   [t, "q", sessionId, userId, event, payload]         connection-scoped request
+#
+# Client events are recorded by the session owner as they are handled, in
+# the order they were applied; add_work_item(s) entries carry the ids that
+# were generated, so replay can map later references onto its own ids.
+# Connects, disconnects and requests are recorded by the worker holding
+# the socket. Recording only appends to a list; entries are serialized and
+# written in batches on a worker thread. Payloads are referenced, not
+# copied: handle_event never mutates them.
+
+# How often recorded entries are written out
+FLUSH_INTERVAL = float(os.environ.get("PLANPOKER_JOURNAL_FLUSH_MS", "1000")) / 1000
+# Entries that trigger a write before the interval is up
+BATCH_SIZE = 1024
+# Entries held while the writer catches up; beyond that they are dropped
+MAX_PENDING = 100_000
+
+SEED = "s"
+CONNECT = "c"
+DISCONNECT = "d"
+EVENT = "e"
+REQUEST = "q"
+
+# Events whose entries carry the work item ids they created
+CREATES_WORK_ITEMS = frozenset({"add_work_item", "add_work_items"})
+
+Handler = Callable[[str, str, str, dict], Awaitable[None]]
+
+
+class EventJournal:
+    def __init__(self, directory: str, flush_interval: float = FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.path: Optional[str] = None
+        self.started_at = now_ms()
+        self._origin = time.monotonic_ns() // 1000
+        self._file = None
+        self._pending: List[List[Any]] = []
+        # Sessions whose state has been written; later entries build on it
+        self._seeded: Set[str] = set()
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def connect(
+        self, session_id: str, user: User, delta: bool, encoding: str, summary: bool,
+        compression: Optional[str] = None, session: Optional[SessionState] = None
+    ):
+        if session is not None:
+            self.seed(session)
+        self._record(CONNECT, session_id, user.model_dump(mode="json"), {
+            "delta": delta, "encoding": encoding, "summary": summary, "compression": compression,
+        })
+
+    def disconnect(self, session_id: str, user_id: str):
+        self._record(DISCONNECT, session_id, user_id)
+
+    def request(self, session_id: str, user_id: str, event: str, payload: Any):
+        self._record(REQUEST, session_id, user_id, event, payload)
+
+    def event(self, session_id: str, user_id: str, event: str, payload: Any, ids: Optional[List[str]] = None):
+        if ids is None:
+            self._record(EVENT, session_id, user_id, event, payload)
+        else:
+            self._record(EVENT, session_id, user_id, event, payload, ids)
+
+    # Full state of a session the journal has not seen yet, so replay starts
+    # from what was live rather than from an empty session
+    def seed(self, session: SessionState):
+        if session.id not in self._seeded:
+            self._seeded.add(session.id)
+            self._record(SEED, session.id, session.to_dict())
+
+    # Wrap the owner's event handler so handled events are recorded
+    def observe(self, handler: Handler, sessions) -> Handler:
+        @functools.wraps(handler)
+        async def recorded(session_id: str, user_id: str, event: str, payload: dict):
+            session = sessions.get(session_id)
+            if session is not None:
+                self.seed(session)
+            count = len(session.workItems) if session is not None else 0
+            ids = None
+            try:
+                await handler(session_id, user_id, event, payload)
+                if session is not None and event in CREATES_WORK_ITEMS:
+                    ids = [item.id for item in session.workItems[count:]]
+            finally:
+                self.event(session_id, user_id, event, payload, ids)
+        return recorded
+
+    def _record(self, kind: str, *fields: Any):
+        if len(self._pending) >= MAX_PENDING:
+            self.dropped += 1
+            return
+        self._pending.append([time.monotonic_ns() // 1000 - self._origin, kind, *fields])
+        self.recorded += 1
+        if len(self._pending) >= BATCH_SIZE:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if self._file is None or not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, batch)
+            return len(batch)
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"journal-{os.getpid()}-{self.started_at}.ndjson")
+        self._file = await asyncio.to_thread(open, self.path, "a")
+        header = {"journal": 1, "startedAt": self.started_at, "pid": os.getpid()}
+        await asyncio.to_thread(self._write_lines, dumps(header) + "\n")
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._file is not None:
+            await self.flush()
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Event journal flush failed: {e}")
+
+    def _write(self, batch: List[List[Any]]):
+        self._write_lines("".join(dumps(entry) + "\n" for entry in batch))
+
+    def _write_lines(self, data: str):
+        self._file.write(data)
+        self._file.flush()
+
+
+# Journal entries of one or more files on a single timeline: each entry's
+# time becomes absolute microseconds since the epoch
+def load(paths: List[str]) -> List[List[Any]]:
+    entries = []
+    for path in paths:
+        with open(path) as f:
+            header = json.loads(f.readline())
+            origin = header["startedAt"] * 1000
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry[0] += origin
+                    entries.append(entry)
+    # Stable: entries of one file keep their order on equal times
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+
+# PLANPOKER_JOURNAL_DIR: directory for event journals; unset (the default)
+# records nothing
+def create_journal(directory: Optional[str] = None) -> Optional[EventJournal]:
+    directory = directory or os.environ.get("PLANPOKER_JOURNAL_DIR")
+    if directory:
+        return EventJournal(directory)
+    return None
@@ -0,0 +1,158 @@
+from typing import Dict, Optional
+from collections import OrderedDict
+from .models import ParticipantStatus
+from .state import SessionState
+import asyncio
+import os
+import time
+
+# Idle sessions (nobody connected) untouched for this long are evicted.
+# The sweeper only runs with a store that keeps evicted sessions
+# (PLANPOKER_SPILL_DIR or SQLite); the in-memory store alone would lose them.
+SESSION_TTL = float(os.environ.get("PLANPOKER_SESSION_TTL_S", "3600"))
+# Budgets enforced by evicting the least recently used idle sessions; 0 = unbounded
+MAX_SESSIONS = int(os.environ.get("PLANPOKER_MAX_SESSIONS", "10000"))
+MAX_BYTES = int(float(os.environ.get("PLANPOKER_SESSION_MEMORY_MB", "0")) * 1024 * 1024)
+# How often the sweeper runs
+SWEEP_INTERVAL = float(os.environ.get("PLANPOKER_EVICT_INTERVAL_S", "30"))
+
+# Rough in-memory footprint of slotted session state, measured with
+# tracemalloc; only used to enforce MAX_BYTES
+SESSION_BYTES = 800
+PARTICIPANT_BYTES = 250
+WORK_ITEM_BYTES = 350
+VOTE_BYTES = 170
+
+
+def estimate_bytes(session: SessionState) -> int:
+    return (
+        SESSION_BYTES
+        + PARTICIPANT_BYTES * len(session.participants)
+        + WORK_ITEM_BYTES * len(session.workItems)
+        + VOTE_BYTES * len(session.votes)
+    )
+
+
+def is_idle(session: SessionState) -> bool:
+    # Participant status covers sockets on other workers too
+    return all(p.status == ParticipantStatus.DISCONNECTED for p in session.participants)
+
+
+# Keeps the set of in-memory sessions bounded. Activity is recorded with an
+# O(1) LRU bump from the broadcast path; a periodic sweep evicts idle
+# sessions past their TTL, then the least recently used idle sessions until
+# the count and memory budgets hold. Eviction goes through the session
+# store, which may spill the session so a reconnect rehydrates it.
+class SessionLifecycle:
+    def __init__(
+        self,
+        manager,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = MAX_SESSIONS,
+        max_bytes: int = MAX_BYTES,
+        interval: float = SWEEP_INTERVAL,
+    ):
+        self.manager = manager
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.interval = interval
+        # sessionId -> last activity (monotonic), least recent first
+        self._lru: "OrderedDict[str, float]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.evicted_ttl = 0
+        self.evicted_budget = 0
+        self.sweeps = 0
+
+    def touch(self, session_id: str):
+        self._lru[session_id] = time.monotonic()
+        self._lru.move_to_end(session_id)
+
+    def forget(self, session_id: str):
+        self._lru.pop(session_id, None)
+
+    async def start(self):
+        if not self.manager.sessions.persistent:
+            print("Session eviction disabled: no spill directory or SQLite store to keep evicted sessions")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Session eviction sweep failed: {e}")
+
+    def _evictable(self, session_id: str) -> bool:
+        session = self.manager.sessions.get(session_id)
+        if session is None:
+            # Already gone (reset or evicted elsewhere)
+            self._lru.pop(session_id, None)
+            return False
+        return (
+            not self.manager.active_connections.get(session_id)
+            and not self.manager.scheduler.pending(session_id)
+            and not self.manager.actors.busy(session_id)
+            and not self.manager.audience.watching(session_id)
+            and is_idle(session)
+        )
+
+    async def sweep(self) -> int:
+        self.sweeps += 1
+        evicted = 0
+        now = time.monotonic()
+
+        # TTL: walk from the least recent entry; live sessions count as active
+        cutoff = now - self.ttl
+        for session_id, last_active in list(self._lru.items()):
+            if last_active > cutoff:
+                break
+            if self._evictable(session_id):
+                await self.manager.evict_session(session_id)
+                self.evicted_ttl += 1
+                evicted += 1
+            elif session_id in self._lru:
+                self._lru[session_id] = now
+                self._lru.move_to_end(session_id)
+
+        # Budgets: least recently used idle sessions first
+        total = self.memory_bytes() if self.max_bytes else 0
+        over_count = self.max_sessions and len(self.manager.sessions) > self.max_sessions
+        if over_count or total > self.max_bytes:
+            for session_id in list(self._lru):
+                count_ok = not self.max_sessions or len(self.manager.sessions) <= self.max_sessions
+                bytes_ok = not self.max_bytes or total <= self.max_bytes
+                if count_ok and bytes_ok:
+                    break
+                if not self._evictable(session_id):
+                    continue
+                if self.max_bytes:
+                    total -= estimate_bytes(self.manager.sessions[session_id])
+                await self.manager.evict_session(session_id)
+                self.evicted_budget += 1
+                evicted += 1
+        return evicted
+
+    def memory_bytes(self) -> int:
+        return sum(estimate_bytes(session) for session in self.manager.sessions.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tracked": len(self._lru),
+            "evictedTtl": self.evicted_ttl,
+            "evictedBudget": self.evicted_budget,
+            "evictions": self.manager.sessions.evictions,
+            "rehydrations": self.manager.sessions.rehydrations,
+        }
@@ -1,11 +1,46 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from .connection_manager import manager
-from .models import User, ClientEvent, Vote, SessionPhase, JobRole
-from datetime import datetime
-import json
+from .cluster import ClusterRouter, create_bus
+from .models import User, ClientEvent, SessionPhase, JobRole
+from .state import VoteState, WorkItemState, is_vote_value, now_ms
+from .actors import InboxFull
+from .audience import AudienceFull
+from .snapshots import UNMASKED_PHASES
+from .journal import create_journal
+from . import archive, backlog_io, codec, metrics, ratelimit
+from contextlib import asynccontextmanager
+from typing import List
+import asyncio
+import functools
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.sessions.start()
+    await manager.archive.start()
+    if journal is not None:
+        await journal.start()
+    await manager.lifecycle.start()
+    await router.start()
+    yield
+    await router.close()
+    await manager.lifecycle.close()
+    await manager.actors.close()
+    # Append rounds still queued for the archive
+    await manager.archive.close()
+    if journal is not None:
+        await journal.close()
+    # Write behind anything still dirty before the process exits
+    await manager.sessions.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# PLANPOKER_JOURNAL_DIR: record connects, events and disconnects for
+# offline replay (python -m backend.benchmarks.replay)
+journal = create_journal()
+# Handled by the endpoint for the requesting socket only
+CONNECTION_REQUESTS = ratelimit.CONNECTION_EVENTS - {"pong"}
 
 # Allow CORS
 app.add_middleware(
@@ -16,6 +51,222 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.get("/stats")
+async def stats():
+    return {
+        "sessions": len(manager.sessions),
+        "connections": sum(len(c) for c in manager.active_connections.values()),
+        "audience": len(manager.audience),
+        "broadcasts": manager.scheduler.stats(),
+        "lifecycle": manager.lifecycle.stats(),
+    }
+
+# Live state is read at scrape time; the hot path only bumps counters
+metrics.registry.gauge(
+    "planpoker_sessions", "Sessions held in memory", lambda: len(manager.sessions))
+metrics.registry.gauge(
+    "planpoker_connections", "Open WebSocket connections on this worker",
+    lambda: sum(len(c) for c in manager.active_connections.values()))
+metrics.registry.gauge(
+    "planpoker_send_queue_frames", "Frames waiting in per-socket send queues",
+    lambda: sum(conn.pending for c in manager.active_connections.values() for conn in c))
+metrics.registry.gauge(
+    "planpoker_broadcasts_coalesced_total", "Broadcasts saved by coalescing",
+    lambda: manager.scheduler.broadcasts_saved, "counter")
+metrics.registry.gauge(
+    "planpoker_snapshot_cache_hits_total", "Snapshot cache hits",
+    lambda: manager.snapshot_cache.hits + manager.snapshot_cache.summary.hits, "counter")
+metrics.registry.gauge(
+    "planpoker_snapshot_cache_misses_total", "Snapshot cache misses",
+    lambda: manager.snapshot_cache.misses + manager.snapshot_cache.summary.misses, "counter")
+
+metrics.registry.gauge(
+    "planpoker_session_evictions_total", "Idle sessions evicted from memory",
+    lambda: manager.sessions.evictions, "counter")
+metrics.registry.gauge(
+    "planpoker_session_rehydrations_total", "Evicted sessions loaded back on reconnect",
+    lambda: manager.sessions.rehydrations, "counter")
+
+metrics.registry.gauge(
+    "planpoker_rounds_archived_total", "Finished rounds appended to the round archive",
+    lambda: manager.archive.appended, "counter")
+metrics.registry.gauge(
+    "planpoker_archive_pending_rounds", "Rounds queued for the next archive write",
+    lambda: manager.archive.pending)
+
+if journal is not None:
+    metrics.registry.gauge(
+        "planpoker_journal_entries_total", "Entries recorded in the event journal",
+        lambda: journal.recorded, "counter")
+    metrics.registry.gauge(
+        "planpoker_journal_dropped_total", "Journal entries dropped while the writer was behind",
+        lambda: journal.dropped, "counter")
+
+metrics.registry.gauge(
+    "planpoker_heartbeat_sockets", "Sockets watched by the heartbeat", lambda: len(router.heartbeat))
+metrics.registry.gauge(
+    "planpoker_heartbeat_pings_total", "Heartbeat pings sent", lambda: router.heartbeat.pings, "counter")
+metrics.registry.gauge(
+    "planpoker_heartbeat_idle_total", "Sockets that missed a heartbeat", lambda: router.heartbeat.idle, "counter")
+metrics.registry.gauge(
+    "planpoker_heartbeat_dead_total", "Sockets dropped after missing heartbeats", lambda: router.heartbeat.dead, "counter")
+
+metrics.registry.gauge(
+    "planpoker_audience_subscribers", "Read-only audience streams open on this worker", lambda: len(manager.audience))
+metrics.registry.gauge(
+    "planpoker_audience_flushes_total", "Rate-capped audience updates encoded (once per session, not per subscriber)",
+    lambda: manager.audience.flushes, "counter")
+metrics.registry.gauge(
+    "planpoker_audience_events_total", "Audience updates handed to subscribers",
+    lambda: manager.audience.events_offered, "counter")
+
+metrics.registry.gauge(
+    "planpoker_session_actors", "Sessions with a running mutation loop", lambda: len(manager.actors))
+metrics.registry.gauge(
+    "planpoker_inbox_events", "Mutations waiting in session inboxes", lambda: manager.actors.pending())
+
+# Estimation report: the current round once revealed, and agreed estimates
+# across the whole backlog. Both are kept up to date incrementally; read
+# from the session's owner (see ClusterRouter.read).
+@app.get("/sessions/{session_id}/report")
+async def session_report(session_id: str):
+    return await read_session(session_id, "report")
+
+def report_view(session) -> dict:
+    revealed = session.phase in UNMASKED_PHASES and session.votes
+    return {
+        "sessionId": session.id,
+        "activeWorkItemId": session.activeWorkItemId,
+        "round": session.round_stats.summary() if revealed else None,
+        "backlog": session.backlog_stats.summary(),
+    }
+
+# Archived rounds of a session with their raw votes, oldest first; vote
+# values of rounds that were never revealed are null.
+# since/until are epoch milliseconds matched against when a round ended.
+@app.get("/sessions/{session_id}/rounds")
+async def session_rounds(
+    session_id: str,
+    since: int = Query(None),
+    until: int = Query(None),
+    limit: int = Query(archive.MAX_QUERY_ROUNDS, ge=1, le=archive.MAX_QUERY_ROUNDS)
+):
+    rounds = await manager.archive.query(session_id, since, until, limit)
+    return {"sessionId": session_id, "rounds": [archive.expand(record) for record in rounds]}
+
+# Bulk import, streamed: the body is parsed as it arrives and applied as one
+# mutation with one broadcast. The owner checks the session and the
+# moderator before reading the body and hands the parsed items straight to
+# the session's actor; another worker's session gets them forwarded as an
+# add_work_items event, checked again when the owner applies it.
+@app.post("/sessions/{session_id}/work-items/import", status_code=202)
+async def import_work_items(
+    request: Request,
+    session_id: str,
+    userId: str = Query(...),
+    format_name: str = Query(None, alias="format") # Defaults from Content-Type
+):
+    owner = await router.route(session_id)
+    try:
+        if owner:
+            session = await manager.load_session(session_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Session not found")
+            requester = session.get_participant(userId)
+            if requester is None or requester.role != "moderator":
+                raise HTTPException(status_code=403, detail="Only the moderator can import work items")
+        try:
+            fmt = backlog_io.negotiate(format_name, request.headers.get("content-type"))
+            items = await backlog_io.parse_stream(request.stream(), fmt)
+        except backlog_io.ImportFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            if owner:
+                await manager.actors.submit(session_id, functools.partial(apply_import, session_id, userId, items))
+            else:
+                await router.dispatch(session_id, userId, "add_work_items", {"items": [item.to_dict() for item in items]})
+        except InboxFull:
+            raise HTTPException(status_code=503, detail="Session is busy, retry later")
+    finally:
+        await router.release(session_id)
+    return {"received": len(items)}
+
+# Owner side of an HTTP import, run by the session's actor. Journaled as the
+# add_work_items event it stands for, as handle_event's are.
+async def apply_import(session_id: str, user_id: str, items: List[WorkItemState]):
+    session = manager.get_session(session_id)
+    if session is None:
+        return
+    if journal is not None:
+        journal.seed(session)
+    count = len(session.workItems)
+    await manager.add_work_items(session_id, items)
+    if journal is not None:
+        journal.event(session_id, user_id, "add_work_items", {"items": [item.to_dict() for item in items]},
+                      [item.id for item in session.workItems[count:]])
+
+# Streamed export of the backlog with agreed estimates, read from the
+# session's owner (see ClusterRouter.read)
+@app.get("/sessions/{session_id}/work-items/export")
+async def export_work_items(session_id: str, format_name: str = Query(backlog_io.JSON, alias="format")):
+    try:
+        fmt = backlog_io.negotiate(format_name)
+    except backlog_io.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = await read_session(session_id, "work_items")
+    chunks = backlog_io.export_chunks([WorkItemState(**item) for item in items], fmt)
+    return StreamingResponse(chunks, media_type=backlog_io.MEDIA_TYPES[fmt], headers={
+        "Content-Disposition": f'attachment; filename="{session_id}-work-items.{fmt}"',
+    })
+
+# A view of a session (READ_VIEWS) wherever it lives, or the HTTP error
+async def read_session(session_id: str, view: str):
+    try:
+        answer = await router.read(session_id, view)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Session owner did not answer, retry later")
+    if answer is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return answer
+
+# Read-only audience (server-sent events): watch a session without joining
+# it. Every event is the masked, summary-backlog snapshot shared by the
+# whole audience, at most once per PLANPOKER_AUDIENCE_INTERVAL_MS.
+@app.get("/sessions/{session_id}/stream")
+async def audience_stream(session_id: str):
+    try:
+        watched = await router.watch(session_id)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Session owner did not answer, retry later")
+    if not watched:
+        raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        subscriber = manager.audience.subscribe(session_id, manager.audience_payload(session_id))
+    except AudienceFull:
+        await router.unwatch(session_id)
+        raise HTTPException(status_code=503, detail="Audience is full, retry later")
+
+    async def events():
+        try:
+            while True:
+                event = await subscriber.next()
+                if event is None:
+                    return
+                yield event
+        finally:
+            manager.audience.unsubscribe(session_id, subscriber)
+            await router.unwatch(session_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Disable response buffering in nginx-style proxies
+        "X-Accel-Buffering": "no",
+    })
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(
     websocket: WebSocket, 
@@ -23,7 +274,12 @@ async def websocket_endpoint(
     userId: str = Query(...),
     name: str = Query(...),
     avatarUrl: str = Query(None),
-    jobRole: str = Query("Developer") # Default if missing
+    jobRole: str = Query("Developer"), # Default if missing
+    delta: bool = Query(False), # Opt-in patch updates instead of full snapshots
+    encoding: str = Query("json"), # "json" text frames or "msgpack" binary frames
+    resumeFrom: int = Query(None), # Last sequenceId applied before reconnecting
+    backlog: str = Query("full"), # "summary": work items without details, plus the active item in full
+    compression: str = Query(None) # "deflate": large frames (snapshots) as shared zlib binary frames
 ):
     # Normalize job role string to Enum
     try:
@@ -33,27 +289,78 @@ async def websocket_endpoint(
 
     user = User(id=userId, name=name, avatarUrl=avatarUrl, jobRole=role_enum)
     
-    await manager.connect(websocket, session_id, user)
+    connection = await router.connect(
+        websocket, session_id, user, delta=delta, encoding=codec.negotiate(encoding),
+        resume_from=resumeFrom, summary=backlog == "summary",
+        compression=codec.negotiate_compression(compression)
+    )
+    if journal is not None:
+        journal.connect(
+            session_id, user, connection.delta, connection.encoding, connection.summary,
+            connection.compression, manager.sessions.get(session_id)
+        )
     
+    guard = ratelimit.InboundGuard(manager.rate_limits.acquire(session_id))
     try:
         while True:
-            data = await websocket.receive_text()
-            try:
-                message = json.loads(data)
-                event = message.get("event")
-                payload = message.get("payload")
-                
-                await handle_event(session_id, user.id, event, payload)
-                
-            except json.JSONDecodeError:
-                print("Failed to decode JSON")
-            except Exception as e:
-                print(f"Error handling event: {e}")
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            # Any frame proves the socket alive to the heartbeat
+            connection.seen = True
+            # Text frames are JSON, binary frames MessagePack
+            data = frame.get("text")
+            if data is None:
+                data = frame.get("bytes") or b""
+
+            # Size, event type and rate are checked before decoding
+            verdict = guard.check(data)
+            if verdict == ratelimit.ACCEPT:
+                try:
+                    message = codec.decode(data)
+                    event = message.get("event")
+                    payload = message.get("payload")
+
+                    # Heartbeat reply; receiving it was the point
+                    if event == "pong":
+                        continue
+                    if event in CONNECTION_REQUESTS and journal is not None:
+                        journal.request(session_id, user.id, event, payload)
+                    # Connection-scoped: resync a delta client that missed a patch
+                    if event == "request_snapshot":
+                        await manager.send_snapshot(session_id, websocket)
+                        continue
+                    # Connection-scoped: work item details / pages for a summary client
+                    if event == "get_work_items":
+                        manager.send_work_items(session_id, websocket, payload if isinstance(payload, dict) else {})
+                        continue
+                    
+                    await router.dispatch(session_id, user.id, event, payload)
+                    
+                except ValueError:
+                    print("Failed to decode message")
+                    verdict = guard.reject("invalid")
+                except InboxFull:
+                    print(f"Dropped {event} for session {session_id}: inbox full")
+                except Exception as e:
+                    print(f"Error handling event: {e}")
+
+            if verdict == ratelimit.CLOSE:
+                print(f"Closing socket of {user.id} in session {session_id}: code {guard.close_code}")
+                try:
+                    await websocket.close(code=guard.close_code)
+                except Exception:
+                    pass
+                raise WebSocketDisconnect(guard.close_code)
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, session_id, user.id)
-        await manager.broadcast_snapshot(session_id)
+        if journal is not None:
+            journal.disconnect(session_id, user.id)
+        await router.disconnect(websocket, session_id, user.id)
+    finally:
+        manager.rate_limits.release(session_id)
 
+@metrics.instrument_event
 async def handle_event(session_id: str, user_id: str, event: str, payload: dict):
     session = manager.get_session(session_id)
     if not session:
@@ -61,7 +368,7 @@ async def handle_event(session_id: str, user_id: str, event: str, payload: dict)
 
     # Check moderator permission helper
     is_moderator = False
-    requester = next((p for p in session.participants if p.id == user_id), None)
+    requester = session.get_participant(user_id)
     if requester and requester.role == "moderator":
         is_moderator = True
 
@@ -69,32 +376,39 @@ async def handle_event(session_id: str, user_id: str, event: str, payload: dict)
 
     if event == "cast_vote":
         value = payload.get("value")
+        if not is_vote_value(value):
+            return
         
-        # Update vote
-        session.votes[user_id] = Vote(
+        # Update vote (and the round's running statistics)
+        session.cast_vote(VoteState(
             userId=user_id,
             value=value,
-            timestamp=datetime.now()
-        )
+            timestamp=now_ms()
+        ))
         
         # Update hasVoted status
-        participant = next((p for p in session.participants if p.id == user_id), None)
-        if participant:
-            participant.hasVoted = True 
-            
-        await manager.broadcast_snapshot(session_id)
+        if requester:
+            requester.hasVoted = True 
+
+        session.touch()
+        # Votes arrive in storms; merge them into one broadcast per window
+        manager.schedule_broadcast(session_id)
+        manager.check_auto_reveal(session)
 
     elif event == "reveal_votes":
         if is_moderator:
             session.phase = SessionPhase.REVEALING
+            session.touch()
             await manager.broadcast_snapshot(session_id)
 
     elif event == "clear_votes":
         if is_moderator:
-            session.votes = {}
+            manager.archive_round(session, "cleared")
+            session.clear_votes()
             session.phase = SessionPhase.VOTING
             for p in session.participants:
                 p.hasVoted = False
+            session.touch()
             await manager.broadcast_snapshot(session_id)
             
     elif event == "reset_session":
@@ -111,9 +425,27 @@ async def handle_event(session_id: str, user_id: str, event: str, payload: dict)
         if is_moderator:
             title = payload.get("title")
             description = payload.get("description")
-            if title:
+            if title and isinstance(title, str) and (description is None or isinstance(description, str)):
                 await manager.add_work_item(session_id, title, description)
                 
+    elif event == "add_work_items":
+        # {"items": [...]} or {"format": "csv" | "json" | "ndjson", "data": "<text>"}
+        if is_moderator:
+            try:
+                if "items" in payload:
+                    if not isinstance(payload["items"], list):
+                        return
+                    items = backlog_io.parse_records(payload["items"])
+                else:
+                    data = payload.get("data")
+                    if not isinstance(data, str):
+                        return
+                    items = backlog_io.parse_text(data, backlog_io.negotiate(payload.get("format") or backlog_io.CSV))
+            except backlog_io.ImportFormatError as e:
+                print(f"Rejected work item import for session {session_id}: {e}")
+                return
+            await manager.add_work_items(session_id, items)
+
     elif event == "set_active_work_item":
         if is_moderator:
             work_item_id = payload.get("workItemId")
@@ -124,12 +456,34 @@ async def handle_event(session_id: str, user_id: str, event: str, payload: dict)
         if is_moderator:
             work_item_id = payload.get("workItemId")
             estimate = payload.get("estimate")
-            if work_item_id is not None:
+            if work_item_id is not None and is_vote_value(estimate):
                 await manager.set_agreed_estimate(session_id, work_item_id, estimate)
         
+    elif event == "update_settings":
+        if is_moderator:
+            auto_reveal = payload.get("autoReveal")
+            if isinstance(auto_reveal, bool):
+                await manager.update_settings(session_id, auto_reveal)
+
     elif event == "join_session":
         pass
 
+# What read_session() can ask of a session's owner, as JSON-mode values.
+# The list is copied, so later mutations do not change a running download.
+READ_VIEWS = {
+    "report": report_view,
+    "work_items": lambda session: [item.to_dict() for item in session.workItems],
+}
+
+# Sends each session's events to the worker that owns it (this one unless
+# PLANPOKER_BUS configures a multi-worker bus)
+router = ClusterRouter(
+    manager, create_bus(),
+    journal.observe(handle_event, manager.sessions) if journal is not None else handle_event,
+    READ_VIEWS
+)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Large frames are compressed once per broadcast (codec.py), not per socket
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=False)
@@ -0,0 +1,197 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left
+import functools
+import os
+import time
+
+# Minimal Prometheus text-format metrics without a client library. Recording
+# is a dict lookup plus an add; everything else (cumulative buckets, gauges,
+# formatting) happens at scrape time. Labels are bounded: each metric has at
+# most one label whose values come from a fixed set, never a session id.
+
+# PLANPOKER_METRICS=0 turns every record call into an early return
+ENABLED = os.environ.get("PLANPOKER_METRICS", "1") != "0"
+
+# Seconds; covers sub-millisecond event handling up to slow fan-outs
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Event types handled by main.handle_event; anything else is counted as "other"
+KNOWN_EVENTS = frozenset({
+    "cast_vote", "reveal_votes", "clear_votes", "reset_session", "kick_participant",
+    "add_work_item", "add_work_items", "set_active_work_item", "set_agreed_estimate", "update_settings",
+    "join_session",
+})
+
+
+def event_label(event) -> str:
+    return event if event in KNOWN_EVENTS else "other"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _labels(label_name: Optional[str], label: str, extra: str = "") -> str:
+    parts = []
+    if label_name:
+        parts.append(f'{label_name}="{label}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_name: Optional[str] = None):
+        self.name = name
+        self.help = help
+        self.label_name = label_name
+        self._values: Dict[str, float] = {}
+
+    def inc(self, label: str = "", amount: float = 1):
+        if not ENABLED:
+            return
+        self._values[label] = self._values.get(label, 0) + amount
+
+    def value(self, label: str = "") -> float:
+        return self._values.get(label, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.label_name, label)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, label_name: Optional[str] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_name = label_name
+        self.buckets = tuple(sorted(buckets))
+        # label -> [per-bucket counts (non-cumulative, last is +Inf), sum]
+        self._series: Dict[str, list] = {}
+
+    def observe(self, value: float, label: str = ""):
+        if not ENABLED:
+            return
+        series = self._series.get(label)
+        if series is None:
+            series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, label: str = "") -> int:
+        series = self._series.get(label)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.label_name, label, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_name, label)} {repr(total)}"
+            yield f"{self.name}_count{_labels(self.label_name, label)} {cumulative}"
+
+
+# Sampled at scrape time, so it costs nothing on the hot path. Also used to
+# expose counters that already live elsewhere (metric_type="counter").
+class Gauge:
+    def __init__(self, name: str, help: str, read: Callable[[], float], metric_type: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.metric_type = metric_type
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+        yield f"{self.name} {_format_value(self.read())}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, help: str, label_name: Optional[str] = None) -> Counter:
+        return self._register(Counter(name, help, label_name))
+
+    def histogram(self, name: str, help: str, label_name: Optional[str] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, label_name, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float], metric_type: str = "gauge") -> Gauge:
+        return self._register(Gauge(name, help, read, metric_type))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+events_total = registry.counter(
+    "planpoker_events_total", "Client events handled, by event type", "event")
+event_seconds = registry.histogram(
+    "planpoker_event_handle_seconds", "Time spent in handle_event, by event type", "event")
+broadcasts_total = registry.counter(
+    "planpoker_broadcasts_total", "Session broadcasts fanned out to local sockets")
+broadcast_seconds = registry.histogram(
+    "planpoker_broadcast_seconds", "Time to serialize and queue one broadcast")
+broadcast_recipients = registry.histogram(
+    "planpoker_broadcast_recipients", "Sockets reached by one broadcast", buckets=(1, 2, 5, 10, 20, 50, 100, 250, 1000))
+frames_queued_total = registry.counter(
+    "planpoker_frames_queued_total", "Frames queued to sockets, by kind", "kind")
+encode_seconds = registry.histogram(
+    "planpoker_encode_seconds", "Time to serialize a snapshot or patch (cache misses only)", "kind")
+send_failures_total = registry.counter(
+    "planpoker_send_failures_total", "Sockets dropped as dead (failed send, heartbeat), by reason", "reason")
+connects_total = registry.counter(
+    "planpoker_connects_total", "WebSocket connections accepted")
+connect_seconds = registry.histogram(
+    "planpoker_connect_seconds", "Time from accept to the joining snapshot being queued")
+disconnects_total = registry.counter(
+    "planpoker_disconnects_total", "WebSocket disconnects handled")
+resumes_total = registry.counter(
+    "planpoker_resumes_total", "Sockets brought up to date on connect, by how (current, replay, snapshot)", "result")
+inbox_rejected_total = registry.counter(
+    "planpoker_inbox_rejected_total", "Events dropped because a session inbox stayed full")
+inbound_dropped_total = registry.counter(
+    "planpoker_inbound_dropped_total", "Client frames dropped before handling, by reason", "reason")
+inbound_closed_total = registry.counter(
+    "planpoker_inbound_closed_total", "Sockets closed by the inbound guards, by reason", "reason")
+auto_reveals_total = registry.counter(
+    "planpoker_auto_reveals_total", "Rounds revealed because every connected voter had voted")
+compression_bytes_total = registry.counter(
+    "planpoker_compression_bytes_total", "Bytes into and out of frame compression (once per shared frame or vote variant, not per socket)", "stage")
+
+
+# Wraps handle_event(session_id, user_id, event, payload) with a per-type
+# counter and latency histogram. A no-op when metrics are disabled.
+def instrument_event(handler):
+    if not ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    async def wrapper(session_id, user_id, event, payload):
+        start = time.perf_counter()
+        try:
+            return await handler(session_id, user_id, event, payload)
+        finally:
+            label = event_label(event)
+            event_seconds.observe(time.perf_counter() - start, label)
+            events_total.inc(label)
+
+    return wrapper
@@ -31,6 +31,7 @@ class SessionPhase(str, Enum):
 VoteValue = Union[float, int, str, None]
 
 # --- Entities ---
+# Wire format and validation only; live state is kept in state.py
 
 class User(BaseModel):
     id: str
@@ -55,6 +56,7 @@ class WorkItem(BaseModel):
     description: Optional[str] = None
     agreedEstimate: VoteValue = None
     linkUrl: Optional[str] = None
+    rev: int = 0 # Bumped on every change; clients cache details by (id, rev)
 
 class SessionSettings(BaseModel):
     cardDeck: List[str]
@@ -70,6 +72,10 @@ class Session(BaseModel):
     phase: SessionPhase = SessionPhase.LOBBY
     votes: Dict[str, Vote] = {}
     settings: SessionSettings
+    # Round statistics (see stats.py); only in snapshots, once votes are revealed
+    stats: Optional[Dict[str, Any]] = None
+    # Who the round is waiting on (stats.RoundProgress); only in snapshots
+    progress: Optional[Dict[str, Any]] = None
 
 class SessionSnapshot(BaseModel):
     session: Session
@@ -0,0 +1,162 @@
+from typing import Dict, List, Optional, Union
+from . import metrics
+import os
+import re
+import time
+
+# Inbound guards run on every client frame before it is decoded: a size
+# cap, a cheap look at the event type, and token buckets per connection and
+# per session. Each check is O(1), so a noisy socket costs the same per frame
+# whether it is accepted or not, and it cannot make the room (or the other
+# rooms on this worker) pay for a broadcast per frame.
+
+# Largest client frame accepted; bigger frames close the socket with 1009.
+# The WebSocket server still buffers the frame first, so also cap it there
+# (uvicorn --ws-max-size). Large imports belong on the HTTP import endpoint.
+MAX_FRAME_BYTES = int(os.environ.get("PLANPOKER_MAX_FRAME_KB", "1024")) * 1024
+# Sustained events per second and burst, per connection
+CONNECTION_RATE = float(os.environ.get("PLANPOKER_CONNECTION_RATE", "20"))
+CONNECTION_BURST = float(os.environ.get("PLANPOKER_CONNECTION_BURST", "40"))
+# Sustained events per second and burst, per session across its sockets on this worker
+SESSION_RATE = float(os.environ.get("PLANPOKER_SESSION_RATE", "200"))
+SESSION_BURST = float(os.environ.get("PLANPOKER_SESSION_BURST", "400"))
+# Frames dropped in a row (over the connection budget or unknown) before
+# the socket is closed with 1008
+CLOSE_AFTER_DROPS = int(os.environ.get("PLANPOKER_CLOSE_AFTER_DROPS", "200"))
+
+# Handled by the endpoint itself rather than handle_event
+CONNECTION_EVENTS = frozenset({"request_snapshot", "get_work_items", "pong"})
+ACCEPTED_EVENTS = metrics.KNOWN_EVENTS | CONNECTION_EVENTS
+
+# Tokens per event; everything else costs 1
+EVENT_COSTS = {
+    "add_work_items": 10,
+    "reset_session": 5,
+    "request_snapshot": 5,
+    "get_work_items": 2,
+}
+
+ACCEPT = 0
+DROP = 1
+CLOSE = 2
+
+CLOSE_TOO_BIG = 1009
+CLOSE_POLICY = 1008
+
+# First key of a JSON object, as written by the web client
+_JSON_EVENT = re.compile(r'\s*\{\s*"event"\s*:\s*"([^"\\]{1,64})"')
+# MessagePack: fixmap, fixstr "event", then a fixstr value
+_MSGPACK_EVENT_KEY = b"\xa5event"
+
+
+# Event type from the start of a frame without decoding the rest; None
+# when the frame does not start with it (it is then fully decoded as usual)
+def peek_event(frame: Union[str, bytes]) -> Optional[str]:
+    if isinstance(frame, str):
+        match = _JSON_EVENT.match(frame)
+        return match.group(1) if match else None
+    if len(frame) > 7 and 0x80 <= frame[0] <= 0x8f and frame[1:7] == _MSGPACK_EVENT_KEY:
+        length = frame[7] - 0xa0
+        if 0 <= length < 32 and len(frame) >= 8 + length:
+            try:
+                return frame[8:8 + length].decode()
+            except UnicodeDecodeError:
+                return None
+    return None
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    # Refill for the time elapsed, then take `cost` tokens if available
+    def take(self, cost: float = 1, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if tokens < cost:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - cost
+        return True
+
+
+# One bucket per session, shared by its sockets on this worker and dropped
+# with the last of them
+class SessionRateLimits:
+    def __init__(self, rate: float = SESSION_RATE, burst: float = SESSION_BURST):
+        self.rate = rate
+        self.burst = burst
+        # sessionId -> [bucket, sockets holding it]
+        self._buckets: Dict[str, List] = {}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, session_id: str) -> TokenBucket:
+        entry = self._buckets.get(session_id)
+        if entry is None:
+            entry = self._buckets[session_id] = [TokenBucket(self.rate, self.burst), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, session_id: str):
+        entry = self._buckets.get(session_id)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._buckets[session_id]
+
+
+# Per-connection verdicts. Over-budget and unknown events are dropped and
+# counted against the socket; a socket that keeps at it is closed. Frames
+# refused by the session bucket are dropped without blaming the sender.
+class InboundGuard:
+    __slots__ = ("bucket", "session_bucket", "violations", "close_code")
+
+    def __init__(
+        self, session_bucket: Optional[TokenBucket] = None,
+        rate: float = CONNECTION_RATE, burst: float = CONNECTION_BURST
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.session_bucket = session_bucket
+        self.violations = 0
+        self.close_code = CLOSE_POLICY
+
+    def check(self, frame: Union[str, bytes]) -> int:
+        if len(frame) > MAX_FRAME_BYTES:
+            self.close_code = CLOSE_TOO_BIG
+            metrics.inbound_closed_total.inc("oversize")
+            return CLOSE
+
+        event = peek_event(frame)
+        if event is not None and event not in ACCEPTED_EVENTS:
+            return self.reject("unknown_event")
+
+        cost = EVENT_COSTS.get(event, 1)
+        now = time.monotonic()
+        if not self.bucket.take(cost, now):
+            return self.reject("connection_rate")
+        if self.session_bucket is not None and not self.session_bucket.take(cost, now):
+            metrics.inbound_dropped_total.inc("session_rate")
+            return DROP
+
+        self.violations = 0
+        return ACCEPT
+
+    # Drop a frame on this socket's account (also used for undecodable frames)
+    def reject(self, reason: str) -> int:
+        metrics.inbound_dropped_total.inc(reason)
+        self.violations += 1
+        if self.violations >= CLOSE_AFTER_DROPS:
+            self.close_code = CLOSE_POLICY
+            metrics.inbound_closed_total.inc("abuse")
+            return CLOSE
+        return DROP
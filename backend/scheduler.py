@@ -0,0 +1,92 @@
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import os
+
+# Quiet period after the last event before a coalesced broadcast goes out
+FLUSH_INTERVAL = float(os.environ.get("PLANPOKER_FLUSH_INTERVAL_MS", "50")) / 1000
+# Upper bound on how long the first event in a window may wait
+MAX_LATENCY = float(os.environ.get("PLANPOKER_FLUSH_MAX_LATENCY_MS", "150")) / 1000
+
+
+class _PendingFlush:
+    __slots__ = ("first_at", "events", "due", "handle")
+
+    def __init__(self, first_at: float):
+        self.first_at = first_at
+        self.events = 0
+        # Kept here rather than read from the handle: uvloop returns a plain
+        # Handle, with no when(), for a deadline already in the past
+        self.due = first_at
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+# Merges bursts of mutations on a session (e.g. a vote storm) into one
+# broadcast per window instead of one per event.
+class BroadcastScheduler:
+    def __init__(
+        self,
+        flush: Callable[[str], Awaitable[None]],
+        interval: float = FLUSH_INTERVAL,
+        max_latency: float = MAX_LATENCY,
+    ):
+        self._flush = flush
+        self.interval = interval
+        self.max_latency = max(max_latency, interval)
+        self._pending: Dict[str, _PendingFlush] = {}
+        # Events merged into a broadcast triggered by an earlier/later event
+        self.events_coalesced = 0
+        # Broadcasts that would have been sent without coalescing but were not
+        self.broadcasts_saved = 0
+        self.flushes = 0
+
+    # Record a mutation; the broadcast is deferred until the window closes.
+    # An explicit delay (e.g. for presence changes) is a fixed deadline that
+    # never postpones a flush already due sooner.
+    def schedule(self, session_id: str, delay: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        pending = self._pending.get(session_id)
+        due = None
+        if pending is None:
+            pending = _PendingFlush(now)
+            self._pending[session_id] = pending
+        else:
+            self.events_coalesced += 1
+            self.broadcasts_saved += 1
+            due = pending.due
+            pending.handle.cancel()
+
+        pending.events += 1
+        if delay is None:
+            # Sliding window, capped so a steady stream still flushes regularly
+            deadline = min(now + self.interval, pending.first_at + self.max_latency)
+        else:
+            deadline = now + delay if due is None else min(now + delay, due)
+        pending.due = deadline
+        pending.handle = loop.call_at(deadline, self._fire, session_id)
+
+    # Drop the pending window because an immediate broadcast covers it
+    def cancel(self, session_id: str):
+        pending = self._pending.pop(session_id, None)
+        if pending is not None:
+            pending.handle.cancel()
+            # Later events in the window were already counted in schedule()
+            self.events_coalesced += 1
+            self.broadcasts_saved += 1
+
+    def pending(self, session_id: str) -> bool:
+        return session_id in self._pending
+
+    def _fire(self, session_id: str):
+        if self._pending.pop(session_id, None) is not None:
+            self.flushes += 1
+            asyncio.create_task(self._flush(session_id))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pendingSessions": len(self._pending),
+            "coalescedFlushes": self.flushes,
+            "eventsCoalesced": self.events_coalesced,
+            "broadcastsSaved": self.broadcasts_saved,
+        }
@@ -0,0 +1,413 @@
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+from collections import deque
+from datetime import datetime
+from .models import SessionPhase, ParticipantRole, VoteValue
+from .state import SessionState, dumps
+from . import codec, metrics
+import json
+import os
+import time
+
+# Session fields holding id-keyed lists / dicts that are patched entry by entry
+KEYED_LISTS = ("participants", "workItems")
+KEYED_DICTS = ("votes",)
+
+# Recent patches kept per session so a reconnecting delta client can catch
+# up on what it missed instead of taking a full snapshot
+REPLAY_BUFFER = int(os.environ.get("PLANPOKER_REPLAY_BUFFER", "32"))
+
+# Vote values are only visible to everyone once revealed
+UNMASKED_PHASES = (SessionPhase.REVEALING, SessionPhase.RESULTS)
+
+
+def masks_votes(session: SessionState) -> bool:
+    return session.phase not in UNMASKED_PHASES and bool(session.votes)
+
+
+# userId -> own vote value for everyone whose vote is masked in the shared
+# frame. Observers get no variant.
+def own_votes(session: SessionState) -> Dict[str, VoteValue]:
+    private = {}
+    for user_id, vote in session.votes.items():
+        participant = session.get_participant(user_id)
+        if participant is None or participant.role != ParticipantRole.OBSERVER:
+            private[user_id] = vote.value
+    return private
+
+
+# Copy of a frame with the recipient's masked vote value filled back in.
+# Masked votes serialize as {"userId":<id>,"value":null,...} in both JSON
+# encoders and MessagePack, so the variant is one find and one splice
+# instead of another serialization. None if the frame has no such entry
+# (e.g. a patch that does not touch this user's vote).
+def splice_own_vote(frame: Union[str, bytes], user_id: str, value: VoteValue) -> Optional[Union[str, bytes]]:
+    if isinstance(frame, bytes):
+        prefix = codec.pack("userId") + codec.pack(user_id) + codec.pack("value")
+        candidates = [(prefix + b"\xc0", prefix + codec.pack(value))]
+    else:
+        candidates = []
+        for ascii_only in (False, True):
+            prefix = '{"userId":' + json.dumps(user_id, ensure_ascii=ascii_only) + ',"value":'
+            candidates.append((prefix + "null", prefix + json.dumps(value, ensure_ascii=ascii_only)))
+    for needle, replacement in candidates:
+        index = frame.find(needle)
+        if index >= 0:
+            return frame[:index] + replacement + frame[index + len(needle):]
+    return None
+
+
+# A snapshot serialized once for a given session version. The MessagePack
+# form is only built if a binary client asks for it, and the compressed form
+# of each encoding only if a compressing client does. While votes are masked
+# `private` holds each voter's own value; frame_for() splices it into a
+# per-user copy of the shared frame, built (and compressed) at most once
+# per user.
+class EncodedSnapshot:
+    __slots__ = ("version", "text", "private", "_data", "_packed", "_pack", "_variants", "_message", "_compressed")
+
+    def __init__(
+        self,
+        version: int,
+        text: str,
+        pack: Optional[Callable[[], bytes]] = None,
+        private: Optional[Dict[str, VoteValue]] = None,
+    ):
+        self.version = version
+        self.text = text
+        self.private = private
+        self._data: Optional[bytes] = None
+        self._packed: Optional[bytes] = None
+        self._pack = pack
+        self._variants: Optional[Dict[Tuple[str, str, Optional[str]], Union[str, bytes]]] = None
+        self._message: Optional[Dict[str, Any]] = None
+        self._compressed: Optional[Dict[str, bytes]] = None
+
+    # Decoded form, for frames relayed from another worker as text only
+    @property
+    def message(self) -> Dict[str, Any]:
+        if self._message is None:
+            self._message = json.loads(self.text)
+        return self._message
+
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = self.text.encode("utf-8")
+        return self._data
+
+    @property
+    def packed(self) -> bytes:
+        if self._packed is None:
+            self._packed = self._pack() if self._pack else codec.pack(self.message)
+        return self._packed
+
+    def frame(self, encoding: str, compression: Optional[str] = None) -> Union[str, bytes]:
+        frame = self.packed if encoding == codec.MSGPACK else self.text
+        if compression is None or len(frame) < codec.COMPRESS_MIN_BYTES:
+            return frame
+        return self._deflated(encoding)[2]
+
+    # The frame as a given user should see it
+    def frame_for(self, encoding: str, user_id: str, compression: Optional[str] = None) -> Union[str, bytes]:
+        if not self.private or user_id not in self.private:
+            return self.frame(encoding, compression)
+
+        if self._variants is None:
+            self._variants = {}
+        key = (encoding, user_id, compression)
+        variant = self._variants.get(key)
+        if variant is None:
+            shared = self.frame(encoding)
+            if compression is not None and len(shared) >= codec.COMPRESS_MIN_BYTES:
+                head, tail, compressed = self._deflated(encoding)
+                spliced = splice_own_vote(tail, user_id, self.private[user_id])
+                variant = compressed if spliced is None else finish_deflate(head, spliced, len(shared))
+            else:
+                variant = splice_own_vote(shared, user_id, self.private[user_id])
+                if variant is None:
+                    variant = shared
+            self._variants[key] = variant
+        return variant
+
+    # (compressed head, raw tail, compressed frame) for one encoding. With
+    # masked votes the frame is split at the first vote entry: the head (the
+    # bulk of the session) is compressed once, and a user's variant only
+    # recompresses the tail with their own vote spliced in.
+    def _deflated(self, encoding: str) -> Tuple[codec.DeflatedHead, Union[str, bytes], bytes]:
+        if self._compressed is None:
+            self._compressed = {}
+        deflated = self._compressed.get(encoding)
+        if deflated is None:
+            frame = self.packed if encoding == codec.MSGPACK else self.text
+            split = first_vote_entry(frame) if self.private else -1
+            if split < 0:
+                split = len(frame)
+            start = time.perf_counter()
+            head = codec.DeflatedHead(_utf8(frame[:split]))
+            metrics.encode_seconds.observe(time.perf_counter() - start, "compress")
+            tail = frame[split:]
+            deflated = self._compressed[encoding] = (head, tail, finish_deflate(head, tail, len(frame)))
+        return deflated
+
+
+def _utf8(frame: Union[str, bytes]) -> bytes:
+    return frame.encode("utf-8") if isinstance(frame, str) else frame
+
+
+# Start of the first vote entry in a frame. Every masked vote, and so every
+# place a user's variant differs from the shared frame, is at or after it
+# (user strings cannot contain the unescaped JSON; in MessagePack an early
+# match only moves the split forward).
+def first_vote_entry(frame: Union[str, bytes]) -> int:
+    if isinstance(frame, bytes):
+        return frame.find(codec.pack("userId"))
+    return frame.find('{"userId":')
+
+
+# A compressed frame: the shared head plus this tail
+def finish_deflate(head: codec.DeflatedHead, tail: Union[str, bytes], size: int) -> bytes:
+    start = time.perf_counter()
+    compressed = head.finish(_utf8(tail))
+    metrics.encode_seconds.observe(time.perf_counter() - start, "compress")
+    metrics.compression_bytes_total.inc("in", size)
+    metrics.compression_bytes_total.inc("out", len(compressed))
+    return compressed
+
+
+# A patch from base_version to version, also serialized once
+class EncodedPatch(EncodedSnapshot):
+    __slots__ = ("base_version",)
+
+    def __init__(
+        self,
+        base_version: int,
+        version: int,
+        text: str,
+        pack: Optional[Callable[[], bytes]] = None,
+        private: Optional[Dict[str, VoteValue]] = None,
+    ):
+        super().__init__(version, text, pack, private)
+        self.base_version = base_version
+
+
+# Everything one broadcast fans out. The full snapshot is built lazily since
+# a room of up-to-date delta clients may never need it. `summary` is the
+# same broadcast in the summary backlog projection, present when a socket
+# asked for it (or always in cluster mode).
+class BroadcastPayload:
+    __slots__ = ("version", "patch", "summary", "_snapshot", "_build")
+
+    def __init__(
+        self,
+        version: int,
+        patch: Optional[EncodedPatch] = None,
+        snapshot: Optional[EncodedSnapshot] = None,
+        build: Optional[Callable[[], EncodedSnapshot]] = None,
+        summary: Optional["BroadcastPayload"] = None,
+    ):
+        self.version = version
+        self.patch = patch
+        self.summary = summary
+        self._snapshot = snapshot
+        self._build = build
+
+    # The payload a socket in the given projection should get
+    def projection(self, summary: bool) -> "BroadcastPayload":
+        return self.summary if summary and self.summary is not None else self
+
+    @property
+    def snapshot(self) -> EncodedSnapshot:
+        if self._snapshot is None:
+            self._snapshot = self._build()
+        return self._snapshot
+
+
+# Op-based diff between two JSON-mode session dicts.
+#   {"op": "set", "path": field, "value": v}            replace a top-level field
+#   {"op": "upsert", "path": coll, "id": id, "value": v} replace or append one entry
+#   {"op": "remove", "path": coll, "id": id}             drop one entry
+def diff_session(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ops: List[Dict[str, Any]] = []
+
+    for key, value in new.items():
+        if key in KEYED_LISTS:
+            ops.extend(_diff_list(key, old.get(key) or [], value))
+        elif key in KEYED_DICTS:
+            ops.extend(_diff_dict(key, old.get(key) or {}, value))
+        elif old.get(key) != value:
+            ops.append({"op": "set", "path": key, "value": value})
+
+    return ops
+
+
+def _diff_list(path: str, old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if not new:
+        return [{"op": "set", "path": path, "value": new}] if old else []
+
+    old_by_id = {item["id"]: item for item in old}
+    new_ids = {item["id"] for item in new}
+
+    # Upserts append unknown ids, so anything beyond remove/append is a full set
+    survivors = [item["id"] for item in old if item["id"] in new_ids]
+    appended = [item["id"] for item in new if item["id"] not in old_by_id]
+    if survivors + appended != [item["id"] for item in new]:
+        return [{"op": "set", "path": path, "value": new}]
+
+    ops: List[Dict[str, Any]] = [
+        {"op": "remove", "path": path, "id": item["id"]}
+        for item in old if item["id"] not in new_ids
+    ]
+    for item in new:
+        if old_by_id.get(item["id"]) != item:
+            ops.append({"op": "upsert", "path": path, "id": item["id"], "value": item})
+    return ops
+
+
+def _diff_dict(path: str, old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not new:
+        return [{"op": "set", "path": path, "value": new}] if old else []
+
+    ops: List[Dict[str, Any]] = [
+        {"op": "remove", "path": path, "id": key}
+        for key in old if key not in new
+    ]
+    for key, value in new.items():
+        if old.get(key) != value:
+            ops.append({"op": "upsert", "path": path, "id": key, "value": value})
+    return ops
+
+
+# Snapshots, patches and the replay buffer per session. The summary
+# projection (work items as WorkItemState.summary() plus the active item in
+# full) has its own cache under `summary`, created on first use.
+class SnapshotCache:
+    def __init__(self, replay_buffer: int = REPLAY_BUFFER, summary: bool = False):
+        # sessionId -> encoded snapshot of the latest version seen
+        self._entries: Dict[str, EncodedSnapshot] = {}
+        # sessionId -> (version, JSON-mode dict) used as the base of the next patch
+        self._bases: Dict[str, Any] = {}
+        # sessionId -> encoded patch ending at the latest version
+        self._patches: Dict[str, EncodedPatch] = {}
+        # sessionId -> (version, JSON-mode dict), shared by patches and MessagePack
+        self._dumps: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        # sessionId -> the last few patches, each based on the one before
+        self._history: Dict[str, Deque[EncodedPatch]] = {}
+        self.replay_buffer = replay_buffer
+        self.summary_view = summary
+        self._summary: Optional["SnapshotCache"] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def summary(self) -> "SnapshotCache":
+        if self._summary is None:
+            self._summary = SnapshotCache(self.replay_buffer, summary=True)
+        return self._summary
+
+    def projection(self, summary: bool) -> "SnapshotCache":
+        return self.summary if summary and not self.summary_view else self
+
+    def get(self, session: SessionState) -> EncodedSnapshot:
+        entry = self._entries.get(session.id)
+        if entry is not None and entry.version == session.version:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        start = time.perf_counter()
+        version = session.version
+        # Text, MessagePack and patches all share one (masked) dump
+        message = {
+            "session": self._dump(session),
+            "timestamp": datetime.now().isoformat(),
+            "sequenceId": version
+        }
+        private = own_votes(session) if masks_votes(session) else None
+        entry = EncodedSnapshot(version, dumps(message), pack=lambda: codec.pack(message), private=private)
+        self._entries[session.id] = entry
+        metrics.encode_seconds.observe(time.perf_counter() - start, "snapshot")
+        return entry
+
+    # JSON-mode dict of the session at its current version as everyone sees
+    # it (votes masked until reveal), computed once. Round statistics are
+    # only included once votes are revealed; null otherwise so a patch
+    # clears them again on the next round.
+    def _dump(self, session: SessionState) -> Dict[str, Any]:
+        version = session.version
+        cached = self._dumps.get(session.id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        dump = session.to_dict(mask_votes=masks_votes(session), summary=self.summary_view)
+        revealed = session.phase in UNMASKED_PHASES and session.votes
+        dump["stats"] = session.round_stats.summary() if revealed else None
+        dump["progress"] = session.round_progress.summary()
+        self._dumps[session.id] = (version, dump)
+        return dump
+
+    # Patch from the previously patched version to the current one. Only
+    # computed when delta clients are present; None until a base exists.
+    def get_patch(self, session: SessionState) -> Optional[EncodedPatch]:
+        patch = self._patches.get(session.id)
+        if patch is not None and patch.version == session.version:
+            return patch
+
+        base = self._bases.get(session.id)
+        if base is not None and base[0] == session.version:
+            return None
+
+        start = time.perf_counter()
+        current = self._dump(session)
+        self._bases[session.id] = (session.version, current)
+        if base is None:
+            return None
+
+        base_version, base_dict = base
+        message = {
+            "type": "patch",
+            "baseSequenceId": base_version,
+            "sequenceId": session.version,
+            "timestamp": datetime.now().isoformat(),
+            "ops": diff_session(base_dict, current)
+        }
+        text = dumps(message)
+        private = own_votes(session) if masks_votes(session) else None
+        patch = EncodedPatch(base_version, session.version, text, pack=lambda: codec.pack(message), private=private)
+        self._patches[session.id] = patch
+        self.record(session.id, patch)
+        metrics.encode_seconds.observe(time.perf_counter() - start, "patch")
+        return patch
+
+    # Append to the replay buffer. Also fed with patches relayed by the
+    # owning worker in cluster mode; a patch that does not continue the
+    # chain starts it over.
+    def record(self, session_id: str, patch: EncodedPatch):
+        if self.replay_buffer <= 0:
+            return
+        history = self._history.get(session_id)
+        if history is None:
+            history = self._history[session_id] = deque(maxlen=self.replay_buffer)
+        elif history and history[-1].version != patch.base_version:
+            if history[-1].version == patch.version:
+                return
+            history.clear()
+        history.append(patch)
+
+    # Patches taking a client from `since` to `version`, oldest first; None
+    # if they are no longer (or were never) buffered
+    def replay(self, session_id: str, since: int, version: int) -> Optional[List[EncodedPatch]]:
+        history = self._history.get(session_id)
+        if not history or history[-1].version != version:
+            return None
+        for index, patch in enumerate(history):
+            if patch.base_version == since:
+                return list(history)[index:]
+        return None
+
+    def invalidate(self, session_id: str):
+        self._entries.pop(session_id, None)
+        self._bases.pop(session_id, None)
+        self._patches.pop(session_id, None)
+        self._dumps.pop(session_id, None)
+        self._history.pop(session_id, None)
+        if self._summary is not None:
+            self._summary.invalidate(session_id)
@@ -0,0 +1,324 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from functools import lru_cache
+from .models import (
+    Session, User, ParticipantRole, ParticipantStatus, JobRole, SessionPhase, VoteValue
+)
+from .stats import RoundStats, RoundProgress, BacklogStats
+import pydantic_core
+import sys
+import time
+
+# Live session state. The Pydantic models in models.py describe the wire
+# format and validate what comes in from clients or storage; what lives in
+# memory and is mutated by handle_event are these slotted classes. Enum
+# fields hold the (singleton) enum members, ids are interned and vote
+# timestamps are integer epoch milliseconds. to_dict()/to_json() are the
+# hand-written encoders producing the same JSON as the Pydantic models.
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+# Votes are re-encoded on every broadcast while their timestamps stay put
+@lru_cache(maxsize=4096)
+def iso_ms(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def to_ms(value: datetime) -> int:
+    # Naive datetimes (older persisted sessions) are local time
+    return int(value.timestamp() * 1000)
+
+
+# Accepts what models.VoteValue accepts
+def is_vote_value(value: Any) -> bool:
+    return value is None or (isinstance(value, (int, float, str)) and not isinstance(value, bool))
+
+
+# Compact JSON via pydantic-core's serializer (already a dependency), several
+# times faster than json.dumps on snapshot-sized dicts
+def dumps(data: Any) -> str:
+    return pydantic_core.to_json(data).decode()
+
+
+class ParticipantState:
+    __slots__ = ("id", "name", "avatarUrl", "jobRole", "role", "status", "hasVoted")
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        avatarUrl: Optional[str],
+        jobRole: JobRole,
+        role: ParticipantRole,
+        status: ParticipantStatus,
+        hasVoted: bool = False,
+    ):
+        self.id = sys.intern(id)
+        self.name = name
+        self.avatarUrl = avatarUrl
+        self.jobRole = jobRole
+        self.role = role
+        self.status = status
+        self.hasVoted = hasVoted
+
+    @classmethod
+    def from_user(cls, user: User, role: ParticipantRole, status: ParticipantStatus) -> "ParticipantState":
+        return cls(user.id, user.name, user.avatarUrl, user.jobRole or JobRole.DEVELOPER, role, status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "avatarUrl": self.avatarUrl,
+            "jobRole": self.jobRole.value,
+            "role": self.role.value,
+            "status": self.status.value,
+            "hasVoted": self.hasVoted,
+        }
+
+
+class VoteState:
+    __slots__ = ("userId", "value", "timestamp")
+
+    def __init__(self, userId: str, value: VoteValue, timestamp: int):
+        self.userId = sys.intern(userId)
+        self.value = value
+        self.timestamp = timestamp
+
+    # masked=True hides the value but keeps who voted and when
+    def to_dict(self, masked: bool = False) -> Dict[str, Any]:
+        return {
+            "userId": self.userId,
+            "value": None if masked else self.value,
+            "timestamp": iso_ms(self.timestamp),
+        }
+
+
+class WorkItemState:
+    __slots__ = ("id", "title", "description", "agreedEstimate", "linkUrl", "rev")
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        description: Optional[str] = None,
+        agreedEstimate: VoteValue = None,
+        linkUrl: Optional[str] = None,
+        rev: int = 0,
+    ):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.agreedEstimate = agreedEstimate
+        self.linkUrl = linkUrl
+        # Bumped on every change, so clients can cache details by (id, rev)
+        self.rev = rev
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "agreedEstimate": self.agreedEstimate,
+            "linkUrl": self.linkUrl,
+            "rev": self.rev,
+        }
+
+    # What a backlog list needs; the rest is fetched on demand
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "agreedEstimate": self.agreedEstimate,
+            "rev": self.rev,
+        }
+
+
+class SettingsState:
+    __slots__ = ("cardDeck", "autoReveal")
+
+    def __init__(self, cardDeck: List[str], autoReveal: bool):
+        self.cardDeck = cardDeck
+        self.autoReveal = autoReveal
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"cardDeck": self.cardDeck, "autoReveal": self.autoReveal}
+
+
+class SessionState:
+    __slots__ = (
+        "id", "name", "moderatorId", "participants", "workItems", "activeWorkItemId",
+        "phase", "votes", "settings", "_version", "_participant_index", "_work_item_index",
+        "round_stats", "round_progress", "backlog_stats",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        moderatorId: str,
+        settings: SettingsState,
+        participants: Optional[List[ParticipantState]] = None,
+        workItems: Optional[List[WorkItemState]] = None,
+        activeWorkItemId: Optional[str] = None,
+        phase: SessionPhase = SessionPhase.LOBBY,
+        votes: Optional[Dict[str, VoteState]] = None,
+    ):
+        self.id = id
+        self.name = name
+        self.moderatorId = moderatorId
+        self.participants = participants if participants is not None else []
+        self.workItems = workItems if workItems is not None else []
+        self.activeWorkItemId = activeWorkItemId
+        self.phase = phase
+        self.votes = votes if votes is not None else {}
+        self.settings = settings
+        # Monotonic mutation counter; bumped by touch() and never serialized
+        # with the session (the stores keep it alongside). It starts from
+        # the creation time in microseconds, so a session recreated under
+        # the same id - after a restart with the in-memory store, or an
+        # eviction without a spill dir - never reuses the versions clients
+        # resume from (sequenceId) of the one before it.
+        self._version = time.time_ns() // 1000
+        # id -> object indexes over the ordered lists above, running
+        # statistics over votes and agreed estimates, and counters of who
+        # has voted. Mutate participants (and their status), workItems and
+        # votes through the helpers below to keep them in sync.
+        self.reindex()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def touch(self):
+        self._version += 1
+
+    # Rebuild indexes and statistics, e.g. after assigning a whole new list
+    def reindex(self):
+        self._participant_index = {p.id: p for p in self.participants}
+        self._work_item_index = {i.id: i for i in self.workItems}
+        self.round_stats = RoundStats()
+        for user_id, vote in self.votes.items():
+            self.round_stats.cast(user_id, vote.value, self._job_role(user_id))
+        self.round_progress = RoundProgress()
+        for p in self.participants:
+            self.round_progress.add(p.role, p.status, p.id in self.votes)
+        self.backlog_stats = BacklogStats()
+        for item in self.workItems:
+            self.backlog_stats.add_item(item.agreedEstimate)
+
+    def _job_role(self, user_id: str) -> JobRole:
+        participant = self._participant_index.get(user_id)
+        return participant.jobRole if participant is not None else JobRole.DEVELOPER
+
+    def get_participant(self, user_id: str) -> Optional[ParticipantState]:
+        return self._participant_index.get(user_id)
+
+    def add_participant(self, participant: ParticipantState):
+        self.participants.append(participant)
+        self._participant_index[participant.id] = participant
+        self.round_progress.add(participant.role, participant.status, participant.id in self.votes)
+
+    def remove_participant(self, user_id: str) -> Optional[ParticipantState]:
+        participant = self._participant_index.pop(user_id, None)
+        if participant is not None:
+            self.participants.remove(participant)
+            self.round_progress.remove(participant.role, participant.status, user_id in self.votes)
+        return participant
+
+    def set_status(self, participant: ParticipantState, status: ParticipantStatus):
+        voted = participant.id in self.votes
+        self.round_progress.remove(participant.role, participant.status, voted)
+        participant.status = status
+        self.round_progress.add(participant.role, status, voted)
+
+    def get_work_item(self, work_item_id: str) -> Optional[WorkItemState]:
+        return self._work_item_index.get(work_item_id)
+
+    def add_work_item(self, item: WorkItemState):
+        self.workItems.append(item)
+        self._work_item_index[item.id] = item
+        self.backlog_stats.add_item(item.agreedEstimate)
+
+    def set_agreed_estimate(self, item: WorkItemState, estimate: VoteValue):
+        self.backlog_stats.change(item.agreedEstimate, estimate)
+        item.agreedEstimate = estimate
+        item.rev += 1
+
+    def cast_vote(self, vote: VoteState):
+        participant = self._participant_index.get(vote.userId)
+        if participant is not None and vote.userId not in self.votes:
+            self.round_progress.vote(participant.role, participant.status)
+        self.votes[vote.userId] = vote
+        self.round_stats.cast(vote.userId, vote.value, self._job_role(vote.userId))
+
+    def retract_vote(self, user_id: str):
+        if self.votes.pop(user_id, None) is not None:
+            self.round_stats.retract(user_id)
+            participant = self._participant_index.get(user_id)
+            if participant is not None:
+                self.round_progress.vote(participant.role, participant.status, -1)
+
+    def clear_votes(self):
+        self.votes = {}
+        self.round_stats.clear()
+        self.round_progress.clear_votes()
+
+    # JSON-mode dict in models.Session shape; mask_votes hides every value.
+    # summary=True lists work items by WorkItemState.summary() and adds the
+    # active item in full as "activeWorkItem".
+    def to_dict(self, mask_votes: bool = False, summary: bool = False) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "moderatorId": self.moderatorId,
+            "participants": [p.to_dict() for p in self.participants],
+            "workItems": [i.summary() if summary else i.to_dict() for i in self.workItems],
+            "activeWorkItemId": self.activeWorkItemId,
+            "phase": self.phase.value,
+            "votes": {user_id: vote.to_dict(mask_votes) for user_id, vote in self.votes.items()},
+            "settings": self.settings.to_dict(),
+        }
+        if summary:
+            active = self.get_work_item(self.activeWorkItemId) if self.activeWorkItemId else None
+            data["activeWorkItem"] = active.to_dict() if active is not None else None
+        return data
+
+    def to_json(self) -> str:
+        return dumps(self.to_dict())
+
+    # Validation boundary: anything read back from storage goes through the
+    # Pydantic model first
+    @classmethod
+    def from_json(cls, data: str) -> "SessionState":
+        return cls.from_model(Session.model_validate_json(data))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionState":
+        return cls.from_model(Session.model_validate(data))
+
+    @classmethod
+    def from_model(cls, session: Session) -> "SessionState":
+        return cls(
+            id=session.id,
+            name=session.name,
+            moderatorId=session.moderatorId,
+            settings=SettingsState(list(session.settings.cardDeck), session.settings.autoReveal),
+            participants=[
+                ParticipantState(p.id, p.name, p.avatarUrl, p.jobRole, p.role, p.status, p.hasVoted)
+                for p in session.participants
+            ],
+            workItems=[
+                WorkItemState(i.id, i.title, i.description, i.agreedEstimate, i.linkUrl, i.rev)
+                for i in session.workItems
+            ],
+            activeWorkItemId=session.activeWorkItemId,
+            phase=session.phase,
+            votes={
+                user_id: VoteState(vote.userId, vote.value, to_ms(vote.timestamp))
+                for user_id, vote in session.votes.items()
+            },
+        )
@@ -0,0 +1,271 @@
+from typing import Any, Dict, List, Optional, Tuple
+from bisect import bisect_left, insort
+from .models import JobRole, ParticipantRole, ParticipantStatus, VoteValue
+import math
+import os
+import re
+
+# Share of numeric votes the most common value needs for consensus
+CONSENSUS_PERCENT = float(os.environ.get("PLANPOKER_CONSENSUS_PERCENT", "70"))
+
+# Estimation statistics kept up to date as votes arrive instead of being
+# recomputed from every vote on each render. Same rules as the web client's
+# utils/estimation.ts: numeric strings count as numbers, "?" / "coffee"
+# only show up in the distribution.
+
+
+# Leading decimal number of a string, as JavaScript's parseFloat reads it
+_PARSE_FLOAT = re.compile(r"[ \t\n\r\f\v]*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+
+
+# Numeric value of a vote, or None for special cards. Strings are read like
+# parseFloat ("5", "5 points" and "0.5" are numbers, "?" is not); infinite
+# values, which JSON cannot carry, are not numbers here.
+def numeric(value: VoteValue) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        match = _PARSE_FLOAT.match(value)
+        if match is None:
+            return None
+        number = float(match.group(1))
+    return number if math.isfinite(number) else None
+
+
+# Math.round(x * 10) / 10: halves round up, not to even as round() does
+def _round_tenth(number: float) -> float:
+    return math.floor(number * 10 + 0.5) / 10
+
+
+# Card as shown on the deck, so 5, 5.0 and "5" are counted together
+def card_label(value: VoteValue) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _plain(number: float):
+    return int(number) if number.is_integer() else number
+
+
+# Running aggregate over a multiset of votes: per-card counts, a sorted
+# list of the numeric values (median and min/max by index) and their sum.
+# Adding or removing a vote is O(log n) search plus one list insert/delete.
+class Aggregate:
+    __slots__ = ("_cards", "_numbers", "_number_counts", "_sum", "_count")
+
+    def __init__(self):
+        self._cards: Dict[str, int] = {}
+        self._numbers: List[float] = []
+        self._number_counts: Dict[float, int] = {}
+        self._sum = 0.0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def total(self) -> float:
+        return self._sum
+
+    # A None vote (cast without a card) counts as a vote but not as a card
+    def add(self, value: VoteValue):
+        self._count += 1
+        if value is None:
+            return
+        label = card_label(value)
+        self._cards[label] = self._cards.get(label, 0) + 1
+        number = numeric(value)
+        if number is not None:
+            insort(self._numbers, number)
+            self._number_counts[number] = self._number_counts.get(number, 0) + 1
+            self._sum += number
+
+    def remove(self, value: VoteValue):
+        if not self._count:
+            return
+        self._count -= 1
+        if value is None:
+            return
+        label = card_label(value)
+        remaining = self._cards[label] - 1
+        if remaining:
+            self._cards[label] = remaining
+        else:
+            del self._cards[label]
+        number = numeric(value)
+        if number is not None:
+            del self._numbers[bisect_left(self._numbers, number)]
+            remaining = self._number_counts[number] - 1
+            if remaining:
+                self._number_counts[number] = remaining
+            else:
+                del self._number_counts[number]
+            # Reset once empty so float error does not carry into the next round
+            self._sum = self._sum - number if self._numbers else 0.0
+
+    def clear(self):
+        self._cards.clear()
+        self._numbers.clear()
+        self._number_counts.clear()
+        self._sum = 0.0
+        self._count = 0
+
+    def median(self) -> Optional[float]:
+        numbers = self._numbers
+        if not numbers:
+            return None
+        mid = len(numbers) // 2
+        if len(numbers) % 2:
+            return numbers[mid]
+        return (numbers[mid - 1] + numbers[mid]) / 2
+
+    # Count of the most common value over all numeric votes; the number of
+    # distinct values is bounded by the deck
+    def consensus(self) -> bool:
+        if not self._numbers:
+            return False
+        return max(self._number_counts.values()) / len(self._numbers) * 100 > CONSENSUS_PERCENT
+
+    def summary(self) -> Dict[str, Any]:
+        numbers = self._numbers
+        low = _plain(numbers[0]) if numbers else None
+        high = _plain(numbers[-1]) if numbers else None
+        median = self.median()
+        return {
+            "votes": self._count,
+            "numericVotes": len(numbers),
+            "average": _round_tenth(self._sum / len(numbers)) if numbers else None,
+            "median": _plain(median) if median is not None else None,
+            "min": low,
+            "max": high,
+            "consensus": self.consensus(),
+            "hasOutliers": len(numbers) >= 2 and low != high,
+            "distribution": dict(self._cards),
+        }
+
+
+# Statistics for the round in progress, overall and per job role. Kept in
+# step with SessionState.votes by the session's vote helpers.
+class RoundStats:
+    __slots__ = ("overall", "by_role", "_cast")
+
+    def __init__(self):
+        self.overall = Aggregate()
+        self.by_role: Dict[JobRole, Aggregate] = {}
+        # userId -> (value, role) as counted, so a changed vote or role is undone exactly
+        self._cast: Dict[str, Tuple[VoteValue, JobRole]] = {}
+
+    def cast(self, user_id: str, value: VoteValue, role: JobRole):
+        self.retract(user_id)
+        self._cast[user_id] = (value, role)
+        self.overall.add(value)
+        aggregate = self.by_role.get(role)
+        if aggregate is None:
+            aggregate = self.by_role[role] = Aggregate()
+        aggregate.add(value)
+
+    def retract(self, user_id: str):
+        previous = self._cast.pop(user_id, None)
+        if previous is None:
+            return
+        value, role = previous
+        self.overall.remove(value)
+        self.by_role[role].remove(value)
+
+    def clear(self):
+        self._cast.clear()
+        self.overall.clear()
+        self.by_role.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        summary = self.overall.summary()
+        summary["byRole"] = {
+            role.value: aggregate.summary() for role, aggregate in self.by_role.items() if len(aggregate)
+        }
+        return summary
+
+
+# Who the round is waiting on, as counters: participants who may vote
+# (everyone but observers), how many of them are connected, and how many of
+# each have voted. SessionState takes a participant out and puts them back
+# whenever their status or vote changes, so every update is O(1) and
+# "has everyone voted" never scans the room.
+class RoundProgress:
+    __slots__ = ("eligible", "connected", "voted", "connected_voted")
+
+    def __init__(self):
+        self.eligible = 0
+        self.connected = 0
+        self.voted = 0
+        self.connected_voted = 0
+
+    def add(self, role: ParticipantRole, status: ParticipantStatus, voted: bool, sign: int = 1):
+        if role == ParticipantRole.OBSERVER:
+            return
+        self.eligible += sign
+        if status == ParticipantStatus.CONNECTED:
+            self.connected += sign
+        if voted:
+            self.vote(role, status, sign)
+
+    def remove(self, role: ParticipantRole, status: ParticipantStatus, voted: bool):
+        self.add(role, status, voted, -1)
+
+    def vote(self, role: ParticipantRole, status: ParticipantStatus, sign: int = 1):
+        if role == ParticipantRole.OBSERVER:
+            return
+        self.voted += sign
+        if status == ParticipantStatus.CONNECTED:
+            self.connected_voted += sign
+
+    def clear_votes(self):
+        self.voted = 0
+        self.connected_voted = 0
+
+    # Everyone connected has voted; idle and disconnected voters are not
+    # waited for
+    @property
+    def complete(self) -> bool:
+        return self.connected > 0 and self.connected_voted == self.connected
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "eligible": self.eligible,
+            "connected": self.connected,
+            "voted": self.voted,
+            "complete": self.complete,
+        }
+
+
+# Agreed estimates across the backlog, for reports. Updated per item as
+# estimates are agreed, so a long retro never rescans every item.
+class BacklogStats:
+    __slots__ = ("estimates", "items")
+
+    def __init__(self):
+        self.estimates = Aggregate()
+        self.items = 0
+
+    def add_item(self, estimate: VoteValue = None):
+        self.items += 1
+        if estimate is not None:
+            self.estimates.add(estimate)
+
+    def change(self, old: VoteValue, new: VoteValue):
+        if old is not None:
+            self.estimates.remove(old)
+        if new is not None:
+            self.estimates.add(new)
+
+    def summary(self) -> Dict[str, Any]:
+        summary = self.estimates.summary()
+        total = self.estimates.total
+        summary["items"] = self.items
+        summary["estimated"] = len(self.estimates)
+        summary["totalPoints"] = _plain(round(total, 2)) if total else 0
+        return summary
@@ -0,0 +1,317 @@
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote
+from .models import ParticipantStatus
+from .state import SessionState
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+# How often dirty sessions are written behind to the backing store
+FLUSH_INTERVAL = float(os.environ.get("PLANPOKER_STORE_FLUSH_MS", "1000")) / 1000
+# Longest the flusher serializes sessions on the loop before yielding
+SLICE_SECONDS = 0.0005
+
+
+# Nobody is connected to a session just brought back into memory
+def _mark_disconnected(session: SessionState):
+    for participant in session.participants:
+        session.set_status(participant, ParticipantStatus.DISCONNECTED)
+
+
+# Live sessions keyed by id. Behaves like the plain dict it replaces; the
+# base class is the in-memory store, subclasses add persistence hooks that
+# must never run on the event hot path.
+#
+# evict() drops an idle session from memory. With a spill directory it is
+# written there first and load() brings it back on the next connect;
+# without one an evicted session is gone.
+class SessionStore:
+    def __init__(self, spill_dir: Optional[str] = None):
+        self._sessions: Dict[str, SessionState] = {}
+        self.spill_dir = spill_dir
+        # Sessions removed from memory whose spill write is still in flight
+        self._evicting: Dict[str, SessionState] = {}
+        self.evictions = 0
+        self.rehydrations = 0
+
+    # Whether an evicted session can be loaded back
+    @property
+    def persistent(self) -> bool:
+        return self.spill_dir is not None
+
+    def get(self, session_id: str, default: Optional[SessionState] = None) -> Optional[SessionState]:
+        return self._sessions.get(session_id, default)
+
+    def __getitem__(self, session_id: str) -> SessionState:
+        return self._sessions[session_id]
+
+    def __setitem__(self, session_id: str, session: SessionState):
+        self._sessions[session_id] = session
+
+    def __delitem__(self, session_id: str):
+        del self._sessions[session_id]
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sessions)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def values(self):
+        return self._sessions.values()
+
+    def items(self):
+        return self._sessions.items()
+
+    # Lazily bring a session into memory on first connect
+    async def load(self, session_id: str) -> Optional[SessionState]:
+        session = self._restore_evicting(session_id)
+        if session is not None or self.spill_dir is None:
+            return session
+
+        data = await asyncio.to_thread(self._read_spill, session_id)
+        # Re-check: another connection may have brought it back while we waited
+        if data is None or session_id in self._sessions:
+            return self._sessions.get(session_id)
+
+        session = SessionState.from_dict(data["session"])
+        session._version = data["version"]
+        _mark_disconnected(session)
+        self._sessions[session_id] = session
+        self.rehydrations += 1
+        return session
+
+    # Remove a session from memory, spilling it first if configured. Memory
+    # is updated before the first await so a concurrent connect either sees
+    # the live object or restores it from _evicting.
+    async def evict(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.evictions += 1
+        if self.spill_dir is None:
+            return True
+
+        data = f'{{"version":{session.version},"session":{session.to_json()}}}'
+        self._evicting[session_id] = session
+        try:
+            await asyncio.to_thread(self._write_spill, session_id, data)
+        finally:
+            if self._evicting.get(session_id) is session:
+                del self._evicting[session_id]
+        return True
+
+    def _restore_evicting(self, session_id: str) -> Optional[SessionState]:
+        session = self._sessions.get(session_id)
+        if session is None and session_id in self._evicting:
+            session = self._sessions[session_id] = self._evicting.pop(session_id)
+        return session
+
+    def _spill_path(self, session_id: str) -> str:
+        return os.path.join(self.spill_dir, quote(session_id, safe="") + ".json")
+
+    def _write_spill(self, session_id: str, data: str):
+        path = self._spill_path(session_id)
+        with open(path + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    # The file is consumed: the session lives in memory again until re-evicted
+    def _read_spill(self, session_id: str) -> Optional[dict]:
+        path = self._spill_path(session_id)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        os.remove(path)
+        return data
+
+    async def start(self):
+        if self.spill_dir is not None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    async def close(self):
+        pass
+
+
+InMemorySessionStore = SessionStore
+
+
+# SQLite-backed store with write-behind: mutations only bump SessionState.version,
+# a background task diffs versions each tick and writes every dirty session
+# in one transaction on a worker thread.
+class SqliteSessionStore(SessionStore):
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.flush_interval = flush_interval
+        # sessionId -> version last written (or loaded)
+        self._persisted: Dict[str, int] = {}
+        self._deleted: Set[str] = set()
+        self._db: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.flushes = 0
+        self.rows_written = 0
+
+    @property
+    def persistent(self) -> bool:
+        return True
+
+    def __setitem__(self, session_id: str, session: SessionState):
+        super().__setitem__(session_id, session)
+        self._deleted.discard(session_id)
+
+    def __delitem__(self, session_id: str):
+        super().__delitem__(session_id)
+        self._persisted.pop(session_id, None)
+        self._deleted.add(session_id)
+
+    async def load(self, session_id: str) -> Optional[SessionState]:
+        session = self._restore_evicting(session_id)
+        if session is not None or self._db is None:
+            return session
+
+        row = await asyncio.to_thread(self._select, session_id)
+        # Re-check: another connection may have created it while we waited.
+        # A row deleted in memory (reset) but not yet flushed is gone.
+        if row is None or session_id in self._sessions or session_id in self._deleted:
+            return self._sessions.get(session_id)
+
+        version, data = row
+        session = SessionState.from_json(data)
+        # Keep sequence ids monotonic across restarts
+        session._version = version
+        _mark_disconnected(session)
+        self[session_id] = session
+        self._persisted[session_id] = version
+        self.rehydrations += 1
+        return session
+
+    # The database already is the spill target: write the row if it is
+    # dirty, then drop the in-memory copy
+    async def evict(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.evictions += 1
+        persisted = self._persisted.pop(session_id, None)
+        if persisted == session.version or self._db is None:
+            return True
+
+        row = (session_id, session.version, session.to_json(), time.time())
+        self._evicting[session_id] = session
+        try:
+            async with self._lock:
+                await asyncio.to_thread(self._write, [row], [])
+        finally:
+            if self._evicting.get(session_id) is session:
+                del self._evicting[session_id]
+        return True
+
+    async def start(self):
+        self._db = await asyncio.to_thread(self._open)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._db is not None:
+            await self.flush()
+            await asyncio.to_thread(self._db.close)
+            self._db = None
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if self._db is None:
+                return 0
+
+            # Serialize on the loop (sessions are not thread-safe), write off
+            # it. Serialization yields every SLICE_SECONDS so a large flush
+            # never holds up events for long.
+            rows: List[Tuple[str, int, str, float]] = []
+            now = time.time()
+            slice_start = time.perf_counter()
+            for session_id, session in list(self._sessions.items()):
+                if time.perf_counter() - slice_start > SLICE_SECONDS:
+                    await asyncio.sleep(0)
+                    slice_start = time.perf_counter()
+                    # Deleted or replaced while we yielded
+                    if self._sessions.get(session_id) is not session:
+                        continue
+                if self._persisted.get(session_id) != session.version:
+                    rows.append((session_id, session.version, session.to_json(), now))
+            # A deleted id that is live again (reset, then reconnect) is
+            # written as the new session, not deleted
+            deleted = [session_id for session_id in self._deleted if session_id not in self._sessions]
+            self._deleted.clear()
+            if not rows and not deleted:
+                return 0
+
+            await asyncio.to_thread(self._write, rows, deleted)
+            for session_id, version, _, _ in rows:
+                # Skip sessions evicted while the write was in flight
+                if session_id in self._sessions:
+                    self._persisted[session_id] = version
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Session store flush failed: {e}")
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        db.commit()
+        return db
+
+    def _select(self, session_id: str) -> Optional[Tuple[int, str]]:
+        return self._db.execute(
+            "SELECT version, data FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+
+    def _write(self, rows: List[Tuple[str, int, str, float]], deleted: List[str]):
+        with self._db:
+            if rows:
+                self._db.executemany(
+                    "INSERT INTO sessions (id, version, data, updated_at) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET"
+                    " version = excluded.version, data = excluded.data, updated_at = excluded.updated_at",
+                    rows
+                )
+            if deleted:
+                self._db.executemany("DELETE FROM sessions WHERE id = ?", [(d,) for d in deleted])
+
+
+# PLANPOKER_STORE: "memory" (default) or "sqlite:///relative.db" / "sqlite:////abs/path.db".
+# PLANPOKER_SPILL_DIR: where the memory store writes evicted sessions.
+def create_store(url: Optional[str] = None) -> SessionStore:
+    url = url or os.environ.get("PLANPOKER_STORE", "memory")
+    if url.startswith("sqlite:///"):
+        return SqliteSessionStore(url[len("sqlite:///"):])
+    return InMemorySessionStore(os.environ.get("PLANPOKER_SPILL_DIR") or None)
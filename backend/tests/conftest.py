@@ -0,0 +1,52 @@
+from backend.models import JobRole, ParticipantRole, ParticipantStatus, SessionPhase
+from backend.state import ParticipantState, SessionState, SettingsState, VoteState, WorkItemState, dumps, now_ms
+from backend import codec
+from datetime import datetime
+import pytest
+
+
+# Session in the voting phase where everyone has voted
+def _build_session(participants: int, work_items: int) -> SessionState:
+    session = SessionState(
+        id="bench",
+        name="Bench",
+        moderatorId="u0",
+        phase=SessionPhase.VOTING,
+        settings=SettingsState(cardDeck=["1", "2", "3", "5", "8"], autoReveal=False),
+    )
+    for i in range(participants):
+        session.add_participant(ParticipantState(
+            id=f"u{i}", name=f"Voter {i}", avatarUrl=None, jobRole=JobRole.DEVELOPER,
+            role=ParticipantRole.MODERATOR if i == 0 else ParticipantRole.VOTER,
+            status=ParticipantStatus.CONNECTED, hasVoted=True,
+        ))
+        session.cast_vote(VoteState(userId=f"u{i}", value=(i % 5) + 1, timestamp=now_ms()))
+    for i in range(work_items):
+        session.add_work_item(WorkItemState(id=f"item-{i}", title=f"Ticket #{i}", description="x" * 80))
+    return session
+
+
+# Snapshot for one recipient dumped from scratch, with every other vote
+# masked: what the shared frames must decode to
+def _naive_frame(session: SessionState, user_id: str, encoding: str):
+    dump = session.to_dict()
+    dump["votes"] = {
+        uid: vote if uid == user_id else {**vote, "value": None}
+        for uid, vote in dump["votes"].items()
+    }
+    dump["stats"] = None
+    dump["progress"] = session.round_progress.summary()
+    message = {"session": dump, "timestamp": datetime.now().isoformat(), "sequenceId": session.version}
+    if encoding == codec.MSGPACK:
+        return codec.pack(message)
+    return dumps(message)
+
+
+@pytest.fixture
+def build_session():
+    return _build_session
+
+
+@pytest.fixture
+def naive_frame():
+    return _naive_frame
@@ -0,0 +1,42 @@
+from backend.actors import InboxFull, SessionActors
+import asyncio
+import pytest
+
+
+def test_a_full_inbox_pushes_back_then_rejects():
+    async def run():
+        actors = SessionActors(limit=2, put_timeout=0.02)
+        release = asyncio.Event()
+        ran = []
+
+        async def job(name):
+            await release.wait()
+            ran.append(name)
+
+        await actors.submit("s1", lambda: job("busy"))
+        await asyncio.sleep(0)  # the actor is now inside "busy"
+        await actors.submit("s1", lambda: job("a"))
+        await actors.submit("s1", lambda: job("b"))
+        assert actors.pending() == 2
+
+        # No room frees up within put_timeout
+        with pytest.raises(InboxFull):
+            await actors.submit("s1", lambda: job("dropped"))
+        assert actors.rejected == 1
+
+        # Other sessions have their own inbox and are not held up
+        other = await actors.submit("s2", lambda: asyncio.sleep(0))
+        await asyncio.wait_for(other, 1.0)
+
+        # A blocking producer waits for room instead of giving up
+        blocked = asyncio.create_task(actors.submit("s1", lambda: job("c"), block=True))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        release.set()
+        await (await blocked)
+        await actors.close()
+        return ran, actors.rejected
+
+    ran, rejected = asyncio.run(run())
+    assert ran == ["busy", "a", "b", "c"]
+    assert rejected == 1
@@ -0,0 +1,54 @@
+from backend.models import User
+from backend.tests.test_cluster import FakeSocket, _router, _settle
+from backend import main
+import asyncio
+
+
+async def _round(manager, router, reveal: bool):
+    await router.dispatch("s1", "v1", "cast_vote", {"value": 5})
+    if reveal:
+        await router.dispatch("s1", "mod", "reveal_votes", {})
+    await router.dispatch("s1", "mod", "clear_votes", {})
+    await _settle(manager, "s1")
+
+
+def _run(monkeypatch, scenario):
+    async def run():
+        manager, router = await _router()
+        monkeypatch.setattr(main, "manager", manager)
+        monkeypatch.setattr(main, "router", router)
+        await router.connect(FakeSocket(), "s1", User(id="mod", name="Moderator"))
+        await router.connect(FakeSocket(), "s1", User(id="v1", name="Voter"))
+        try:
+            return await scenario(manager, router)
+        finally:
+            await manager.actors.close()
+    return asyncio.run(run())
+
+
+def test_rounds_hide_values_of_unrevealed_rounds(monkeypatch):
+    async def scenario(manager, router):
+        await _round(manager, router, reveal=False)
+        await _round(manager, router, reveal=True)
+        return await main.session_rounds("s1", None, None, 10)
+
+    rounds = _run(monkeypatch, scenario)["rounds"]
+    assert [r["revealed"] for r in rounds] == [False, True]
+    assert [(v["userId"], v["value"]) for v in rounds[0]["votes"]] == [("v1", None)]
+    assert [(v["userId"], v["value"]) for v in rounds[1]["votes"]] == [("v1", 5)]
+
+
+def test_memory_archive_forgets_evicted_and_reset_sessions(monkeypatch):
+    async def scenario(manager, router):
+        await _round(manager, router, reveal=True)
+        before = len(await manager.archive.query("s1"))
+        await manager.evict_session("s1")
+        evicted = len(await manager.archive.query("s1"))
+        await router.connect(FakeSocket(), "s1", User(id="mod", name="Moderator"))
+        await router.connect(FakeSocket(), "s1", User(id="v1", name="Voter"))
+        await _round(manager, router, reveal=True)
+        again = len(await manager.archive.query("s1"))
+        await manager.reset_session("s1")
+        return before, evicted, again, len(await manager.archive.query("s1")), len(manager.archive._rounds)
+
+    assert _run(monkeypatch, scenario) == (1, 0, 1, 0, 0)
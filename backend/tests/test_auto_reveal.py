@@ -0,0 +1,88 @@
+from backend.models import SessionPhase, User
+from backend.tests.test_cluster import FakeSocket, _router, _settle
+from backend import connection_manager, main
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def room(monkeypatch):
+    def run(scenario, grace: float = 0.0):
+        monkeypatch.setattr(connection_manager, "AUTO_REVEAL_GRACE", grace)
+
+        async def go():
+            manager, router = await _router()
+            monkeypatch.setattr(main, "manager", manager)
+            for user_id in ("u0", "u1"):
+                await router.connect(FakeSocket(), "s1", User(id=user_id, name=user_id))
+            try:
+                return await scenario(manager, router, manager.sessions["s1"])
+            finally:
+                await manager.actors.close()
+        return asyncio.run(go())
+    return run
+
+
+async def _event(manager, router, user_id: str, event: str, payload: dict):
+    await router.dispatch("s1", user_id, event, payload)
+    await _settle(manager, "s1")
+
+
+async def _vote(manager, router, user_id: str):
+    await _event(manager, router, user_id, "cast_vote", {"value": 3})
+
+
+def test_last_vote_reveals(room):
+    async def scenario(manager, router, session):
+        await _event(manager, router, "u0", "update_settings", {"autoReveal": True})
+        await _vote(manager, router, "u0")
+        before = (session.phase, session.round_progress.summary())
+        await _vote(manager, router, "u1")
+        return before, session.phase
+
+    (phase, progress), after = room(scenario)
+    assert phase == SessionPhase.VOTING
+    assert progress == {"eligible": 2, "connected": 2, "voted": 1, "complete": False}
+    assert after == SessionPhase.REVEALING
+
+
+def test_grace_timer_is_cancelled_by_a_join_and_rearmed_by_a_leave(room):
+    async def scenario(manager, router, session):
+        await _event(manager, router, "u0", "update_settings", {"autoReveal": True})
+        await _vote(manager, router, "u0")
+        await _vote(manager, router, "u1")
+        armed = "s1" in manager._auto_reveals
+        # Someone new arrives during the grace period: not everyone has voted
+        late = FakeSocket()
+        await router.connect(late, "s1", User(id="u2", name="Late"))
+        cancelled = "s1" not in manager._auto_reveals
+        await asyncio.sleep(0.1)
+        still_voting = session.phase
+        # They leave without voting: complete again, revealed after the grace
+        await router.disconnect(late, "s1", "u2")
+        await _settle(manager, "s1")
+        rearmed = "s1" in manager._auto_reveals
+        await asyncio.sleep(0.1)
+        await _settle(manager, "s1")
+        return armed, cancelled, still_voting, rearmed, session.phase
+
+    assert room(scenario, grace=0.05) == (True, True, SessionPhase.VOTING, True, SessionPhase.REVEALING)
+
+
+def test_no_auto_reveal_while_the_setting_is_off(room):
+    async def scenario(manager, router, session):
+        await _vote(manager, router, "u0")
+        await _vote(manager, router, "u1")
+        off = (session.phase, "s1" in manager._auto_reveals)
+        # Turning it off during the grace period cancels the pending reveal
+        await _event(manager, router, "u0", "update_settings", {"autoReveal": True})
+        armed = "s1" in manager._auto_reveals
+        await _event(manager, router, "u0", "update_settings", {"autoReveal": False})
+        await asyncio.sleep(0.1)
+        await _settle(manager, "s1")
+        return off, armed, "s1" in manager._auto_reveals, session.phase
+
+    off, armed, pending, phase = room(scenario, grace=0.05)
+    assert off == (SessionPhase.VOTING, False)
+    assert armed and not pending
+    assert phase == SessionPhase.VOTING
@@ -0,0 +1,196 @@
+from backend.cluster import ClusterRouter, LocalBroker, LocalBus
+from backend.connection_manager import ConnectionManager
+from backend.models import User
+from backend import main
+import asyncio
+import functools
+import json
+
+
+class FakeSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        self.frames.append(data)
+
+    async def send_bytes(self, data):
+        self.frames.append(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def routing_state(router: ClusterRouter) -> dict:
+    return {
+        "owners": len(router.owners),
+        "localUsers": len(router.local_users),
+        "subscriptions": sum(len(s) for s in router.bus.broker.subscribers.values()),
+        "claims": len(router.bus.broker.claims),
+    }
+
+
+EMPTY = {"owners": 0, "localUsers": 0, "subscriptions": 0, "claims": 0}
+
+
+async def _router():
+    manager = ConnectionManager()
+    router = ClusterRouter(manager, LocalBus(), main.handle_event, main.READ_VIEWS)
+    await router.bus.start()
+    return manager, router
+
+
+# Workers sharing one broker, as with the Unix socket broker
+async def _workers(count: int):
+    broker = LocalBroker()
+    workers = []
+    for _ in range(count):
+        manager = ConnectionManager()
+        router = ClusterRouter(manager, LocalBus(broker), main.handle_event, main.READ_VIEWS)
+        await router.start()
+        workers.append((manager, router))
+    return workers
+
+
+async def _settle(manager: ConnectionManager, session_id: str):
+    await (await manager.actors.submit(session_id, functools.partial(asyncio.sleep, 0), block=True))
+
+
+async def _connect_and_leave(manager: ConnectionManager, router: ClusterRouter, session_id: str):
+    socket = FakeSocket()
+    await router.connect(socket, session_id, User(id="u1", name="Voter"))
+    await router.disconnect(socket, session_id, "u1")
+    await _settle(manager, session_id)
+
+
+def test_evicting_sessions_releases_routing_state():
+    async def run():
+        manager, router = await _router()
+        for n in range(20):
+            await _connect_and_leave(manager, router, f"s{n}")
+        before = routing_state(router)
+        for n in range(20):
+            await manager.evict_session(f"s{n}")
+        after = routing_state(router)
+        await manager.actors.close()
+        return before, after, len(manager.sessions)
+
+    before, after, in_memory = asyncio.run(run())
+    assert before["owners"] == 20 and before["claims"] == 20
+    assert after == EMPTY
+    assert in_memory == 0
+
+
+def test_evicted_session_can_be_routed_again():
+    async def run():
+        manager, router = await _router()
+        await _connect_and_leave(manager, router, "s1")
+        await manager.evict_session("s1")
+        socket = FakeSocket()
+        await router.connect(socket, "s1", User(id="u1", name="Voter"))
+        owner = router.is_owner("s1")
+        await manager.actors.close()
+        return owner, "s1" in manager.sessions
+
+    assert asyncio.run(run()) == (True, True)
+
+
+def test_reset_releases_routing_state_once_sockets_are_gone():
+    async def run():
+        manager, router = await _router()
+        socket = FakeSocket()
+        await router.connect(socket, "s1", User(id="u1", name="Voter"))
+        await manager.reset_session("s1")
+        # The endpoint sees its socket closed and disconnects it
+        await router.disconnect(socket, "s1", "u1")
+        state = routing_state(router)
+        await manager.actors.close()
+        return state
+
+    assert asyncio.run(run()) == EMPTY
+
+
+def test_watching_a_missing_session_leaves_nothing_routed():
+    async def run():
+        manager, router = await _router()
+        watched = await router.watch("missing")
+        state = routing_state(router)
+        await manager.actors.close()
+        return watched, state
+
+    assert asyncio.run(run()) == (False, EMPTY)
+
+
+def test_watching_from_another_worker_asks_the_owner():
+    async def run():
+        (owner, owner_router), (other, other_router) = await _workers(2)
+        await owner_router.connect(FakeSocket(), "s1", User(id="u1", name="Voter"))
+        watched = await other_router.watch("s1")
+        # Nobody owns "missing", so the asking worker claims it and finds nothing
+        missing = await other_router.watch("missing")
+        # A session owned elsewhere that no longer exists (e.g. reset while routed)
+        owner_router.owners["gone"] = owner_router.worker_id
+        await owner_router.bus.claim("gone", owner_router.worker_id)
+        await owner_router.bus.subscribe("session:gone:events", lambda data: owner_router._on_event("gone", data))
+        gone = await other_router.watch("gone")
+        state = {"owners": len(other_router.owners), "localUsers": len(other_router.local_users)}
+        for manager, router in ((owner, owner_router), (other, other_router)):
+            await router.close()
+            await manager.actors.close()
+        return watched, missing, gone, state
+
+    watched, missing, gone, state = asyncio.run(run())
+    assert (watched, missing, gone) == (True, False, False)
+    assert state == {"owners": 1, "localUsers": 0}
+
+
+async def _until(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _latest_votes(socket: FakeSocket) -> dict:
+    for frame in reversed(socket.frames):
+        message = json.loads(frame)
+        if "session" in message:
+            return {user_id: vote["value"] for user_id, vote in message["session"]["votes"].items()}
+    return {}
+
+
+def test_two_workers_relay_events_mask_votes_and_reset(monkeypatch):
+    async def run():
+        (owner, owner_router), (other, other_router) = await _workers(2)
+        # Events run on the owner, against its manager
+        monkeypatch.setattr(main, "manager", owner)
+        moderator, first, second = FakeSocket(), FakeSocket(), FakeSocket()
+        await owner_router.connect(moderator, "s1", User(id="u0", name="Moderator"))
+        await other_router.connect(first, "s1", User(id="u1", name="Voter 1"))
+        await other_router.connect(second, "s1", User(id="u2", name="Voter 2"))
+        assert not other_router.is_owner("s1") and "s1" not in other.sessions
+
+        await other_router.dispatch("s1", "u1", "cast_vote", {"value": 5})
+        await other_router.dispatch("s1", "u2", "cast_vote", {"value": 8})
+        await _until(lambda: len(_latest_votes(first)) == 2 and len(_latest_votes(moderator)) == 2)
+        views = [_latest_votes(socket) for socket in (moderator, first, second)]
+
+        await owner.reset_session("s1")
+        await _until(lambda: '{"event": "session_reset"}' in first.frames)
+        reset = ['{"event": "session_reset"}' in socket.frames for socket in (first, second)]
+        for socket, user_id in ((first, "u1"), (second, "u2")):
+            await other_router.disconnect(socket, "s1", user_id)
+        state = routing_state(other_router)
+        for manager, router in ((owner, owner_router), (other, other_router)):
+            await router.close()
+            await manager.actors.close()
+        return views, reset, state, other.active_connections
+
+    views, reset, state, connections = asyncio.run(run())
+    # Votes cast on the other worker reach the owner; each socket sees only its own value
+    assert views == [{"u1": None, "u2": None}, {"u1": 5, "u2": None}, {"u1": None, "u2": 8}]
+    assert reset == [True, True]
+    assert state == EMPTY and not connections.get("s1")
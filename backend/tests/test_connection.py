@@ -0,0 +1,81 @@
+from backend.connection import FRAME_PATCH, FRAME_SNAPSHOT, ClientConnection
+import asyncio
+
+
+# A client that never reads: every send hangs until released
+class StalledSocket:
+    def __init__(self):
+        self.frames = []
+        self.closed_with = None
+        self.release = asyncio.Event()
+
+    async def send_text(self, data):
+        await self.release.wait()
+        self.frames.append(data)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def _connection(**options):
+    socket = StalledSocket()
+    dead = []
+    connection = ClientConnection(socket, "u1", on_dead=dead.append, **options)
+    connection.start()
+    return connection, socket, dead
+
+
+def test_a_slow_consumer_is_dropped_once_its_queue_is_full():
+    async def run():
+        connection, socket, dead = _connection(queue_limit=3)
+        assert connection.send("first")
+        await asyncio.sleep(0)  # the writer is now stuck on "first"
+        assert all(connection.send(f"control {i}") for i in range(3))
+
+        # A patch over the limit is refused; the caller falls back to a snapshot
+        assert not connection.send("patch", FRAME_PATCH)
+        assert not connection.closed
+        # Control frames are never coalesced away, so even a snapshot has
+        # nowhere to go: the client is dropped
+        assert not connection.send("snapshot", FRAME_SNAPSHOT)
+        await asyncio.sleep(0)
+        return connection, socket, dead
+
+    connection, socket, dead = asyncio.run(run())
+    assert connection.closed and connection.pending == 0
+    assert dead == [connection]
+    assert socket.closed_with == 1011
+    assert not connection.send("late")
+
+
+def test_queued_snapshots_coalesce_instead_of_filling_the_queue():
+    async def run():
+        connection, socket, dead = _connection(queue_limit=3)
+        connection.send("first")
+        await asyncio.sleep(0)
+        connection.send("reset")
+        for i in range(10):
+            connection.send(f"patch {i}", FRAME_PATCH)
+            assert connection.send(f"snapshot {i}", FRAME_SNAPSHOT)
+        socket.release.set()
+        await connection.close()
+        return socket, dead
+
+    socket, dead = asyncio.run(run())
+    assert socket.frames == ["first", "reset", "snapshot 9"]
+    assert dead == []
+
+
+def test_a_send_that_never_completes_drops_the_client():
+    async def run():
+        connection, socket, dead = _connection(send_timeout=0.02)
+        connection.send("first")
+        await asyncio.sleep(0.05)
+        return connection, dead
+
+    connection, dead = asyncio.run(run())
+    assert connection.closed
+    assert dead == [connection]
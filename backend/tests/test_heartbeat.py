@@ -0,0 +1,82 @@
+from backend.connection import ClientConnection
+from backend.heartbeat import DEAD_AFTER, PING, Heartbeat
+from backend.models import ParticipantStatus
+from backend.tests.test_cluster import FakeSocket
+import asyncio
+
+
+class Manager:
+    def __init__(self):
+        self.active_connections = {}
+
+
+def _heartbeat():
+    manager = Manager()
+    reports = []
+
+    async def report(session_id, changes):
+        reports.append((session_id, changes))
+
+    heartbeat = Heartbeat(manager, report, interval=1.0, tick=0.1)
+    return manager, heartbeat, reports
+
+
+def _connection(manager, user_id: str = "u1") -> ClientConnection:
+    dead = []
+    connection = ClientConnection(FakeSocket(), user_id, on_dead=dead.append)
+    connection.dead = dead
+    manager.active_connections.setdefault("s1", []).append(connection)
+    return connection
+
+
+def test_idle_socket_is_reported_idle_then_dropped():
+    async def run():
+        manager, heartbeat, reports = _heartbeat()
+        connection = _connection(manager)
+        heartbeat.watch("s1", connection)
+        origin = heartbeat.wheel.origin
+        # First check within one interval; then one per interval
+        statuses = []
+        for beat in range(1, DEAD_AFTER + 3):
+            await heartbeat.beat(origin + beat * 1.05 + 0.1)
+            statuses.append([status for _, changes in reports for _, status in changes])
+            reports.clear()
+        pings = sum(1 for frame, _ in connection._queue if frame == PING)
+        return statuses, connection.closed, connection.dead, heartbeat.dead, pings, len(heartbeat)
+
+    statuses, closed, dead, dead_count, pings, watched = asyncio.run(run())
+    # Seen at connect, then silent: idle after one missed ping, gone after DEAD_AFTER
+    assert statuses[0] == []
+    assert statuses[1] == [ParticipantStatus.IDLE]
+    assert statuses[DEAD_AFTER] == [ParticipantStatus.DISCONNECTED]
+    assert all(s == [] for s in statuses[2:DEAD_AFTER] + statuses[DEAD_AFTER + 1:])
+    assert closed and len(dead) == 1 and dead_count == 1
+    assert watched == 0
+
+
+def test_answering_socket_comes_back_and_another_tab_keeps_the_user_present():
+    async def run():
+        manager, heartbeat, reports = _heartbeat()
+        quiet = _connection(manager)
+        heartbeat.watch("s1", quiet)
+        origin = heartbeat.wheel.origin
+        await heartbeat.beat(origin + 1.1)
+        await heartbeat.beat(origin + 2.2)
+        idle = list(reports)
+        reports.clear()
+        quiet.seen = True
+        await heartbeat.beat(origin + 3.3)
+        back = list(reports)
+        reports.clear()
+        # With a second socket of the same user answering, missing pings reports nothing
+        answering = _connection(manager)
+        heartbeat.watch("s1", answering)
+        for beat in range(4, 4 + DEAD_AFTER + 1):
+            answering.seen = True
+            await heartbeat.beat(origin + beat * 1.1)
+        return idle, back, list(reports), quiet.closed
+
+    idle, back, later, closed = asyncio.run(run())
+    assert idle == [("s1", [("u1", ParticipantStatus.IDLE)])]
+    assert back == [("s1", [("u1", ParticipantStatus.CONNECTED)])]
+    assert later == [] and closed
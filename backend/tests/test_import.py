@@ -0,0 +1,81 @@
+from backend.models import User
+from backend.tests.test_cluster import EMPTY, FakeSocket, _router, _settle, routing_state
+from backend import main
+from fastapi import HTTPException
+import asyncio
+import pytest
+
+CSV = b"title,estimate\nLogin page,3\nSearch,5\n"
+
+
+class FakeRequest:
+    def __init__(self, body: bytes):
+        self.headers = {"content-type": "text/csv"}
+        self.body = body
+
+    async def stream(self):
+        yield self.body
+
+
+async def _import(session_id: str, user_id: str, body: bytes = CSV):
+    return await main.import_work_items(FakeRequest(body), session_id, user_id, None)
+
+
+async def _status(call) -> int:
+    try:
+        await call
+    except HTTPException as e:
+        return e.status_code
+    return 202
+
+
+def _run(monkeypatch, scenario):
+    async def run():
+        manager, router = await _router()
+        monkeypatch.setattr(main, "manager", manager)
+        monkeypatch.setattr(main, "router", router)
+        try:
+            return await scenario(manager, router)
+        finally:
+            await manager.actors.close()
+    return asyncio.run(run())
+
+
+def test_import_adds_parsed_items_for_the_moderator(monkeypatch):
+    async def scenario(manager, router):
+        await router.connect(FakeSocket(), "s1", User(id="mod", name="Moderator"))
+        received = await _import("s1", "mod")
+        await _settle(manager, "s1")
+        return received, [item.title for item in manager.sessions["s1"].workItems]
+
+    received, titles = _run(monkeypatch, scenario)
+    assert received == {"received": 2}
+    assert titles == ["Login page", "Search"]
+
+
+def test_import_rejects_unknown_sessions_and_non_moderators(monkeypatch):
+    async def scenario(manager, router):
+        missing = await _status(_import("missing", "mod"))
+        state = routing_state(router)
+        await router.connect(FakeSocket(), "s1", User(id="mod", name="Moderator"))
+        await router.connect(FakeSocket(), "s1", User(id="v1", name="Voter"))
+        await _settle(manager, "s1")
+        voter = await _status(_import("s1", "v1"))
+        stranger = await _status(_import("s1", "nobody"))
+        await _settle(manager, "s1")
+        return missing, state, voter, stranger, len(manager.sessions["s1"].workItems)
+
+    missing, state, voter, stranger, items = _run(monkeypatch, scenario)
+    assert missing == 404
+    assert state == EMPTY
+    assert (voter, stranger) == (403, 403)
+    assert items == 0
+
+
+@pytest.mark.parametrize("body", [b"\xff\xfe", b"estimate\n3\n"])
+def test_import_rejects_bad_bodies(monkeypatch, body):
+    async def scenario(manager, router):
+        await router.connect(FakeSocket(), "s1", User(id="mod", name="Moderator"))
+        return await _status(_import("s1", "mod", body))
+
+    assert _run(monkeypatch, scenario) == 400
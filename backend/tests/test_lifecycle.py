@@ -0,0 +1,40 @@
+from backend.connection_manager import ConnectionManager
+from backend.lifecycle import SessionLifecycle
+from backend.models import User
+from backend.store import InMemorySessionStore
+from backend.tests.test_cluster import FakeSocket, _settle
+import asyncio
+
+
+def test_sweeper_only_runs_with_a_store_that_keeps_evicted_sessions(tmp_path):
+    async def run():
+        started = []
+        for store in (InMemorySessionStore(), InMemorySessionStore(str(tmp_path))):
+            manager = ConnectionManager(store)
+            await manager.lifecycle.start()
+            started.append(manager.lifecycle._task is not None)
+            await manager.lifecycle.close()
+        return started
+
+    assert asyncio.run(run()) == [False, True]
+
+
+def test_sweep_skips_sessions_with_an_audience(tmp_path):
+    async def run():
+        manager = ConnectionManager(InMemorySessionStore(str(tmp_path)))
+        manager.lifecycle = SessionLifecycle(manager, ttl=0)
+        socket = FakeSocket()
+        await manager.connect(socket, "s1", User(id="u1", name="Voter"))
+        manager.disconnect(socket, "s1", "u1")
+        # The leave is broadcast in the next presence window
+        while manager.scheduler.pending("s1"):
+            await asyncio.sleep(0.01)
+        await _settle(manager, "s1")
+        subscriber = manager.audience.subscribe("s1")
+        watched = await manager.lifecycle.sweep()
+        manager.audience.unsubscribe("s1", subscriber)
+        unwatched = await manager.lifecycle.sweep()
+        await manager.actors.close()
+        return watched, unwatched, "s1" in manager.sessions
+
+    assert asyncio.run(run()) == (0, 1, False)
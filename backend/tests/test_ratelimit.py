@@ -0,0 +1,67 @@
+from backend import codec, ratelimit
+from backend.ratelimit import ACCEPT, CLOSE, DROP, InboundGuard, SessionRateLimits, TokenBucket, peek_event
+import json
+
+
+def frame(event: str, payload: dict = None) -> str:
+    return json.dumps({"event": event, "payload": payload or {}})
+
+
+def test_peek_event_reads_the_type_without_decoding():
+    assert peek_event(frame("cast_vote", {"value": 5})) == "cast_vote"
+    assert peek_event(codec.pack({"event": "cast_vote", "payload": {}})) == "cast_vote"
+    # Anything else is left to the full decode
+    assert peek_event('{"payload": {}, "event": "cast_vote"}') is None
+    assert peek_event(codec.pack({"payload": {}, "event": "cast_vote"})) is None
+    assert peek_event("not json") is None
+
+
+def test_token_bucket_refills_at_its_rate_up_to_the_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    start = bucket.stamp
+    assert bucket.take(1, start) and bucket.take(1, start)
+    assert not bucket.take(1, start)
+    assert not bucket.take(1, start + 0.05)
+    assert bucket.take(1, start + 0.1)
+    # A long idle period refills to the burst, not beyond
+    assert bucket.take(2, start + 60)
+    assert not bucket.take(1, start + 60)
+
+
+def test_oversized_frames_close_the_socket():
+    guard = InboundGuard()
+    assert guard.check("x" * (ratelimit.MAX_FRAME_BYTES + 1)) == CLOSE
+    assert guard.close_code == ratelimit.CLOSE_TOO_BIG
+
+
+def test_connection_budget_drops_then_weighted_events_cost_more():
+    guard = InboundGuard(rate=0.001, burst=12)
+    assert [guard.check(frame("cast_vote")) for _ in range(2)] == [ACCEPT, ACCEPT]
+    assert guard.check(frame("add_work_items")) == ACCEPT
+    assert guard.check(frame("add_work_items")) == DROP
+    assert guard.violations == 1
+
+
+def test_repeat_offenders_are_closed_and_compliance_resets_the_count(monkeypatch):
+    monkeypatch.setattr(ratelimit, "CLOSE_AFTER_DROPS", 3)
+    guard = InboundGuard()
+    assert [guard.check(frame("no_such_event")) for _ in range(2)] == [DROP, DROP]
+    assert guard.check(frame("cast_vote")) == ACCEPT
+    assert guard.violations == 0
+    verdicts = [guard.check(frame("no_such_event")) for _ in range(3)]
+    assert verdicts == [DROP, DROP, CLOSE]
+    assert guard.close_code == ratelimit.CLOSE_POLICY
+
+
+def test_session_budget_is_shared_and_does_not_blame_the_sender():
+    limits = SessionRateLimits(rate=0.001, burst=3)
+    first = InboundGuard(limits.acquire("s1"))
+    second = InboundGuard(limits.acquire("s1"))
+    verdicts = [guard.check(frame("cast_vote")) for guard in (first, second, first, second)]
+    assert verdicts == [ACCEPT, ACCEPT, ACCEPT, DROP]
+    assert second.violations == 0
+    # The bucket lives as long as a socket holds it
+    limits.release("s1")
+    assert len(limits) == 1
+    limits.release("s1")
+    assert len(limits) == 0
@@ -0,0 +1,104 @@
+from backend.connection_manager import ConnectionManager
+from backend.cluster import ClusterRouter, LocalBus
+from backend.models import User
+from backend.state import WorkItemState
+from backend.store import InMemorySessionStore
+from backend.tests.test_cluster import FakeSocket, _settle, _workers, routing_state
+from backend import main
+from fastapi import HTTPException
+import asyncio
+import json
+
+ITEMS = [WorkItemState(f"item-{n}", f"Ticket {n}", agreedEstimate=n) for n in range(3)]
+
+
+async def _export(session_id: str):
+    response = await main.export_work_items(session_id, "json")
+    return json.loads("".join([chunk async for chunk in response.body_iterator]))
+
+
+async def _status(call) -> int:
+    try:
+        await call
+    except HTTPException as e:
+        return e.status_code
+    return 200
+
+
+async def _session_with_items(manager, router, session_id: str = "s1"):
+    socket = FakeSocket()
+    await router.connect(socket, session_id, User(id="mod", name="Moderator"))
+    await (await manager.actors.submit(session_id, lambda: manager.add_work_items(session_id, list(ITEMS))))
+    return socket
+
+
+def test_export_reads_a_spilled_session_back(monkeypatch, tmp_path):
+    async def run():
+        manager = ConnectionManager(InMemorySessionStore(str(tmp_path)))
+        router = ClusterRouter(manager, LocalBus(), main.handle_event, main.READ_VIEWS)
+        monkeypatch.setattr(main, "manager", manager)
+        monkeypatch.setattr(main, "router", router)
+        socket = await _session_with_items(manager, router)
+        await router.disconnect(socket, "s1", "mod")
+        await _settle(manager, "s1")
+        await manager.evict_session("s1")
+        evicted = "s1" not in manager.sessions
+        exported = await _export("s1")
+        missing = await _status(_export("missing"))
+        await manager.actors.close()
+        return evicted, exported, missing, routing_state(router)
+
+    evicted, exported, missing, state = asyncio.run(run())
+    assert evicted
+    assert [(item["id"], item["agreedEstimate"]) for item in exported] == [("item-0", 0), ("item-1", 1), ("item-2", 2)]
+    assert missing == 404
+    # The reloaded session is routed again, the missing one is not
+    assert state["owners"] == 1 and state["claims"] == 1
+
+
+def test_export_on_another_worker_asks_the_owner(monkeypatch):
+    async def run():
+        (owner, owner_router), (other, other_router) = await _workers(2)
+        monkeypatch.setattr(main, "manager", owner)
+        await _session_with_items(owner, owner_router)
+        monkeypatch.setattr(main, "manager", other)
+        monkeypatch.setattr(main, "router", other_router)
+        exported = await _export("s1")
+        state = routing_state(other_router)
+        for manager, router in ((owner, owner_router), (other, other_router)):
+            await router.close()
+            await manager.actors.close()
+        return exported, state, "s1" in other.sessions
+
+    exported, state, copied = asyncio.run(run())
+    assert [item["title"] for item in exported] == ["Ticket 0", "Ticket 1", "Ticket 2"]
+    # Nothing left routed on the asking worker, and no copy of the session
+    assert (state["owners"], state["localUsers"]) == (0, 0)
+    assert not copied
+
+
+def test_report_on_another_worker_and_after_eviction(monkeypatch, tmp_path):
+    async def run():
+        (owner, owner_router), (other, other_router) = await _workers(2)
+        monkeypatch.setattr(main, "manager", owner)
+        socket = await _session_with_items(owner, owner_router)
+        monkeypatch.setattr(main, "router", other_router)
+        remote = await main.session_report("s1")
+        # Once the owner evicts it, whoever asks next loads it from the store
+        owner.sessions.spill_dir = str(tmp_path)
+        await owner_router.disconnect(socket, "s1", "mod")
+        await _settle(owner, "s1")
+        await owner.evict_session("s1")
+        other.sessions.spill_dir = str(tmp_path)
+        monkeypatch.setattr(main, "manager", other)
+        reloaded = await main.session_report("s1")
+        missing = await _status(main.session_report("missing"))
+        for manager, router in ((owner, owner_router), (other, other_router)):
+            await router.close()
+            await manager.actors.close()
+        return remote, reloaded, missing
+
+    remote, reloaded, missing = asyncio.run(run())
+    assert remote["sessionId"] == "s1" and remote["round"] is None
+    assert reloaded["backlog"] == remote["backlog"]
+    assert missing == 404
@@ -0,0 +1,81 @@
+from backend.benchmarks.replay import Replay
+from backend.cluster import ClusterRouter, LocalBus
+from backend.connection_manager import ConnectionManager
+from backend.journal import EventJournal, load
+from backend.tests.test_cluster import FakeSocket, _settle
+from backend.models import User
+from backend import main
+import asyncio
+
+
+# Session state with vote times dropped and work item ids replaced by their
+# position, since replay stamps and generates its own
+def _comparable(state):
+    ids = {item["id"]: index for index, item in enumerate(state.get("workItems", []))}
+
+    def strip(value):
+        if isinstance(value, dict):
+            return {key: strip(item) for key, item in value.items() if key != "timestamp"}
+        if isinstance(value, list):
+            return [strip(item) for item in value]
+        if isinstance(value, str) and value in ids:
+            return ("work item", ids[value])
+        return value
+    return strip(state)
+
+
+async def _record(directory: str) -> dict:
+    manager = ConnectionManager()
+    journal = EventJournal(directory)
+    await journal.start()
+    main.manager = manager
+    router = ClusterRouter(manager, LocalBus(), journal.observe(main.handle_event, manager.sessions))
+    await router.bus.start()
+
+    sockets = {}
+    for user_id in ("mod", "dev", "qa"):
+        sockets[user_id] = FakeSocket()
+        user = User(id=user_id, name=user_id)
+        connection = await router.connect(sockets[user_id], "s1", user)
+        journal.connect("s1", user, connection.delta, connection.encoding, connection.summary,
+                        connection.compression, manager.sessions.get("s1"))
+
+    async def send(user_id, event, payload):
+        await router.dispatch("s1", user_id, event, payload)
+        await _settle(manager, "s1")
+
+    await send("mod", "add_work_item", {"title": "Login", "description": "SSO"})
+    await send("mod", "add_work_items", {"items": [{"title": "Logout"}, {"title": "Audit log"}]})
+    session = manager.sessions["s1"]
+    first, second = session.workItems[0].id, session.workItems[1].id
+    await send("mod", "set_active_work_item", {"workItemId": first})
+    await send("dev", "cast_vote", {"value": "5"})
+    await send("qa", "cast_vote", {"value": "8"})
+    await send("dev", "cast_vote", {"value": "8"})
+    await send("mod", "reveal_votes", {})
+    await send("mod", "set_agreed_estimate", {"workItemId": first, "estimate": "8"})
+    await send("mod", "clear_votes", {})
+    await send("mod", "set_active_work_item", {"workItemId": second})
+    await send("qa", "cast_vote", {"value": "?"})
+
+    journal.disconnect("s1", "qa")
+    await router.disconnect(sockets["qa"], "s1", "qa")
+    await _settle(manager, "s1")
+    await send("dev", "cast_vote", {"value": "3"})
+
+    live = session.to_dict()
+    await journal.close()
+    await manager.actors.close()
+    await router.bus.close()
+    return live
+
+
+def test_replaying_a_journal_reproduces_the_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "manager", main.manager)
+    live = asyncio.run(_record(str(tmp_path)))
+
+    replay = Replay()
+    results = asyncio.run(replay.run(load([str(path) for path in tmp_path.iterdir()]), 0))
+
+    assert results["skipped"] == 0
+    assert _comparable(replay.manager.sessions["s1"].to_dict()) == _comparable(live)
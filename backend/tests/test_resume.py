@@ -0,0 +1,44 @@
+from backend.connection_manager import ConnectionManager
+from backend.models import User
+from backend.tests.test_cluster import FakeSocket
+import asyncio
+import json
+
+
+async def _connect(manager: ConnectionManager, resume_from=None) -> FakeSocket:
+    socket = FakeSocket()
+    await manager.connect(socket, "s1", User(id="u1", name="Voter"), delta=True, resume_from=resume_from)
+    # Let the writer task send what was queued
+    for _ in range(3):
+        await asyncio.sleep(0)
+    return socket
+
+
+def test_resume_at_the_current_version_sends_nothing():
+    async def run():
+        manager = ConnectionManager()
+        first = await _connect(manager)
+        version = json.loads(first.frames[-1])["sequenceId"]
+        again = await _connect(manager, resume_from=manager.sessions["s1"].version)
+        await manager.actors.close()
+        return version, again.frames
+
+    version, frames = asyncio.run(run())
+    assert version > 0
+    assert frames == []
+
+
+def test_resume_after_a_restart_gets_a_snapshot():
+    async def run():
+        before = ConnectionManager()
+        old = json.loads((await _connect(before)).frames[-1])["sequenceId"]
+        await before.actors.close()
+        # Restart with the in-memory store: the session is created anew
+        after = ConnectionManager()
+        socket = await _connect(after, resume_from=old)
+        await after.actors.close()
+        return old, [json.loads(frame) for frame in socket.frames]
+
+    old, frames = asyncio.run(run())
+    assert len(frames) == 1 and "session" in frames[0]
+    assert frames[0]["sequenceId"] != old
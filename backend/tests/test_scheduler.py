@@ -0,0 +1,93 @@
+from backend.scheduler import BroadcastScheduler
+import asyncio
+import pytest
+import time
+
+
+async def _scheduler(interval: float, max_latency: float):
+    flushed = []
+
+    async def flush(session_id):
+        flushed.append((session_id, asyncio.get_running_loop().time()))
+
+    return BroadcastScheduler(flush, interval=interval, max_latency=max_latency), flushed
+
+
+def test_a_burst_is_one_broadcast_per_session():
+    async def run():
+        scheduler, flushed = await _scheduler(0.02, 0.2)
+        for _ in range(10):
+            scheduler.schedule("s1")
+        scheduler.schedule("s2")
+        assert scheduler.pending("s1") and scheduler.pending("s2")
+        await asyncio.sleep(0.06)
+        return scheduler, flushed
+
+    scheduler, flushed = asyncio.run(run())
+    assert sorted(session_id for session_id, _ in flushed) == ["s1", "s2"]
+    assert scheduler.stats() == {
+        "pendingSessions": 0, "coalescedFlushes": 2, "eventsCoalesced": 9, "broadcastsSaved": 9,
+    }
+
+
+def test_a_steady_stream_still_flushes_within_the_max_latency():
+    async def run():
+        scheduler, flushed = await _scheduler(0.03, 0.06)
+        start = asyncio.get_running_loop().time()
+        # Every event arrives inside the window, so it never goes quiet
+        for _ in range(12):
+            scheduler.schedule("s1")
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        return start, flushed
+
+    start, flushed = asyncio.run(run())
+    assert len(flushed) >= 2
+    assert flushed[0][1] - start < 0.06 + 0.02
+
+
+def test_an_explicit_delay_never_postpones_a_due_flush():
+    async def run():
+        scheduler, flushed = await _scheduler(0.02, 0.2)
+        start = asyncio.get_running_loop().time()
+        scheduler.schedule("s1")
+        scheduler.schedule("s1", delay=1.0)
+        await asyncio.sleep(0.05)
+        return start, flushed
+
+    start, flushed = asyncio.run(run())
+    assert len(flushed) == 1 and flushed[0][1] - start < 0.05
+
+
+def test_cancel_drops_the_window_an_immediate_broadcast_covers():
+    async def run():
+        scheduler, flushed = await _scheduler(0.01, 0.2)
+        scheduler.schedule("s1")
+        scheduler.schedule("s1")
+        scheduler.cancel("s1")
+        await asyncio.sleep(0.03)
+        return scheduler, flushed
+
+    scheduler, flushed = asyncio.run(run())
+    assert flushed == []
+    assert not scheduler.pending("s1")
+    assert scheduler.stats()["broadcastsSaved"] == 2
+
+
+def test_events_after_an_overdue_deadline_still_coalesce_on_uvloop():
+    # Installed with uvicorn[standard], except on Windows
+    uvloop = pytest.importorskip("uvloop")
+
+    async def run():
+        scheduler, flushed = await _scheduler(0.01, 0.01)
+        scheduler.schedule("s1")
+        # Block past the window: the next deadline is already overdue
+        time.sleep(0.02)
+        scheduler.schedule("s1")
+        scheduler.schedule("s1", delay=0.05)
+        await asyncio.sleep(0.05)
+        return flushed, scheduler.stats()
+
+    flushed, stats = uvloop.run(run())
+    assert [session_id for session_id, _ in flushed] == ["s1"]
+    assert stats["eventsCoalesced"] == 2
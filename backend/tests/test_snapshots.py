@@ -0,0 +1,140 @@
+from backend.models import JobRole, ParticipantRole, ParticipantStatus, SessionPhase
+from backend.snapshots import SnapshotCache
+from backend.state import ParticipantState, VoteState, WorkItemState, now_ms
+from backend import codec
+import copy
+import json
+import pytest
+import zlib
+
+
+# What the client does with a patch (sessionStore.applySessionPatch)
+def apply_patch(session: dict, ops: list) -> dict:
+    session = copy.deepcopy(session)
+    for op in ops:
+        if op["op"] == "set":
+            session[op["path"]] = op["value"]
+        elif op["path"] == "votes":
+            if op["op"] == "upsert":
+                session["votes"][op["id"]] = op["value"]
+            else:
+                session["votes"].pop(op["id"], None)
+        elif op["op"] == "remove":
+            session[op["path"]] = [entry for entry in session[op["path"]] if entry["id"] != op["id"]]
+        else:
+            entries = session[op["path"]]
+            index = next((i for i, entry in enumerate(entries) if entry["id"] == op["id"]), None)
+            if index is None:
+                entries.append(op["value"])
+            else:
+                entries[index] = op["value"]
+    return session
+
+
+def snapshot_of(cache: SnapshotCache, session) -> dict:
+    return json.loads(cache.get(session).text)["session"]
+
+
+# A round of changes covering every op: votes cast and cleared, a
+# participant leaving, items added and estimated, phase and status changes
+def mutations(session):
+    yield lambda: session.cast_vote(VoteState(userId="u1", value=8, timestamp=now_ms()))
+    yield lambda: session.add_work_item(WorkItemState(id="item-new", title="New", description="d"))
+    yield lambda: session.set_status(session.get_participant("u2"), ParticipantStatus.DISCONNECTED)
+    yield lambda: session.remove_participant("u3")
+    yield lambda: setattr(session, "phase", SessionPhase.REVEALING)
+    yield lambda: session.set_agreed_estimate(session.get_work_item("item-0"), 5)
+    yield lambda: session.clear_votes()
+    yield lambda: setattr(session, "phase", SessionPhase.VOTING)
+
+
+def test_patches_rebuild_each_snapshot(build_session):
+    session = build_session(5, 3)
+    cache = SnapshotCache()
+    assert cache.get_patch(session) is None
+    client = snapshot_of(cache, session)
+    for mutate in mutations(session):
+        base = session.version
+        mutate()
+        session.touch()
+        patch = cache.get_patch(session)
+        message = json.loads(patch.text)
+        assert (message["baseSequenceId"], message["sequenceId"]) == (base, session.version)
+        client = apply_patch(client, message["ops"])
+        assert client == snapshot_of(cache, session)
+
+
+def test_resume_replays_missed_patches(build_session):
+    session = build_session(5, 3)
+    cache = SnapshotCache(replay_buffer=4)
+    cache.get_patch(session)
+    history = [(session.version, snapshot_of(cache, session))]
+    for mutate in mutations(session):
+        mutate()
+        session.touch()
+        cache.get_patch(session)
+        history.append((session.version, snapshot_of(cache, session)))
+
+    latest = session.version
+    # A client that saw any of the last four versions catches up from the buffer
+    for since, seen in history[-5:-1]:
+        patches = cache.replay(session.id, since, latest)
+        assert patches is not None and patches[0].base_version == since
+        for patch in patches:
+            seen = apply_patch(seen, json.loads(patch.text)["ops"])
+        assert seen == history[-1][1]
+    # Older than the buffer, or unknown: a full snapshot is needed
+    assert cache.replay(session.id, history[-6][0], latest) is None
+    assert cache.replay(session.id, latest + 1, latest) is None
+    cache.invalidate(session.id)
+    assert cache.replay(session.id, history[-2][0], latest) is None
+
+
+def _decode(frame, encoding: str, compression):
+    if compression is not None and isinstance(frame, bytes) and frame[:2] == b"\x78\x9c":
+        data = zlib.decompress(frame)
+        return codec.unpack(data) if encoding == codec.MSGPACK else json.loads(data)
+    return codec.decode(frame)
+
+
+@pytest.fixture
+def room(build_session):
+    session = build_session(30, 40)
+    session.add_participant(ParticipantState(
+        id="watcher", name="Watcher", avatarUrl=None, jobRole=JobRole.ADMIN,
+        role=ParticipantRole.OBSERVER, status=ParticipantStatus.CONNECTED, hasVoted=False,
+    ))
+    session.touch()
+    return session
+
+
+@pytest.mark.parametrize("compression", [None, codec.DEFLATE])
+@pytest.mark.parametrize("encoding", [codec.JSON, codec.MSGPACK])
+def test_masked_frames_match_a_per_user_dump(encoding, compression, room, naive_frame):
+    session = room
+    snapshot = SnapshotCache().get(session)
+    # Moderator, a voter and the observer each see only their own vote
+    for user_id in ("u0", "u7", "watcher"):
+        ours = _decode(snapshot.frame_for(encoding, user_id, compression), encoding, compression)["session"]
+        theirs = codec.decode(naive_frame(session, user_id, encoding))["session"]
+        assert ours == theirs
+    observer = _decode(snapshot.frame_for(encoding, "watcher", compression), encoding, compression)["session"]
+    assert all(vote["value"] is None for vote in observer["votes"].values())
+    assert snapshot.frame_for(encoding, "watcher", compression) == snapshot.frame(encoding, compression)
+
+
+def test_masked_patch_carries_only_the_voters_own_value(room):
+    session = room
+    session.clear_votes()
+    session.cast_vote(VoteState(userId="u0", value=3, timestamp=now_ms()))
+    session.touch()
+    cache = SnapshotCache()
+    cache.get_patch(session)
+    session.cast_vote(VoteState(userId="u7", value=13, timestamp=now_ms()))
+    session.touch()
+    patch = cache.get_patch(session)
+    ops = {op["id"]: op for op in json.loads(patch.frame_for(codec.JSON, "u7"))["ops"] if op["path"] == "votes"}
+    assert ops["u7"]["value"]["value"] == 13
+    for user_id in ("u0", "watcher"):
+        ops = [op for op in json.loads(patch.frame_for(codec.JSON, user_id))["ops"] if op["path"] == "votes"]
+        assert [op["value"]["value"] for op in ops] == [None]
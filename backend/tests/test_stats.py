@@ -0,0 +1,125 @@
+from backend.models import JobRole
+from backend.stats import CONSENSUS_PERCENT, Aggregate, RoundStats
+import math
+import random
+import re
+
+
+# Port of src/utils/estimation.ts, the rules ResultsPanel applied before it
+# trusted session.stats. Written out the slow way on purpose.
+def _parse_float(value):
+    text = value.lstrip()
+    for end in range(len(text), 0, -1):
+        if re.fullmatch(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?", text[:end]):
+            return float(text[:end])
+    return None
+
+
+def _numeric_votes(votes):
+    numbers = []
+    for vote in votes:
+        if isinstance(vote, (int, float)) and not isinstance(vote, bool):
+            numbers.append(float(vote))
+        elif isinstance(vote, str) and _parse_float(vote) is not None:
+            numbers.append(_parse_float(vote))
+    return sorted(numbers)
+
+
+def _reference(votes):
+    numbers = _numeric_votes(votes)
+    if not numbers:
+        return {"average": None, "median": None, "consensus": False, "min": None, "max": None, "hasOutliers": False}
+    total = 0.0
+    for number in numbers:
+        total += number
+    mid = len(numbers) // 2
+    median = numbers[mid] if len(numbers) % 2 else (numbers[mid - 1] + numbers[mid]) / 2
+    counts = {}
+    for number in numbers:
+        counts[number] = counts.get(number, 0) + 1
+    outliers = len(numbers) >= 2 and numbers[0] != numbers[-1]
+    return {
+        "average": math.floor(total / len(numbers) * 10 + 0.5) / 10,
+        "median": median,
+        "consensus": max(counts.values()) / len(numbers) * 100 > CONSENSUS_PERCENT,
+        "min": numbers[0] if outliers else None,
+        "max": numbers[-1] if outliers else None,
+        "hasOutliers": outliers,
+    }
+
+
+# What ResultsPanel reads out of a summary
+def _shown(summary):
+    return {
+        "average": summary["average"],
+        "median": summary["median"],
+        "consensus": summary["consensus"],
+        "min": summary["min"] if summary["hasOutliers"] else None,
+        "max": summary["max"] if summary["hasOutliers"] else None,
+        "hasOutliers": summary["hasOutliers"],
+    }
+
+
+def _summary(votes):
+    aggregate = Aggregate()
+    for vote in votes:
+        aggregate.add(vote)
+    return aggregate.summary()
+
+
+# Every card of the three decks plus the shapes clients actually send.
+# Values are exact in binary so both sides sum to the same float.
+CARDS = [
+    "0", "1", "2", "3", "5", "8", "13", "21", "?", "coffee",
+    "XS", "S", "M", "L", "XL",
+    "4", "16", "32", "64",
+    0, 1, 3, 5, 8, 2.5, 0.5, "0.5", " 3", "8 points", "1e1", None,
+]
+
+
+def test_matches_estimation_rules():
+    cases = [
+        [1, 2, 3, 3],  # 2.25: Math.round gives 2.3 where round() gives 2.2
+        ["0", "0", "0", "1"],
+        ["?", "coffee"],
+        ["?", "5", "coffee"],
+        ["5", 5, 5.0, "8"],
+        ["5", "5", "5", "8"],
+        ["13", "21", "?", "M"],
+        ["8 points", " 3", "1e1"],
+        [],
+    ]
+    for votes in cases:
+        assert _shown(_summary(votes)) == _reference(votes), votes
+
+
+def test_changed_votes_match_recomputing():
+    rng = random.Random(7)
+    roles = list(JobRole)
+    stats = RoundStats()
+    votes = {}
+    for step in range(3000):
+        user_id = f"u{rng.randrange(12)}"
+        action = rng.random()
+        if action < 0.75:
+            votes[user_id] = (rng.choice(CARDS), rng.choice(roles))
+            stats.cast(user_id, *votes[user_id])
+        elif action < 0.97:
+            votes.pop(user_id, None)
+            stats.retract(user_id)
+        else:
+            votes.clear()
+            stats.clear()
+
+        summary = stats.summary()
+        cast = [value for value, _ in votes.values()]
+        assert summary["votes"] == len(cast)
+        assert _shown(summary) == _reference(cast), step
+        for role in roles:
+            role_votes = [value for value, cast_role in votes.values() if cast_role == role]
+            entry = summary["byRole"].get(role.value)
+            if not role_votes:
+                assert entry is None
+                continue
+            assert entry["votes"] == len(role_votes)
+            assert _shown(entry) == _reference(role_votes), (step, role)
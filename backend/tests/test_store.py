@@ -0,0 +1,70 @@
+from backend.connection_manager import ConnectionManager
+from backend.models import ParticipantStatus, User
+from backend.store import SqliteSessionStore
+import asyncio
+
+MODERATOR = User(id="m", name="Moderator")
+
+
+async def _seeded(path: str):
+    store = SqliteSessionStore(str(path))
+    await store.start()
+    manager = ConnectionManager(store)
+    await manager.join("s1", MODERATOR)
+    await manager.add_work_item("s1", "Before reset")
+    await store.flush()
+    return store, manager
+
+
+def test_reload_keeps_version_and_marks_participants_disconnected(tmp_path):
+    async def run():
+        store, manager = await _seeded(tmp_path / "s.db")
+        version = manager.sessions["s1"].version
+        await store.close()
+
+        reopened = SqliteSessionStore(str(tmp_path / "s.db"))
+        await reopened.start()
+        session = await reopened.load("s1")
+        await reopened.close()
+        return version, session
+
+    version, session = asyncio.run(run())
+    assert session.version == version
+    assert [item.title for item in session.workItems] == ["Before reset"]
+    assert all(p.status == ParticipantStatus.DISCONNECTED for p in session.participants)
+
+
+def test_reset_then_reconnect_does_not_restore_the_old_session(tmp_path):
+    async def run():
+        store, manager = await _seeded(tmp_path / "s.db")
+        await manager.reset_session("s1")
+        # Reconnect before the delete has been flushed
+        assert await store.load("s1") is None
+        await manager.join("s1", MODERATOR)
+        await store.flush()
+        await store.close()
+
+        reopened = SqliteSessionStore(str(tmp_path / "s.db"))
+        await reopened.start()
+        session = await reopened.load("s1")
+        await reopened.close()
+        return session
+
+    session = asyncio.run(run())
+    assert session is not None
+    assert session.workItems == []
+
+
+def test_reset_without_reconnect_deletes_the_row(tmp_path):
+    async def run():
+        store, manager = await _seeded(tmp_path / "s.db")
+        await manager.reset_session("s1")
+        await store.close()
+
+        reopened = SqliteSessionStore(str(tmp_path / "s.db"))
+        await reopened.start()
+        session = await reopened.load("s1")
+        await reopened.close()
+        return session
+
+    assert asyncio.run(run()) is None
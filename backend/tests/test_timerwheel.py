@@ -0,0 +1,66 @@
+from backend.timerwheel import LEVEL_SLOTS, TimerWheel
+import random
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _wheel():
+    return TimerWheel(tick=1.0, clock=Clock())
+
+
+# Tick at which each item fires, advancing one tick at a time
+def _fire_ticks(wheel: TimerWheel, until: int) -> dict:
+    fired = {}
+    for tick in range(1, until + 1):
+        for item in wheel.advance(float(tick)):
+            fired[item] = tick
+    return fired
+
+
+def test_timers_fire_on_their_tick_at_every_level():
+    wheel = _wheel()
+    # Level 0, level 1 (cascades once) and level 2 (cascades twice)
+    delays = [1, 5, LEVEL_SLOTS - 1, LEVEL_SLOTS, 300, LEVEL_SLOTS ** 2 - 1, LEVEL_SLOTS ** 2 + 7, 70_000]
+    for delay in delays:
+        wheel.schedule(delay, delay)
+    assert len(wheel) == len(delays)
+    assert _fire_ticks(wheel, 70_000) == {delay: delay for delay in delays}
+    assert len(wheel) == 0
+
+
+def test_fractional_delays_round_up_to_a_whole_tick():
+    wheel = _wheel()
+    wheel.schedule(0.0, "now")
+    wheel.schedule(2.5, "later")
+    assert _fire_ticks(wheel, 5) == {"now": 1, "later": 3}
+
+
+def test_cancelled_timers_never_fire_at_any_level():
+    wheel = _wheel()
+    timers = [wheel.schedule(delay, delay) for delay in (3, 300, 70_000)]
+    kept = wheel.schedule(400, "kept")
+    for timer in timers:
+        wheel.cancel(timer)
+    wheel.cancel(timers[0])  # twice is harmless
+    assert len(wheel) == 1
+    assert _fire_ticks(wheel, 70_000) == {"kept": 400}
+
+
+def test_timers_scheduled_mid_rotation_fire_on_time():
+    wheel = _wheel()
+    rng = random.Random(7)
+    expected, fired = {}, {}
+    for tick in range(0, 26_000):
+        for item in wheel.advance(float(tick)):
+            fired[item] = tick
+        if tick < 20_000 and tick % 97 == 0:
+            delay = rng.randint(1, 5_000)
+            wheel.schedule(delay, tick)
+            expected[tick] = tick + delay
+    assert fired == expected
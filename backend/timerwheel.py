@@ -0,0 +1,106 @@
+from typing import Any, Callable, List, Optional, Set
+import math
+import time
+
+# Hierarchical timer wheel: one structure (and no task per timer) for
+# hundreds of thousands of deadlines. Scheduling and cancelling are O(1);
+# advancing costs one slot per elapsed tick plus the timers that expire,
+# with far-off timers cascading down a level once per level rotation.
+#
+# Resolution is one tick: a timer fires on the first advance() at or after
+# its deadline rounded up to a whole tick. Level 0 covers 256 ticks, so
+# timers shorter than that (e.g. heartbeats) never cascade at all.
+
+LEVEL_SLOTS = 256
+LEVELS = 3
+
+
+class Timer:
+    __slots__ = ("expires", "item", "bucket")
+
+    def __init__(self, expires: int, item: Any):
+        # Absolute tick at which the timer fires
+        self.expires = expires
+        self.item = item
+        # Slot holding the timer; None once fired or cancelled
+        self.bucket: Optional[Set["Timer"]] = None
+
+
+class TimerWheel:
+    def __init__(self, tick: float, clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.origin = clock()
+        # Last tick processed
+        self.current = 0
+        self._levels: List[List[Set[Timer]]] = [
+            [set() for _ in range(LEVEL_SLOTS)] for _ in range(LEVELS)
+        ]
+        # Ticks covered by one slot of each level: 1, 256, 65536
+        self._spans = [LEVEL_SLOTS ** level for level in range(LEVELS)]
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    # Fire `item` after `delay` seconds (at least one tick from now)
+    def schedule(self, delay: float, item: Any) -> Timer:
+        timer = Timer(self.current + max(1, math.ceil(delay / self.tick)), item)
+        self._place(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        if timer.bucket is not None:
+            timer.bucket.discard(timer)
+            timer.bucket = None
+            self._count -= 1
+
+    # Process every tick up to `now` and return the items that expired
+    def advance(self, now: Optional[float] = None) -> List[Any]:
+        if now is None:
+            now = self.clock()
+        target = int((now - self.origin) / self.tick)
+        expired: List[Any] = []
+        while self.current < target:
+            self.current += 1
+            self._cascade()
+            bucket = self._levels[0][self.current % LEVEL_SLOTS]
+            if bucket:
+                for timer in bucket:
+                    timer.bucket = None
+                    expired.append(timer.item)
+                self._count -= len(bucket)
+                bucket.clear()
+        return expired
+
+    # At each level boundary, redistribute the next slot of the level above
+    # (top level first) into the finer levels
+    def _cascade(self):
+        if self.current % LEVEL_SLOTS:
+            return
+        level = 1
+        while level < LEVELS - 1 and (self.current // self._spans[level]) % LEVEL_SLOTS == 0:
+            level += 1
+        for upper in range(level, 0, -1):
+            bucket = self._levels[upper][(self.current // self._spans[upper]) % LEVEL_SLOTS]
+            if bucket:
+                timers = list(bucket)
+                bucket.clear()
+                for timer in timers:
+                    self._place(timer)
+
+    def _place(self, timer: Timer):
+        delta = max(0, timer.expires - self.current)
+        level = 0
+        while level < LEVELS - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        if level == LEVELS - 1 and delta >= self._spans[level] * LEVEL_SLOTS:
+            # Beyond the wheel's range: park in the farthest slot and
+            # cascade again from there
+            timer_slot = (self.current // self._spans[level] - 1) % LEVEL_SLOTS
+        else:
+            timer_slot = (timer.expires // self._spans[level]) % LEVEL_SLOTS
+        bucket = self._levels[level][timer_slot]
+        bucket.add(timer)
+        timer.bucket = bucket
@@ -35,6 +35,33 @@ export const ResultsPanel: React.FC = () => {
 
     if (allVotes.length === 0) return null;
 
+    // Prefer the statistics the server keeps as votes arrive
+    const stats = session.stats;
+    if (stats) {
+      const roleStats = (role: JobRole) => {
+        const entry = stats.byRole[role];
+        return {
+          average: entry?.average ?? null,
+          median: entry?.median ?? null,
+          consensus: entry?.consensus ?? false,
+          count: entry?.votes ?? 0
+        };
+      };
+      return {
+        allVoteEntries,
+        globalStats: {
+          average: stats.average,
+          median: stats.median,
+          consensus: stats.consensus,
+          min: stats.hasOutliers ? stats.min : null,
+          max: stats.hasOutliers ? stats.max : null,
+          hasOutliers: stats.hasOutliers
+        },
+        devStats: roleStats('Developer'),
+        qaStats: roleStats('QA')
+      };
+    }
+
     // Calculate Global Stats
     const globalStats = {
       average: calculateAverage(allVotes),
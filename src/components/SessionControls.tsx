@@ -22,6 +22,10 @@ export const SessionControls: React.FC = () => {
     socketService.send('clear_votes', {});
   };
 
+  const handleAutoReveal = (event: React.ChangeEvent<HTMLInputElement>) => {
+    socketService.send('update_settings', { autoReveal: event.target.checked });
+  };
+
   const handleResetSession = () => {
     if (window.confirm('Are you sure you want to reset the entire session? This will clear all votes and estimates.')) {
       socketService.send('reset_session', {});
@@ -33,13 +37,28 @@ export const SessionControls: React.FC = () => {
   
   // Disable reveal if no one has voted yet? Or allow it anyway? 
   // Let's allow it but maybe style differently if empty.
-  const hasVotes = session.participants.some(p => p.hasVoted);
+  const progress = session.progress;
+  const hasVotes = progress ? progress.voted > 0 : session.participants.some(p => p.hasVoted);
 
   return (
     <div className="flex flex-wrap gap-4 p-4 bg-pastel-surface rounded-lg border border-pastel-border items-center justify-between shadow-sm">
       <div className="text-sm font-medium text-pastel-muted uppercase tracking-wider">
         Moderator Controls
+        {isVoting && progress && (
+          <span className="ml-3 normal-case tracking-normal">
+            {progress.voted}/{progress.eligible} voted
+          </span>
+        )}
       </div>
+
+      <label className="flex items-center gap-2 text-sm text-pastel-text">
+        <input
+          type="checkbox"
+          checked={session.settings.autoReveal}
+          onChange={handleAutoReveal}
+        />
+        Auto-reveal
+      </label>
       
       <div className="flex gap-3">
         {isVoting && (
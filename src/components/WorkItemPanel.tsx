@@ -12,8 +12,9 @@ export const WorkItemPanel: React.FC = () => {
 
   if (!session) return null;
 
+  // Summary projection carries the active item in full alongside the list
   const activeWorkItem = session.activeWorkItemId
-    ? session.workItems.find(wi => wi.id === session.activeWorkItemId)
+    ? session.activeWorkItem ?? session.workItems.find(wi => wi.id === session.activeWorkItemId)
     : null;
 
   // Check permissions
@@ -256,10 +257,15 @@ const WorkItemListItem: React.FC<{
   onSelect: (id: string) => void;
 }> = ({ item, isActive, isModerator, onSelect }) => {
   const isCompleted = item.agreedEstimate !== null && item.agreedEstimate !== undefined;
+  // Summary backlog: the description is fetched on hover, cached while rev matches
+  const details = useSessionStore(state => state.workItemDetails[item.id]);
+  const description = item.description ?? (details?.rev === item.rev ? details.description : undefined);
   
   return (
     <div 
       onClick={() => isModerator && !isActive ? onSelect(item.id) : null}
+      onMouseEnter={() => item.description === undefined && socketService.requestWorkItems([item.id])}
+      title={description || undefined}
       className={`
         p-2 rounded border transition-all relative group flex items-center justify-between
         ${isActive 
@@ -1,8 +1,9 @@
 /// <reference types="vite/client" />
 import { User } from '../types/domain';
 import { useSessionStore } from '../store/sessionStore';
-import { SessionSnapshot } from '../types/domain';
+import { SessionSnapshot, SessionPatch, WorkItemsPage } from '../types/domain';
 import { STORAGE_KEY } from '../constants';
+import { encode, decode } from '../utils/msgpack';
 
 // Determine WebSocket URL from environment or fallback to localhost
 const getWebSocketUrl = () => {
@@ -28,12 +29,39 @@ const getWebSocketUrl = () => {
 
 const WS_BASE_URL = getWebSocketUrl();
 
+// Wire encoding: 'json' (default) or 'msgpack' for compact binary frames
+const WIRE_ENCODING = import.meta.env.VITE_WIRE_ENCODING === 'msgpack' ? 'msgpack' : 'json';
+
+// Large frames (snapshots) arrive zlib-compressed when the browser can inflate them
+const COMPRESSION = typeof DecompressionStream !== 'undefined' ? 'deflate' : null;
+const ZLIB_HEADER = 0x78;
+const JSON_OBJECT = 0x7b; // '{'
+
+// Text frames are JSON, binary frames MessagePack (server falls back to JSON
+// if needed) or a zlib stream of either
+const readFrame = async (raw: string | ArrayBuffer): Promise<any> => {
+  if (typeof raw === 'string') {
+    return JSON.parse(raw);
+  }
+  let bytes = new Uint8Array(raw);
+  if (bytes[0] === ZLIB_HEADER) {
+    const inflated = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+    bytes = new Uint8Array(await new Response(inflated).arrayBuffer());
+    if (bytes[0] === JSON_OBJECT) {
+      return JSON.parse(new TextDecoder().decode(bytes));
+    }
+  }
+  return decode(bytes);
+};
+
 /**
  * Real WebSocket service implementation.
  * Connects to the FastAPI backend.
  */
 class SocketService {
   private socket: WebSocket | null = null;
+  // Frames are handled in arrival order, even when one has to be inflated first
+  private inbound: Promise<void> = Promise.resolve();
 
   connect(sessionId: string, user: User) {
     if (this.socket) {
@@ -44,16 +72,28 @@ class SocketService {
     const params = new URLSearchParams({
       userId: user.id,
       name: user.name,
-      jobRole: user.jobRole || 'Developer'
+      jobRole: user.jobRole || 'Developer',
+      delta: '1', // Receive patches instead of full snapshots after the first one
+      encoding: WIRE_ENCODING,
+      backlog: 'summary' // Work item details beyond the active one are fetched on demand
     });
+    if (COMPRESSION) {
+      params.append('compression', COMPRESSION);
+    }
     if (user.avatarUrl) {
       params.append('avatarUrl', user.avatarUrl);
     }
+    // Reconnecting to the same session: only ask for what was missed
+    const { session, sequenceId } = useSessionStore.getState();
+    if (session && session.id === sessionId && sequenceId !== null) {
+      params.append('resumeFrom', String(sequenceId));
+    }
 
     const url = `${WS_BASE_URL}/${sessionId}?${params.toString()}`;
     console.log(`[SocketService] Connecting to ${url}`);
 
     this.socket = new WebSocket(url);
+    this.socket.binaryType = 'arraybuffer';
 
     this.socket.onopen = () => {
       console.log('[SocketService] Connected');
@@ -61,22 +101,7 @@ class SocketService {
     };
 
     this.socket.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data);
-        
-        // Handle session reset event
-        if (data.event === 'session_reset') {
-          console.log('[SocketService] Session reset by server');
-          localStorage.removeItem(STORAGE_KEY);
-          useSessionStore.getState().resetSession();
-          return;
-        }
-
-        // Assuming the backend sends the raw SessionSnapshot object
-        this.handleSnapshot(data);
-      } catch (e) {
-        console.error('[SocketService] Failed to parse message:', event.data);
-      }
+      this.inbound = this.inbound.then(() => this.handleFrame(event.data));
     };
 
     this.socket.onclose = () => {
@@ -92,6 +117,41 @@ class SocketService {
     };
   }
 
+  private async handleFrame(raw: string | ArrayBuffer) {
+    try {
+      const data = await readFrame(raw);
+      
+      // Handle session reset event
+      if (data.event === 'session_reset') {
+        console.log('[SocketService] Session reset by server');
+        localStorage.removeItem(STORAGE_KEY);
+        useSessionStore.getState().resetSession();
+        return;
+      }
+
+      // Server heartbeat: answer so we are not marked idle / dropped
+      if (data.type === 'ping') {
+        this.send('pong', {});
+        return;
+      }
+
+      if (data.type === 'patch') {
+        this.handlePatch(data);
+        return;
+      }
+
+      if (data.type === 'work_items') {
+        useSessionStore.getState().cacheWorkItems((data as WorkItemsPage).items);
+        return;
+      }
+
+      // Assuming the backend sends the raw SessionSnapshot object
+      this.handleSnapshot(data);
+    } catch (e) {
+      console.error('[SocketService] Failed to parse message:', raw);
+    }
+  }
+
   disconnect() {
     if (this.socket) {
       this.socket.close();
@@ -106,8 +166,27 @@ class SocketService {
       return;
     }
 
-    const message = JSON.stringify({ event, payload });
-    this.socket.send(message);
+    const message = { event, payload };
+    this.socket.send(WIRE_ENCODING === 'msgpack' ? encode(message) : JSON.stringify(message));
+  }
+
+  // Details for work items not already cached at their current rev
+  requestWorkItems(ids: string[]) {
+    const { session, workItemDetails } = useSessionStore.getState();
+    if (!session) return;
+    const revs = new Map(session.workItems.map(item => [item.id, item.rev]));
+    const missing = ids.filter(id => workItemDetails[id]?.rev !== revs.get(id));
+    if (missing.length) {
+      this.send('get_work_items', { ids: missing });
+    }
+  }
+
+  private handlePatch(patch: SessionPatch) {
+    if (!useSessionStore.getState().applySessionPatch(patch)) {
+      // Missed an update (or no base yet) - ask for the full state
+      console.warn('[SocketService] Patch sequence gap, requesting snapshot');
+      this.send('request_snapshot', {});
+    }
   }
 
   private handleSnapshot(snapshot: SessionSnapshot) {
@@ -3,7 +3,9 @@ import { devtools } from 'zustand/middleware';
 import { 
   Session, 
   SessionSnapshot, 
+  SessionPatch,
   User, 
+  WorkItem,
   VoteValue, 
   Vote, 
   SessionPhase 
@@ -12,6 +14,8 @@ import {
 interface SessionState {
   currentUser: User | null;
   session: Session | null;
+  sequenceId: number | null; // Sequence of the last snapshot/patch applied
+  workItemDetails: Record<string, WorkItem>; // Fetched with get_work_items, valid while rev matches
   isConnected: boolean;
   themeMode: 'light' | 'dark'; // Add theme mode
   
@@ -23,6 +27,8 @@ interface SessionState {
   clearVotes: () => void; // Admin/Moderator action
   resetSession: () => void;
   updateSessionSnapshot: (snapshot: SessionSnapshot) => void;
+  applySessionPatch: (patch: SessionPatch) => boolean; // false on sequence gap
+  cacheWorkItems: (items: WorkItem[]) => void;
   setConnected: (connected: boolean) => void;
   toggleTheme: () => void; // Action to toggle theme
 }
@@ -32,6 +38,8 @@ export const useSessionStore = create<SessionState>()(
     (set, get) => ({
       currentUser: null,
       session: null,
+      sequenceId: null,
+      workItemDetails: {},
       isConnected: false,
       themeMode: (localStorage.getItem('themeMode') as 'light' | 'dark') || 'light',
 
@@ -45,7 +53,7 @@ export const useSessionStore = create<SessionState>()(
       },
 
       leaveSession: () => {
-        set({ session: null, isConnected: false });
+        set({ session: null, sequenceId: null, workItemDetails: {}, isConnected: false });
       },
 
       castVote: (value) => {
@@ -106,17 +114,56 @@ export const useSessionStore = create<SessionState>()(
       },
 
       resetSession: () => {
-        set({ session: null, currentUser: null, isConnected: false });
+        set({ session: null, sequenceId: null, workItemDetails: {}, currentUser: null, isConnected: false });
       },
 
       updateSessionSnapshot: (snapshot: SessionSnapshot) => {
         // This is the main sync mechanism from WebSocket
         set({ 
           session: snapshot.session,
-          // Potential to handle sequenceId logic here
+          sequenceId: snapshot.sequenceId,
         });
       },
 
+      applySessionPatch: (patch: SessionPatch) => {
+        const { session, sequenceId } = get();
+        // A gap means we missed something; caller falls back to a full snapshot
+        if (!session || sequenceId !== patch.baseSequenceId) return false;
+
+        const next: any = { ...session };
+        for (const op of patch.ops) {
+          if (op.op === 'set') {
+            next[op.path] = op.value;
+          } else if (op.path === 'votes') {
+            const votes = { ...next.votes };
+            if (op.op === 'upsert') votes[op.id] = op.value;
+            else delete votes[op.id];
+            next.votes = votes;
+          } else {
+            const list: any[] = next[op.path];
+            if (op.op === 'remove') {
+              next[op.path] = list.filter(entry => entry.id !== op.id);
+            } else {
+              const index = list.findIndex(entry => entry.id === op.id);
+              next[op.path] = index === -1
+                ? [...list, op.value]
+                : list.map((entry, i) => (i === index ? op.value : entry));
+            }
+          }
+        }
+
+        set({ session: next as Session, sequenceId: patch.sequenceId });
+        return true;
+      },
+
+      cacheWorkItems: (items: WorkItem[]) => {
+        const workItemDetails = { ...get().workItemDetails };
+        for (const item of items) {
+          workItemDetails[item.id] = item;
+        }
+        set({ workItemDetails });
+      },
+
       setConnected: (connected: boolean) => {
         set({ isConnected: connected });
       },
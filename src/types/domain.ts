@@ -91,6 +91,8 @@ export interface WorkItem {
   agreedEstimate: VoteValue | null;
   /** External link (e.g., to Jira/GitHub issue). */
   linkUrl?: string;
+  /** Bumped by the server on every change; details are cached by (id, rev). */
+  rev?: number;
 }
 
 /**
@@ -122,6 +124,63 @@ export interface Session {
     cardDeck: string[]; // e.g., ['0', '1', '2', '3', '5', '8', ...]
     autoReveal: boolean;
   };
+  /** Round statistics computed by the server. Null until votes are revealed. */
+  stats?: RoundStats | null;
+  /** Who the current round is waiting on, kept up to date by the server. */
+  progress?: RoundProgress | null;
+  /**
+   * Summary backlog projection only: the active work item in full, while
+   * `workItems` carries just id, title, agreedEstimate and rev.
+   */
+  activeWorkItem?: WorkItem | null;
+}
+
+/**
+ * Work item details requested with get_work_items, by id or as a page.
+ */
+export interface WorkItemsPage {
+  type: 'work_items';
+  items: WorkItem[];
+  /** Length of the whole backlog. */
+  total: number;
+  /** Index of the first item, for page requests. */
+  offset?: number;
+}
+
+/**
+ * Statistics over a set of votes, maintained incrementally by the server.
+ * Numeric strings count as numbers; special cards only appear in `distribution`.
+ */
+export interface VoteStats {
+  votes: number;
+  numericVotes: number;
+  average: number | null;
+  median: number | null;
+  min: number | null;
+  max: number | null;
+  consensus: boolean;
+  hasOutliers: boolean;
+  /** Card label -> number of votes. */
+  distribution: Record<string, number>;
+}
+
+/**
+ * Statistics for the current round, overall and per job role.
+ */
+export interface RoundStats extends VoteStats {
+  byRole: Partial<Record<JobRole, VoteStats>>;
+}
+
+/**
+ * Vote counts for the current round. Observers are not eligible; idle and
+ * disconnected voters are not waited for, so `complete` means every
+ * connected voter has voted (and triggers auto-reveal when enabled).
+ */
+export interface RoundProgress {
+  eligible: number;
+  connected: number;
+  voted: number;
+  complete: boolean;
 }
 
 /**
@@ -136,3 +195,29 @@ export interface SessionSnapshot {
   /** Sequence number to handle out-of-order updates if necessary. */
   sequenceId: number;
 }
+
+/**
+ * A single change within a SessionPatch.
+ * 'set' replaces a top-level session field; 'upsert' and 'remove' touch one
+ * entry (by id) of participants, workItems or votes.
+ */
+export type SessionPatchOp =
+  | { op: 'set'; path: keyof Session; value: any }
+  | { op: 'upsert'; path: 'participants' | 'workItems' | 'votes'; id: string; value: any }
+  | { op: 'remove'; path: 'participants' | 'workItems' | 'votes'; id: string };
+
+/**
+ * Incremental update sent instead of a full snapshot when the client
+ * connects with `delta=1`. Only applies on top of `baseSequenceId`.
+ */
+export interface SessionPatch {
+  type: 'patch';
+  /** Sequence number the patch was computed against. */
+  baseSequenceId: number;
+  /** Sequence number after applying the patch. */
+  sequenceId: number;
+  /** Timestamp of the patch generation. */
+  timestamp: string;
+  /** Ordered changes to apply. */
+  ops: SessionPatchOp[];
+}
@@ -0,0 +1,126 @@
+/**
+ * Minimal MessagePack codec for the session wire protocol.
+ * Covers the types the backend sends and receives: nil, booleans, integers,
+ * float64, strings, arrays and string-keyed maps.
+ */
+
+const textEncoder = new TextEncoder();
+const textDecoder = new TextDecoder();
+
+/**
+ * Decode a single MessagePack value.
+ */
+export const decode = (bytes: Uint8Array): any => {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  let offset = 0;
+
+  const str = (length: number) => {
+    const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+    offset += length;
+    return value;
+  };
+  const array = (length: number) => {
+    const value = new Array(length);
+    for (let i = 0; i < length; i++) value[i] = read();
+    return value;
+  };
+  const map = (length: number) => {
+    const value: Record<string, any> = {};
+    for (let i = 0; i < length; i++) {
+      const key = read();
+      value[key] = read();
+    }
+    return value;
+  };
+
+  const read = (): any => {
+    const type = bytes[offset++];
+
+    if (type <= 0x7f) return type; // positive fixint
+    if (type >= 0xe0) return type - 0x100; // negative fixint
+    if ((type & 0xf0) === 0x80) return map(type & 0x0f);
+    if ((type & 0xf0) === 0x90) return array(type & 0x0f);
+    if ((type & 0xe0) === 0xa0) return str(type & 0x1f);
+
+    let value: any;
+    switch (type) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+      case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+      case 0xcc: return bytes[offset++];
+      case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+      case 0xce: value = view.getUint32(offset); offset += 4; return value;
+      case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+      case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+      case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+      case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+      case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+      case 0xd9: value = bytes[offset++]; return str(value);
+      case 0xda: value = view.getUint16(offset); offset += 2; return str(value);
+      case 0xdb: value = view.getUint32(offset); offset += 4; return str(value);
+      case 0xdc: value = view.getUint16(offset); offset += 2; return array(value);
+      case 0xdd: value = view.getUint32(offset); offset += 4; return array(value);
+      case 0xde: value = view.getUint16(offset); offset += 2; return map(value);
+      case 0xdf: value = view.getUint32(offset); offset += 4; return map(value);
+      default:
+        throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+    }
+  };
+
+  return read();
+};
+
+/**
+ * Encode a JSON-compatible value as MessagePack.
+ */
+export const encode = (value: any): Uint8Array => {
+  const chunks: number[] = [];
+
+  const pushUint = (n: number, size: number) => {
+    for (let shift = (size - 1) * 8; shift >= 0; shift -= 8) chunks.push((n >>> shift) & 0xff);
+  };
+  const pushHeader = (length: number, fix: number, fixMax: number, codes: [number, number, number]) => {
+    if (length <= fixMax) chunks.push(fix | length);
+    else if (codes[0] && length <= 0xff) { chunks.push(codes[0]); pushUint(length, 1); }
+    else if (length <= 0xffff) { chunks.push(codes[1]); pushUint(length, 2); }
+    else { chunks.push(codes[2]); pushUint(length, 4); }
+  };
+
+  const write = (v: any) => {
+    if (v === null || v === undefined) {
+      chunks.push(0xc0);
+    } else if (typeof v === 'boolean') {
+      chunks.push(v ? 0xc3 : 0xc2);
+    } else if (typeof v === 'number') {
+      if (Number.isInteger(v) && v >= 0 && v <= 0x7f) chunks.push(v);
+      else if (Number.isInteger(v) && v < 0 && v >= -32) chunks.push(0x100 + v);
+      else if (Number.isInteger(v) && v >= -0x80000000 && v <= 0xffffffff) {
+        if (v >= 0) { chunks.push(0xce); pushUint(v, 4); }
+        else { chunks.push(0xd2); pushUint(v >>> 0, 4); }
+      } else {
+        const buffer = new DataView(new ArrayBuffer(8));
+        buffer.setFloat64(0, v);
+        chunks.push(0xcb, ...new Uint8Array(buffer.buffer));
+      }
+    } else if (typeof v === 'string') {
+      const utf8 = textEncoder.encode(v);
+      pushHeader(utf8.length, 0xa0, 0x1f, [0xd9, 0xda, 0xdb]);
+      for (const b of utf8) chunks.push(b);
+    } else if (Array.isArray(v)) {
+      pushHeader(v.length, 0x90, 0x0f, [0, 0xdc, 0xdd]);
+      v.forEach(write);
+    } else {
+      const entries = Object.entries(v).filter(([, entry]) => entry !== undefined);
+      pushHeader(entries.length, 0x80, 0x0f, [0, 0xde, 0xdf]);
+      for (const [key, entry] of entries) {
+        write(key);
+        write(entry);
+      }
+    }
+  };
+
+  write(value);
+  return new Uint8Array(chunks);
+};